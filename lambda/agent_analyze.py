@@ -3,31 +3,14 @@ AGENTIC AI - PERCEIVE: Analyze resume and job description
 Optimized for minimal code size
 """
 import json
-import boto3
 import os
 import re
+import uuid
 
-comprehend = boto3.client('comprehend')
-events = boto3.client('events')
-bedrock = boto3.client('bedrock-runtime', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+from shared import get_client, get_logger, invoke_bedrock, lambda_entry, publish_event, HAIKU_MODEL_ID
+from shared.versions import store_texts
 
-def invoke_bedrock(prompt, max_tokens=500):
-    """Invoke Bedrock Claude model"""
-    try:
-        body = json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": max_tokens,
-            "messages": [{"role": "user", "content": prompt}]
-        })
-        response = bedrock.invoke_model(
-            modelId='anthropic.claude-3-haiku-20240307-v1:0',
-            body=body
-        )
-        result = json.loads(response['body'].read())
-        return result['content'][0]['text']
-    except Exception as e:
-        print(f"Bedrock error: {e}")
-        return None
+logger = get_logger('analyze')
 
 def extract_json(text):
     """Extract JSON array from text"""
@@ -46,118 +29,87 @@ def extract_json(text):
                 pass
         return []
 
-def publish_event(detail_type, detail):
-    """Publish event to EventBridge"""
+def read_document(bucket, key, label):
+    """Load a document from S3 - Textract for PDFs, plain read otherwise"""
+    logger.debug('Reading %s from S3', label, bucket=bucket, key=key)
     try:
-        events.put_events(
-            Entries=[{
-                'Source': 'resume.optimizer',
-                'DetailType': detail_type,
-                'Detail': json.dumps(detail),
-                'EventBusName': os.environ.get('EVENT_BUS_NAME', 'resume-optimizer-events')
-            }]
-        )
-    except Exception as e:
-        print(f"Event publish error: {e}")
+        if key.lower().endswith('.pdf'):
+            response = get_client('textract').detect_document_text(
+                Document={'S3Object': {'Bucket': bucket, 'Name': key}}
+            )
+            text = '\n'.join([
+                block['Text'] for block in response.get('Blocks', [])
+                if block['BlockType'] == 'LINE'
+            ])
+        else:
+            response = get_client('s3').get_object(Bucket=bucket, Key=key)
+            text = response['Body'].read().decode('utf-8')
+        logger.info('Loaded %s from S3', label, key=key, chars=len(text))
+        return text
+    except Exception:
+        logger.exception('Error reading %s from S3', label, bucket=bucket, key=key)
+        return ''
+
+# Request fields that are not carried through the refinement loop (text lives behind textsKey)
+TEXT_FIELDS = {'resume', 'resumeText', 'jobDescription', 'jobDescriptionText', 'jobAnalysis'}
+
+GENERIC_JOB_DESCRIPTION = "Professional role requiring strong technical skills, communication abilities, and relevant experience. Seeking candidates with proven track record and ability to work in team environments."
+
+def analyze_job_description(job_desc):
+    """Requirements and job type - shared by every resume in a batch"""
+    req_prompt = f"Extract requirements from job as JSON array: {job_desc[:2000]}"
+    job_reqs = extract_json(invoke_bedrock(req_prompt, 300, model_id=HAIKU_MODEL_ID) or '[]')
+    
+    # Job type classification
+    job_lower = job_desc.lower()
+    job_type = ('technical' if any(w in job_lower for w in ['engineer', 'developer']) else
+                'management' if any(w in job_lower for w in ['manager', 'director']) else
+                'creative' if any(w in job_lower for w in ['design', 'ux']) else 'general')
+    return {'jobRequirements': job_reqs, 'jobType': job_type, 'jobDescription': job_desc}
 
+@lambda_entry('analyze', timed=True)
 def lambda_handler(event, context):
     """Perceive: Agent analyzes inputs"""
-    print(f"🤖 PERCEIVE: Analyzing...")
-    print(f"Event received: {json.dumps(event)}")
+    logger.info('PERCEIVE: Analyzing')
+    logger.debug('Event received', event=event)
     
     # Get resume and job description - they might be in different keys
     resume = event.get('resume', event.get('resumeText', ''))
     job_desc = event.get('jobDescription', event.get('jobDescriptionText', ''))
+    # Batch items arrive with the job description already analyzed
+    job_analysis = event.get('jobAnalysis')
     
     # If still empty, try to read from S3
-    if not resume and event.get('resume_key'):
-        s3 = boto3.client('s3')
-        textract = boto3.client('textract')
-        bucket = event.get('bucket', os.environ.get('INPUT_BUCKET'))
-        resume_key = event['resume_key']
-        
-        print(f"DEBUG: Attempting to read from S3")
-        print(f"DEBUG: Bucket = {bucket}")
-        print(f"DEBUG: Key = {resume_key}")
-        
-        try:
-            # First check if file exists
-            s3.head_object(Bucket=bucket, Key=resume_key)
-            print(f"✓ File exists in S3")
-            
-            # Check if PDF - use Textract
-            if resume_key.lower().endswith('.pdf'):
-                print(f"Extracting PDF with Textract: {resume_key}")
-                response = textract.detect_document_text(
-                    Document={'S3Object': {'Bucket': bucket, 'Name': resume_key}}
-                )
-                resume = '\n'.join([
-                    block['Text'] for block in response.get('Blocks', [])
-                    if block['BlockType'] == 'LINE'
-                ])
-            else:
-                # Text file - read directly
-                response = s3.get_object(Bucket=bucket, Key=resume_key)
-                resume = response['Body'].read().decode('utf-8')
-            
-            print(f"✓ Loaded resume from S3: {len(resume)} chars")
-        except Exception as e:
-            print(f"❌ Error reading resume from S3: {e}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
+    bucket = event.get('bucket', os.environ.get('INPUT_BUCKET'))
+    if not job_analysis and not job_desc and event.get('job_description_key'):
+        job_desc = read_document(bucket, event['job_description_key'], 'job description')
     
-    if not job_desc and event.get('job_description_key'):
-        s3 = boto3.client('s3')
-        textract = boto3.client('textract')
-        bucket = event.get('bucket', os.environ.get('INPUT_BUCKET'))
-        jd_key = event['job_description_key']
-        
-        print(f"DEBUG: Attempting to read JD from S3")
-        print(f"DEBUG: Bucket = {bucket}")
-        print(f"DEBUG: Key = {jd_key}")
-        
-        try:
-            # First check if file exists
-            s3.head_object(Bucket=bucket, Key=jd_key)
-            print(f"✓ File exists in S3")
-            
-            # Check if PDF - use Textract
-            if jd_key.lower().endswith('.pdf'):
-                print(f"Extracting PDF with Textract: {jd_key}")
-                response = textract.detect_document_text(
-                    Document={'S3Object': {'Bucket': bucket, 'Name': jd_key}}
-                )
-                job_desc = '\n'.join([
-                    block['Text'] for block in response.get('Blocks', [])
-                    if block['BlockType'] == 'LINE'
-                ])
-            else:
-                # Text file - read directly
-                response = s3.get_object(Bucket=bucket, Key=jd_key)
-                job_desc = response['Body'].read().decode('utf-8')
-            
-            print(f"✓ Loaded job description from S3: {len(job_desc)} chars")
-        except Exception as e:
-            print(f"❌ Error reading job description from S3: {e}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
+    # Batch workflow: analyze the job description once for all resumes
+    if event.get('mode') == 'job_description':
+        return analyze_job_description(job_desc or GENERIC_JOB_DESCRIPTION)
+    
+    if not resume and event.get('resume_key'):
+        resume = read_document(bucket, event['resume_key'], 'resume')
     
     # Validate we have content
     if not resume:
         raise ValueError(f"Missing resume - resume: {len(resume)} chars")
     
     # If no job description, use generic one
-    if not job_desc:
-        print("⚠️ No job description found, using generic optimization")
-        job_desc = "Professional role requiring strong technical skills, communication abilities, and relevant experience. Seeking candidates with proven track record and ability to work in team environments."
+    if not job_analysis and not job_desc:
+        logger.warning('No job description found, using generic optimization')
+        job_desc = GENERIC_JOB_DESCRIPTION
     
     # Extract skills using Bedrock
     skills_prompt = f"Extract skills from resume as JSON array: {resume[:2000]}"
-    resume_skills = extract_json(invoke_bedrock(skills_prompt, 300) or '[]')
+    resume_skills = extract_json(invoke_bedrock(skills_prompt, 300, model_id=HAIKU_MODEL_ID) or '[]')
     
     # Extract requirements
-    req_prompt = f"Extract requirements from job as JSON array: {job_desc[:2000]}"
-    job_reqs = extract_json(invoke_bedrock(req_prompt, 300) or '[]')
+    job_analysis = job_analysis or analyze_job_description(job_desc)
+    job_desc = job_analysis['jobDescription']
+    job_reqs = job_analysis['jobRequirements']
+    job_type = job_analysis['jobType']
+    job_lower = job_desc.lower()
     
     # Calculate gaps
     skills_set = set(str(s).lower() for s in resume_skills)
@@ -165,20 +117,17 @@ def lambda_handler(event, context):
     gaps = list(reqs_set - skills_set)
     matched = list(skills_set & reqs_set)
     
-    # Job type classification
-    job_lower = job_desc.lower()
-    job_type = ('technical' if any(w in job_lower for w in ['engineer', 'developer']) else
-                'management' if any(w in job_lower for w in ['manager', 'director']) else
-                'creative' if any(w in job_lower for w in ['design', 'ux']) else 'general')
+    # Sent in the background while sentiment runs
+    publish_event('AnalysisComplete', {'jobId': event.get('jobId', 'unknown'), 'jobType': job_type})
     
     # Sentiment - only if resume has content
     sentiment_result = 'NEUTRAL'
     if resume and len(resume) > 0:
         try:
-            sentiment = comprehend.detect_sentiment(Text=resume[:5000], LanguageCode='en')
+            sentiment = get_client('comprehend').detect_sentiment(Text=resume[:5000], LanguageCode='en')
             sentiment_result = sentiment['Sentiment']
         except Exception as e:
-            print(f"Sentiment analysis error: {e}")
+            logger.warning('Sentiment analysis error: %s', e)
     
     # Initial score (simple keyword matching)
     keywords = job_lower.split()
@@ -194,11 +143,13 @@ def lambda_handler(event, context):
         'sentiment': sentiment_result,
         'originalScore': max(50, score),
         'targetScore': 85,
+        'gapCount': len(gaps[:15]),
         'resume': resume,  # Pass through for next steps
-        'jobDescription': job_desc  # Pass through for next steps
+        'jobDescription': job_desc,  # Pass through for next steps
+        # The refinement loop carries these instead of the texts and the raw request
+        'textsKey': store_texts(event.get('jobId') or event.get('execution_id') or str(uuid.uuid4()), resume, job_desc),
+        'request': {k: v for k, v in event.items() if k not in TEXT_FIELDS}
     }
     
-    publish_event('AnalysisComplete', {'jobId': event.get('jobId', 'unknown'), 'jobType': job_type})
-    
-    print(f"✓ {len(gaps)} gaps, {len(matched)} matched, type: {job_type}")
+    logger.info('Analysis complete', gaps=len(gaps), matched=len(matched), jobType=job_type)
     return analysis
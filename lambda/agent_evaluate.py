@@ -1,166 +1,176 @@
 """
 AGENTIC AI - EVALUATE: Score versions and select best
 Optimized for minimal code size
+Returns score summaries only: the best EVALUATION_HISTORY versions across
+iterations are kept as S3 references, so the loop state stays the same size.
 """
-import json
-import boto3
 import os
 import re
 
-events = boto3.client('events')
-EVENT_BUS_NAME = os.environ.get('EVENT_BUS_NAME', 'resume-optimizer-events')
+from shared import get_logger, lambda_entry, publish_event
+from shared.versions import store_content, with_texts
 
+logger = get_logger('evaluate')
 
-def publish_event(detail_type, detail):
-    """Publish event to EventBridge"""
-    try:
-        events.put_events(
-            Entries=[{
-                'Source': 'resume.optimizer',
-                'DetailType': detail_type,
-                'Detail': json.dumps(detail),
-                'EventBusName': EVENT_BUS_NAME
-            }]
-        )
-    except Exception as e:
-        print(f"Event publish error: {e}")
+HISTORY_SIZE = int(os.environ.get('EVALUATION_HISTORY', '3'))
 
+def summary(version, **extra):
+    """A version without its text"""
+    return {
+        'approach': version['approach'],
+        'iteration': version.get('iteration', 1),
+        'score': version['score'],
+        'chars': version.get('chars', len(version.get('content', ''))),
+        'durationMs': version.get('durationMs'),
+        **({'contentKey': version['contentKey']} if 'contentKey' in version else {}),
+        **extra
+    }
+
+def score_version(content, job_desc):
+    """Score one version's content against the job description"""
+    # PRODUCTION-READY SCORING ALGORITHM
+    
+    # 1. ATS Score - Keyword Matching (40% weight)
+    # Filter out common words for better matching
+    common_words = {'with', 'from', 'that', 'this', 'have', 'will', 'your', 'their', 
+                   'about', 'which', 'when', 'where', 'what', 'been', 'were', 'said',
+                   'each', 'them', 'than', 'some', 'into', 'only', 'over', 'such',
+                   'just', 'also', 'very', 'well', 'back', 'good', 'much', 'work',
+                   'year', 'make', 'most', 'many', 'more', 'time', 'role', 'team',
+                   'using', 'based', 'across', 'within', 'through', 'under'}
+    
+    job_words = set(w for w in re.findall(r'\b\w{4,}\b', job_desc.lower()) 
+                   if w not in common_words)
+    resume_words = set(w for w in re.findall(r'\b\w{4,}\b', content.lower()) 
+                      if w not in common_words)
+    
+    if job_words:
+        keyword_match = len(job_words & resume_words) / len(job_words)
+        # BEST PRACTICE: Realistic ATS scoring (75-100 range for production)
+        # Most professional resumes score 80-95% in real ATS systems
+        ats = int(75 + (keyword_match * 25))
+    else:
+        keyword_match = 0.8
+        ats = 88  # Default strong score for well-formatted resumes
+    
+    # 2. Action Verbs (15% weight) - Comprehensive list
+    verbs = ['led', 'managed', 'developed', 'created', 'implemented', 'designed', 
+             'built', 'launched', 'achieved', 'improved', 'increased', 'reduced',
+             'architected', 'engineered', 'automated', 'optimized', 'delivered',
+             'established', 'spearheaded', 'drove', 'executed', 'collaborated',
+             'partnered', 'conducted', 'introduced', 'migrated', 'deployed',
+             're-architected', 'standardized', 'accelerated', 'enhanced',
+             'designed', 'configured', 'integrated', 'streamlined', 'transformed']
+    action_count = sum(1 for v in verbs if v in content.lower())
+    # BEST PRACTICE: Professional resumes have 15-25 action verbs
+    action_score = min(70 + (action_count * 2), 100)  # Base 70, +2 per verb
+    
+    # 3. Quantified Achievements (15% weight) - Aggressive detection
+    metrics_patterns = [
+        r'\d+[%x×+]',  # 75%, 10x, 5×, 4+
+        r'\$\d+[KMB]?',  # $100K, $5M
+        r'\d+\+?\s*(?:years?|months?|weeks?|days?)',  # 4+ years
+        r'\d+\+?\s*(?:users?|clients?|customers?|projects?|teams?)',  # 20+ clients
+        r'(?:increased|reduced|improved|achieved|generated|saved|grew|boosted).*?\d+',
+        r'\d+\s*(?:hours?|members?|representatives?)',
+    ]
+    metrics = sum(len(re.findall(pattern, content, re.I)) for pattern in metrics_patterns)
+    # BEST PRACTICE: 8-15 quantified achievements is excellent
+    metrics_score = min(75 + (metrics * 3), 100)  # Base 75, +3 per metric
+    
+    # 4. Professional Formatting (15% weight)
+    format_score = 0
+    # Check for key sections (more lenient matching)
+    if re.search(r'(?:SUMMARY|PROFESSIONAL|PROFILE|OBJECTIVE)', content, re.I):
+        format_score += 25
+    if re.search(r'(?:EXPERIENCE|EMPLOYMENT|WORK|PROFESSIONAL)', content, re.I):
+        format_score += 25
+    if re.search(r'(?:EDUCATION|CERTIFICATIONS|QUALIFICATIONS)', content, re.I):
+        format_score += 25
+    if re.search(r'(?:SKILLS|TECHNICAL|COMPETENCIES|EXPERTISE)', content, re.I):
+        format_score += 25
+    
+    # 5. Content Quality Indicators (10% weight)
+    quality_score = 70  # Base quality score
+    # Bonus for length (well-detailed resumes)
+    if len(content) > 2000:
+        quality_score += 10
+    # Bonus for technical terms
+    tech_terms = ['aws', 'cloud', 'terraform', 'kubernetes', 'docker', 'ci/cd', 
+                 'lambda', 'api', 'database', 'security', 'automation']
+    tech_count = sum(1 for term in tech_terms if term in content.lower())
+    quality_score += min(tech_count * 2, 20)
+    quality_score = min(quality_score, 100)
+    
+    # 6. Resume Completeness (10% weight)
+    completeness = 70  # Base
+    # Check for contact info
+    if re.search(r'[\w\.-]+@[\w\.-]+\.\w+', content):  # Email
+        completeness += 10
+    if re.search(r'\+?\d{1,3}[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}', content):  # Phone
+        completeness += 10
+    # Check for location
+    if re.search(r'(?:New York|NY|California|CA|Texas|TX|Remote)', content, re.I):
+        completeness += 10
+    completeness = min(completeness, 100)
+    
+    # BEST PRACTICE: Weighted scoring optimized for production
+    # Base score starts at 75 for any professional resume
+    base_score = 75
+    
+    # Calculate component scores
+    overall = (
+        ats * 0.35 +              # ATS/Keywords: 35%
+        action_score * 0.15 +     # Action Verbs: 15%
+        metrics_score * 0.15 +    # Achievements: 15%
+        format_score * 0.15 +     # Formatting: 15%
+        quality_score * 0.10 +    # Content Quality: 10%
+        completeness * 0.10       # Completeness: 10%
+    )
+    
+    # BEST PRACTICE: Apply minimum threshold for professional resumes
+    # Any resume with proper structure should score at least 80
+    if format_score >= 75 and action_count >= 10:
+        overall = max(overall, 82)  # Minimum 82 for well-structured resumes
+    
+    # Cap at 100
+    overall = min(overall, 100)
+    
+    return {
+        'overall': round(overall, 2),
+        'ats': ats,
+        'keywords': keyword_match,
+        'actionVerbs': action_count,
+        'achievements': metrics
+    }
+
+@lambda_entry('evaluate', timed=True)
 def lambda_handler(event, context):
     """Evaluate: Agent scores its work"""
-    print(f"📊 EVALUATE: Scoring versions...")
+    logger.info('EVALUATE: Scoring versions')
     
     versions = event.get('versions', [])
-    job_desc = event.get('jobDescription', '')
-    
-    # Score each version
-    scored = []
-    for v in versions:
-        content = v.get('content', '')
-        
-        # PRODUCTION-READY SCORING ALGORITHM
-        
-        # 1. ATS Score - Keyword Matching (40% weight)
-        # Filter out common words for better matching
-        common_words = {'with', 'from', 'that', 'this', 'have', 'will', 'your', 'their', 
-                       'about', 'which', 'when', 'where', 'what', 'been', 'were', 'said',
-                       'each', 'them', 'than', 'some', 'into', 'only', 'over', 'such',
-                       'just', 'also', 'very', 'well', 'back', 'good', 'much', 'work',
-                       'year', 'make', 'most', 'many', 'more', 'time', 'role', 'team',
-                       'using', 'based', 'across', 'within', 'through', 'under'}
-        
-        job_words = set(w for w in re.findall(r'\b\w{4,}\b', job_desc.lower()) 
-                       if w not in common_words)
-        resume_words = set(w for w in re.findall(r'\b\w{4,}\b', content.lower()) 
-                          if w not in common_words)
-        
-        if job_words:
-            keyword_match = len(job_words & resume_words) / len(job_words)
-            # BEST PRACTICE: Realistic ATS scoring (75-100 range for production)
-            # Most professional resumes score 80-95% in real ATS systems
-            ats = int(75 + (keyword_match * 25))
-        else:
-            keyword_match = 0.8
-            ats = 88  # Default strong score for well-formatted resumes
-        
-        # 2. Action Verbs (15% weight) - Comprehensive list
-        verbs = ['led', 'managed', 'developed', 'created', 'implemented', 'designed', 
-                 'built', 'launched', 'achieved', 'improved', 'increased', 'reduced',
-                 'architected', 'engineered', 'automated', 'optimized', 'delivered',
-                 'established', 'spearheaded', 'drove', 'executed', 'collaborated',
-                 'partnered', 'conducted', 'introduced', 'migrated', 'deployed',
-                 're-architected', 'standardized', 'accelerated', 'enhanced',
-                 'designed', 'configured', 'integrated', 'streamlined', 'transformed']
-        action_count = sum(1 for v in verbs if v in content.lower())
-        # BEST PRACTICE: Professional resumes have 15-25 action verbs
-        action_score = min(70 + (action_count * 2), 100)  # Base 70, +2 per verb
-        
-        # 3. Quantified Achievements (15% weight) - Aggressive detection
-        metrics_patterns = [
-            r'\d+[%x×+]',  # 75%, 10x, 5×, 4+
-            r'\$\d+[KMB]?',  # $100K, $5M
-            r'\d+\+?\s*(?:years?|months?|weeks?|days?)',  # 4+ years
-            r'\d+\+?\s*(?:users?|clients?|customers?|projects?|teams?)',  # 20+ clients
-            r'(?:increased|reduced|improved|achieved|generated|saved|grew|boosted).*?\d+',
-            r'\d+\s*(?:hours?|members?|representatives?)',
-        ]
-        metrics = sum(len(re.findall(pattern, content, re.I)) for pattern in metrics_patterns)
-        # BEST PRACTICE: 8-15 quantified achievements is excellent
-        metrics_score = min(75 + (metrics * 3), 100)  # Base 75, +3 per metric
-        
-        # 4. Professional Formatting (15% weight)
-        format_score = 0
-        # Check for key sections (more lenient matching)
-        if re.search(r'(?:SUMMARY|PROFESSIONAL|PROFILE|OBJECTIVE)', content, re.I):
-            format_score += 25
-        if re.search(r'(?:EXPERIENCE|EMPLOYMENT|WORK|PROFESSIONAL)', content, re.I):
-            format_score += 25
-        if re.search(r'(?:EDUCATION|CERTIFICATIONS|QUALIFICATIONS)', content, re.I):
-            format_score += 25
-        if re.search(r'(?:SKILLS|TECHNICAL|COMPETENCIES|EXPERTISE)', content, re.I):
-            format_score += 25
-        
-        # 5. Content Quality Indicators (10% weight)
-        quality_score = 70  # Base quality score
-        # Bonus for length (well-detailed resumes)
-        if len(content) > 2000:
-            quality_score += 10
-        # Bonus for technical terms
-        tech_terms = ['aws', 'cloud', 'terraform', 'kubernetes', 'docker', 'ci/cd', 
-                     'lambda', 'api', 'database', 'security', 'automation']
-        tech_count = sum(1 for term in tech_terms if term in content.lower())
-        quality_score += min(tech_count * 2, 20)
-        quality_score = min(quality_score, 100)
-        
-        # 6. Resume Completeness (10% weight)
-        completeness = 70  # Base
-        # Check for contact info
-        if re.search(r'[\w\.-]+@[\w\.-]+\.\w+', content):  # Email
-            completeness += 10
-        if re.search(r'\+?\d{1,3}[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}', content):  # Phone
-            completeness += 10
-        # Check for location
-        if re.search(r'(?:New York|NY|California|CA|Texas|TX|Remote)', content, re.I):
-            completeness += 10
-        completeness = min(completeness, 100)
-        
-        # BEST PRACTICE: Weighted scoring optimized for production
-        # Base score starts at 75 for any professional resume
-        base_score = 75
-        
-        # Calculate component scores
-        overall = (
-            ats * 0.35 +              # ATS/Keywords: 35%
-            action_score * 0.15 +     # Action Verbs: 15%
-            metrics_score * 0.15 +    # Achievements: 15%
-            format_score * 0.15 +     # Formatting: 15%
-            quality_score * 0.10 +    # Content Quality: 10%
-            completeness * 0.10       # Completeness: 10%
-        )
-        
-        # BEST PRACTICE: Apply minimum threshold for professional resumes
-        # Any resume with proper structure should score at least 80
-        if format_score >= 75 and action_count >= 10:
-            overall = max(overall, 82)  # Minimum 82 for well-structured resumes
-        
-        # Cap at 100
-        overall = min(overall, 100)
-        
-        scored.append({
-            **v,
-            'score': {
-                'overall': round(overall, 2),
-                'ats': ats,
-                'keywords': keyword_match,
-                'actionVerbs': action_count,
-                'achievements': metrics
-            }
-        })
-    
-    # Select best
-    best = max(scored, key=lambda x: x['score']['overall'])
+    job_desc = event.get('jobDescription') or event.get('analysis', {}).get('jobDescription') or \
+        with_texts({'textsKey': event.get('textsKey')}).get('jobDescription', '')
+    job_id = event.get('jobId', 'unknown')
+    previous = event.get('history') or (event.get('evaluation') or {}).get('history', [])
+    rounds = event.get('rounds') or (event.get('evaluation') or {}).get('rounds', [])
+    
+    # Score each version (speculative generation already scored its versions)
+    scored = [v if 'score' in v else {**v, 'score': score_version(v.get('content', ''), job_desc)}
+              for v in versions]
+    
+    # Best N across iterations (ties keep the earlier version); only new entries are written out
+    ranked = sorted(previous + scored, key=lambda x: x['score']['overall'], reverse=True)[:HISTORY_SIZE]
+    history = [v if 'contentKey' in v else summary(v, contentKey=store_content(job_id, v)) for v in ranked]
+    best = history[0]
     
+    summaries = [summary(v) for v in scored]
     evaluation = {
-        'versions': scored,
+        'versions': summaries,
+        'history': history,
+        # Every iteration's score summaries, for the run log (a few hundred bytes per round)
+        'rounds': rounds + [{'iteration': event.get('iteration', 1), 'versions': summaries}],
         'bestVersion': best,
         'bestScore': best['score']['overall'],
         'bestApproach': best['approach'],
@@ -175,5 +185,5 @@ def lambda_handler(event, context):
         'score': best['score']['overall']
     })
     
-    print(f"✓ Best: {best['approach']} ({best['score']['overall']}/100)")
+    logger.info('Best version selected', approach=best['approach'], score=best['score']['overall'])
     return evaluation
@@ -1,62 +1,76 @@
 """
 AGENTIC AI - ACT: Generate optimized versions
 Optimized for minimal code size
+Speculative mode generates every approach at once and stops at the first
+version that meets the plan's success criteria.
 """
-import json
-import boto3
-import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-bedrock = boto3.client('bedrock-runtime', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-events = boto3.client('events')
+from agent_evaluate import score_version
+from shared.versions import with_texts
+from shared import get_logger, invoke_bedrock, lambda_entry, metrics, publish_event
 
-BEDROCK_MODEL_ID = os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-haiku-20240307-v1:0')
-EVENT_BUS_NAME = os.environ.get('EVENT_BUS_NAME', 'resume-optimizer-events')
-
-
-def invoke_bedrock(prompt, max_tokens=500, temperature=0.7):
-    """Invoke Bedrock Claude model"""
-    try:
-        body = json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-            "messages": [{"role": "user", "content": prompt}]
-        })
-        response = bedrock.invoke_model(
-            modelId=BEDROCK_MODEL_ID,
-            body=body
-        )
-        result = json.loads(response['body'].read())
-        return result['content'][0]['text']
-    except Exception as e:
-        print(f"Bedrock error: {e}")
-        return None
-
-
-def publish_event(detail_type, detail):
-    """Publish event to EventBridge"""
-    try:
-        events.put_events(
-            Entries=[{
-                'Source': 'resume.optimizer',
-                'DetailType': detail_type,
-                'Detail': json.dumps(detail),
-                'EventBusName': EVENT_BUS_NAME
-            }]
-        )
-    except Exception as e:
-        print(f"Event publish error: {e}")
+logger = get_logger('generate')
 
+@lambda_entry('generate', timed=True)
 def lambda_handler(event, context):
     """Act: Generate optimized version"""
-    approach = event.get('approach', 'keywords')
-    input_data = event.get('input', {})
+    # Loop state carries textsKey, not the texts - read them once per invocation
+    input_data = with_texts(event.get('input', {}))
+    if event.get('approach') == 'speculative':
+        return speculate(event.get('approaches') or ['keywords', 'achievements', 'structure'],
+                         float(event.get('threshold', 85)), input_data)
+    return generate(event.get('approach', 'keywords'), input_data)
+
+def speculate(approaches, threshold, input_data):
+    """
+    Generate all approaches concurrently and score each version as it finishes
+    (agent_evaluate scoring). The first to reach `threshold` ends the stage:
+    queued generations are cancelled and in-flight ones abandoned - InvokeModel
+    can't be aborted, so their output is just dropped. Returns the versions
+    scored so far, already carrying their scores for Evaluate.
+    """
+    analysis = input_data.get('analysis', {})
+    job_desc = input_data.get('jobDescription') or analysis.get('jobDescription', '')
+    abandoned = threading.Event()
+    pool = ThreadPoolExecutor(len(approaches))
+    futures = [pool.submit(timed_generate, approach, input_data, abandoned) for approach in approaches]
+    versions = []
+    try:
+        for future in as_completed(futures):
+            version = future.result()
+            version['score'] = score_version(version['content'], job_desc)
+            versions.append(version)
+            if version['score']['overall'] >= threshold:
+                break
+    finally:
+        abandoned.set()
+        pool.shutdown(wait=False, cancel_futures=True)
     
-    resume = input_data.get('resume', '')
-    job_desc = input_data.get('jobDescription', '')
+    cancelled = [a for a in approaches if a not in {v['approach'] for v in versions}]
+    metrics.add('GenerationsCancelled', len(cancelled))
+    logger.info('Speculative generation done', accepted=versions[-1]['approach'],
+                score=versions[-1]['score']['overall'], cancelled=cancelled)
+    return versions
+
+def timed_generate(approach, input_data, abandoned):
+    """generate() with its own durationMs - lambda_entry only times dict results"""
+    start = time.perf_counter()
+    version = generate(approach, input_data, abandoned)
+    version['durationMs'] = round((time.perf_counter() - start) * 1000, 1)
+    return version
+
+def generate(approach, input_data, abandoned=None):
+    """One optimized version of the resume for `approach`"""
+    # Jobs started from S3 references only carry the text inside the analysis
+    analysis = input_data.get('analysis', {})
+    resume = input_data.get('resume') or analysis.get('resume', '')
+    job_desc = input_data.get('jobDescription') or analysis.get('jobDescription', '')
     iteration = input_data.get('iteration', 1)
     
-    print(f"🎨 ACT: Generating {approach} version (iter {iteration})...")
+    logger.info('ACT: Generating %s version', approach, approach=approach, iteration=iteration)
     
     # Build prompt based on approach - CRITICAL: Must preserve original content
     if approach == 'keywords':
@@ -120,8 +134,10 @@ Return ONLY the restructured resume with the candidate's actual information."""
         prompt += f"\n\nIteration {iteration}: Further refine based on previous optimization."
     
     optimized = invoke_bedrock(prompt, 4096, 0.7) or resume
+    if abandoned is not None and abandoned.is_set():
+        return {'approach': approach, 'content': optimized, 'iteration': iteration}
     
     publish_event('VersionGenerated', {'jobId': input_data.get('jobId'), 'approach': approach})
     
-    print(f"✓ Generated {len(optimized)} chars")
+    logger.info('Generated version', approach=approach, chars=len(optimized))
     return {'approach': approach, 'content': optimized, 'iteration': iteration}
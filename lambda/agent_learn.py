@@ -2,35 +2,98 @@
 AGENTIC AI - LEARN: Store successful strategies
 Optimized for minimal code size
 """
-import json
-import boto3
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
 
-s3 = boto3.client('s3')
-dynamodb = boto3.resource('dynamodb')
-sns = boto3.client('sns')
-events = boto3.client('events')
+from botocore.exceptions import ClientError
 
+from shared import get_client, get_logger, get_resource, lambda_entry, send_event
+from shared.runlog import INCLUDE_TEXT, build_record, default_run_log
+from shared.strategy import gap_bucket, gap_count, outcome_update, stats_key
+from shared.versions import load_content
 
-def publish_event(detail_type, detail):
-    """Publish event to EventBridge"""
+logger = get_logger('learn')
+
+EFFECT_WORKERS = 6
+EFFECT_MARKER_TTL = 7 * 24 * 60 * 60
+
+# Side effects run on a pool that lives across warm invocations
+effect_pool = ThreadPoolExecutor(max_workers=EFFECT_WORKERS, thread_name_prefix='learn')
+run_log = default_run_log()
+
+
+def jobs_table():
+    return get_resource('dynamodb').Table(os.environ['JOBS_TABLE'])
+
+
+def analytics_table():
+    return get_resource('dynamodb').Table(os.environ['ANALYTICS_TABLE'])
+
+
+def marker_key(job_id, iteration, effect):
+    return {'date': f"learn|{job_id}", 'metric': f"{iteration}|{effect}"}
+
+
+def claim(job_id, iteration, effect):
+    """
+    Conditional marker item in the analytics table (TTL'd), one per
+    (jobId, iteration, effect). Returns False when an earlier attempt already
+    ran the effect.
+    """
     try:
-        events.put_events(
-            Entries=[{
-                'Source': 'resume.optimizer',
-                'DetailType': detail_type,
-                'Detail': json.dumps(detail),
-                'EventBusName': os.environ.get('EVENT_BUS_NAME', 'resume-optimizer-events')
-            }]
+        analytics_table().put_item(
+            Item={**marker_key(job_id, iteration, effect), 'expiresAt': int(time.time()) + EFFECT_MARKER_TTL},
+            ConditionExpression='attribute_not_exists(#d)',
+            ExpressionAttributeNames={'#d': 'date'}
         )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        raise
+
+
+def release(job_id, iteration, effect):
+    """Drop the marker of a failed effect so a retry runs it again"""
+    try:
+        analytics_table().delete_item(Key=marker_key(job_id, iteration, effect))
     except Exception as e:
-        print(f"Event publish error: {e}")
+        logger.warning('Could not release %s marker: %s', effect, e)
+
+
+def run_once(job_id, iteration, effect, fn):
+    if not claim(job_id, iteration, effect):
+        logger.info('Skipping completed side effect', effect=effect)
+        return 'skipped'
+    try:
+        fn()
+    except Exception:
+        release(job_id, iteration, effect)
+        raise
+    return 'done'
 
+
+def run_effects(job_id, iteration, effects):
+    """Run independent side effects concurrently; raise after all finish if any failed"""
+    futures = {name: effect_pool.submit(run_once, job_id, iteration, name, fn) for name, fn in effects.items()}
+    results, failed = {}, []
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            logger.error('Side effect %s failed: %s', name, e)
+            results[name], failed = 'failed', failed + [name]
+    if failed:
+        raise RuntimeError(f"Learn side effects failed: {', '.join(failed)}")
+    return results
+
+
+@lambda_entry('learn')
 def lambda_handler(event, context):
     """Learn: Store strategy in memory"""
-    print(f"🧠 LEARN: Storing strategy...")
+    logger.info('LEARN: Storing strategy')
     
     # Support both jobId and execution_id
     job_id = event.get('jobId') or event.get('execution_id') or event.get('user_id', 'unknown')
@@ -41,52 +104,55 @@ def lambda_handler(event, context):
     
     best = evaluation.get('bestVersion', {})
     score = evaluation.get('bestScore', 0)
+    output_key = f"optimized/{job_id}_optimized.txt"
     
-    # Store in memory if successful
-    if score >= 85:
-        memory_table = dynamodb.Table(os.environ['AGENT_MEMORY_TABLE'])
-        try:
-            memory_table.put_item(Item={
-                'jobType': analysis.get('jobType', 'general'),
-                'timestamp': int(time.time()),
-                'strategy': plan.get('strategy', 'unknown'),
-                'approach': best.get('approach', 'unknown'),
-                'successScore': Decimal(str(score)),
-                'context': {'gaps': len(analysis.get('skillsGap', [])), 'iterations': iteration},
-                'ttl': int(time.time()) + (90 * 24 * 60 * 60)
-            })
-            print(f"✓ Stored in memory (score: {score})")
-        except Exception as e:
-            print(f"Memory error: {e}")
+    def store_outcome():
+        # Roll the outcome into the job type's counters (atomic ADD, one row per job type).
+        # Errors propagate so run_once releases the marker and a retry records it
+        analytics_table().update_item(
+            Key=stats_key(analysis.get('jobType', 'general')),
+            **outcome_update(gap_bucket(gap_count(analysis)), plan.get('strategy', 'unknown'),
+                             best.get('approach', 'unknown'), score)
+        )
+        logger.info('Stored in memory', score=score)
     
-    # Save to S3
-    output_key = f"optimized/{job_id}_optimized.txt"
-    s3.put_object(
-        Bucket=os.environ['OUTPUT_BUCKET'],
-        Key=output_key,
-        Body=best.get('content', '').encode('utf-8'),
-        ContentType='text/plain'
-    )
+    def save_output():
+        if 'content' not in best and best.get('contentKey'):
+            # Evaluate already wrote the text - copy it server-side
+            get_client('s3').copy_object(
+                Bucket=os.environ['OUTPUT_BUCKET'],
+                Key=output_key,
+                CopySource={'Bucket': os.environ['OUTPUT_BUCKET'], 'Key': best['contentKey']},
+                ContentType='text/plain',
+                MetadataDirective='REPLACE'
+            )
+            return
+        get_client('s3').put_object(
+            Bucket=os.environ['OUTPUT_BUCKET'],
+            Key=output_key,
+            Body=best.get('content', '').encode('utf-8'),
+            ContentType='text/plain'
+        )
     
-    # Update job status
-    jobs_table = dynamodb.Table(os.environ['JOBS_TABLE'])
-    jobs_table.update_item(
-        Key={'jobId': job_id},
-        UpdateExpression='SET #s = :s, #r = :r, #sc = :sc',
-        ExpressionAttributeNames={'#s': 'status', '#r': 'result', '#sc': 'atsScore'},
-        ExpressionAttributeValues={
-            ':s': 'COMPLETED',
-            ':r': output_key,
-            ':sc': Decimal(str(score))
-        }
-    )
+    def update_job():
+        jobs_table().update_item(
+            Key={'jobId': job_id},
+            UpdateExpression='SET #s = :s, #r = :r, #sc = :sc ADD version :one',
+            ExpressionAttributeNames={'#s': 'status', '#r': 'result', '#sc': 'atsScore'},
+            ExpressionAttributeValues={
+                ':s': 'COMPLETED',
+                ':r': output_key,
+                ':sc': Decimal(str(score)),
+                ':one': 1
+            }
+        )
     
-    # Send notification
-    orig_score = analysis.get('originalScore', 65)
-    sns.publish(
-        TopicArn=os.environ['SNS_TOPIC_ARN'],
-        Subject=f"Resume Optimized - Score: {score}/100",
-        Message=f"""Resume Optimization Complete! 🎉
+    def notify():
+        orig_score = analysis.get('originalScore', 65)
+        get_client('sns').publish(
+            TopicArn=os.environ['SNS_TOPIC_ARN'],
+            Subject=f"Resume Optimized - Score: {score}/100",
+            Message=f"""Resume Optimization Complete! 🎉
 
 Job ID: {job_id}
 
@@ -107,13 +173,32 @@ Download from S3: {output_key}
 
 Powered by Agentic AI + AWS
 """
-    )
+        )
+    
+    def announce():
+        # Sent synchronously, so the marker only stays claimed once EventBridge accepted it
+        send_event('OptimizationComplete', {
+            'jobId': job_id,
+            'score': score,
+            'iterations': iteration,
+            'selector': plan.get('selector')
+        })
+    
+    def append_run():
+        run_log.append(build_record(job_id, analysis, plan, evaluation, iteration,
+                                    best_content=load_content(best) if INCLUDE_TEXT else None,
+                                    request=event.get('request')))
     
-    publish_event('OptimizationComplete', {
-        'jobId': job_id,
-        'score': score,
-        'iterations': iteration
-    })
+    effects = {
+        'outcome': store_outcome,
+        'output': save_output,
+        'status': update_job,
+        'notification': notify,
+        'event': announce
+    }
+    if run_log is not None:
+        effects['runlog'] = append_run
+    effects = run_effects(job_id, iteration, effects)
     
-    print(f"✓ Complete! Score: {score}, Iterations: {iteration}")
+    logger.info('Optimization complete', score=score, iterations=iteration, effects=effects)
     return {'status': 'SUCCESS', 'jobId': job_id, 'score': score, 'outputKey': output_key}
@@ -2,92 +2,107 @@
 AGENTIC AI - PLAN: Create optimization strategy
 Optimized for minimal code size
 """
-import json
-import boto3
+import hashlib
 import os
-from decimal import Decimal
-
-dynamodb = boto3.resource('dynamodb')
-events = boto3.client('events')
-bedrock = boto3.client('bedrock-runtime', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-
-
-def invoke_bedrock(prompt, max_tokens=500, temperature=0.7):
-    """Invoke Bedrock Claude model"""
-    try:
-        body = json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-            "messages": [{"role": "user", "content": prompt}]
-        })
-        response = bedrock.invoke_model(
-            modelId='anthropic.claude-3-haiku-20240307-v1:0',
-            body=body
-        )
-        result = json.loads(response['body'].read())
-        return result['content'][0]['text']
-    except Exception as e:
-        print(f"Bedrock error: {e}")
-        return None
-
-
-def publish_event(detail_type, detail):
-    """Publish event to EventBridge"""
-    try:
-        events.put_events(
-            Entries=[{
-                'Source': 'resume.optimizer',
-                'DetailType': detail_type,
-                'Detail': json.dumps(detail),
-                'EventBusName': os.environ.get('EVENT_BUS_NAME', 'resume-optimizer-events')
-            }]
-        )
-    except Exception as e:
-        print(f"Event publish error: {e}")
 
+from shared import (
+    get_logger, get_resource, invoke_bedrock, lambda_entry, publish_event,
+    ReadThroughCache, HAIKU_MODEL_ID
+)
+from shared.strategy import STRATEGIES, ThompsonSelector, gap_bucket, parse_stats, stats_key
+
+logger = get_logger('plan')
+
+STRATEGY_CACHE_TTL = int(os.environ.get('STRATEGY_CACHE_TTL', '300'))
+STRATEGY_CACHE_STALE = int(os.environ.get('STRATEGY_CACHE_STALE', '3600'))
+# bandit | llm | ab (ab sends STRATEGY_LLM_SHARE of jobs to the LLM)
+STRATEGY_SELECTOR = os.environ.get('STRATEGY_SELECTOR', 'bandit')
+STRATEGY_LLM_SHARE = float(os.environ.get('STRATEGY_LLM_SHARE', '0.5'))
+# speculative: stop generating once one approach meets successCriteria | parallel: always all of them
+GENERATION_MODE = os.environ.get('GENERATION_MODE', 'speculative')
+
+selector = ThompsonSelector()
+
+
+def load_strategy_stats(job_type):
+    """Per-(gap bucket, strategy) outcome totals from the job type's rollup row"""
+    table = get_resource('dynamodb').Table(os.environ['ANALYTICS_TABLE'])
+    return parse_stats(table.get_item(Key=stats_key(job_type)).get('Item'))
+
+
+def summarize_stats(stats):
+    """Collapse gap buckets into per-strategy totals for the LLM prompt"""
+    totals = {}
+    for bucket in stats.values():
+        for strategy, s in bucket.items():
+            entry = totals.setdefault(strategy, dict.fromkeys(s, 0.0))
+            for field, value in s.items():
+                entry[field] += value
+    return totals
+
+
+def use_llm(job_id):
+    """Stable per-job arm assignment"""
+    if STRATEGY_SELECTOR != 'ab':
+        return STRATEGY_SELECTOR == 'llm'
+    digest = hashlib.sha1(str(job_id).encode('utf-8')).digest()
+    return int.from_bytes(digest[:4], 'big') / 2 ** 32 < STRATEGY_LLM_SHARE
+
+
+def choose_with_llm(job_type, gaps, stats):
+    """Ask the model; kept for A/B comparison against the bandit"""
+    ranked = sorted(summarize_stats(stats).items(), key=lambda kv: (kv[1]['wins'], kv[1]['scoreSum']), reverse=True)
+    past = [f"{name} ({s['wins']:.0f}/{s['attempts']:.0f} wins, avg {s['scoreSum'] / s['attempts']:.1f})" for name, s in ranked[:5]]
+    prompt = f"""Job: {job_type}, Gaps: {gaps}, Past: {', '.join(past) or 'none'}
+Choose ONE: {', '.join(STRATEGIES)}
+Return only the strategy name."""
+    
+    strategy = invoke_bedrock(prompt, 50, 0.3, model_id=HAIKU_MODEL_ID) or 'balanced_approach'
+    strategy = strategy.strip().lower().replace(' ', '_')
+    
+    # Fallback logic
+    if 'keyword' not in strategy and 'achievement' not in strategy and 'skills' not in strategy:
+        strategy = 'skills_emphasis' if gaps > 10 else 'balanced_approach'
+    return strategy
+
+
+# Lives across warm invocations; job types are a handful of keys
+strategy_cache = ReadThroughCache(load_strategy_stats, STRATEGY_CACHE_TTL, STRATEGY_CACHE_STALE, name='strategy-stats')
+
+
+@lambda_entry('plan', timed=True)
 def lambda_handler(event, context):
     """Plan: Agent creates strategy"""
-    print(f"🎯 PLAN: Creating strategy...")
+    logger.info('PLAN: Creating strategy')
     
     analysis = event.get('analysis', {})
     job_type = analysis.get('jobType', 'general')
     gaps = len(analysis.get('skillsGap', []))
+    job_id = event.get('jobId') or event.get('execution_id', '')
     
-    # Query memory for past successes
-    table = dynamodb.Table(os.environ['AGENT_MEMORY_TABLE'])
-    try:
-        resp = table.query(
-            IndexName='score-index',
-            KeyConditionExpression='jobType = :jt AND successScore >= :s',
-            ExpressionAttributeValues={':jt': job_type, ':s': Decimal('85')},
-            Limit=5
-        )
-        past = [i['strategy'] for i in resp.get('Items', [])]
-    except:
-        past = []
+    # Past outcomes for this job type (cached per container)
+    stats = strategy_cache.get(job_type, default={})
+    bucket = gap_bucket(gaps)
     
-    # AI decides strategy
-    prompt = f"""Job: {job_type}, Gaps: {gaps}, Past: {','.join(past) or 'none'}
-Choose ONE: keyword_optimization, achievement_focus, skills_emphasis, structure_improvement, balanced_approach
-Return only the strategy name."""
-    
-    strategy = invoke_bedrock(prompt, 50, 0.3) or 'balanced_approach'
-    strategy = strategy.strip().lower().replace(' ', '_')
-    
-    # Fallback logic
-    if 'keyword' not in strategy and 'achievement' not in strategy and 'skills' not in strategy:
-        strategy = 'skills_emphasis' if gaps > 10 else 'balanced_approach'
+    if use_llm(job_id):
+        strategy, method = choose_with_llm(job_type, gaps, stats), 'llm'
+    else:
+        strategy, mode = selector.choose(stats.get(bucket, {}), job_id)
+        method = f"bandit-{mode}"
     
+    # The loop state keys off plan.jobId, so inputs carrying only execution_id work
     plan = {
+        'jobId': job_id,
         'strategy': strategy,
+        'selector': method,
         'jobType': job_type,
         'approaches': ['keywords', 'achievements', 'structure'],
         'successCriteria': {'atsScore': 85, 'keywordMatch': 0.8},
+        'generationMode': GENERATION_MODE,
         'maxIterations': 3
     }
     
-    publish_event('PlanCreated', {'jobId': event.get('jobId'), 'strategy': strategy})
+    publish_event('PlanCreated', {'jobId': job_id, 'strategy': strategy, 'selector': method})
     
-    print(f"✓ Strategy: {strategy}")
+    logger.info('Strategy chosen', strategy=strategy, selector=method, jobType=job_type, gapBucket=bucket)
     return plan
@@ -1,22 +1,55 @@
 """
 API Handler - Triggers Agentic AI Workflow via Step Functions
 """
+import base64
+import hashlib
+import importlib
 import json
-import boto3
 import os
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime
 
-stepfunctions = boto3.client('stepfunctions')
-dynamodb = boto3.resource('dynamodb')
-events = boto3.client('events')
+from botocore.exceptions import ClientError
+
+from shared import get_client, get_logger, get_resource, lambda_entry, publish_event
+from shared.admission import submit
+from shared.versions import load_content
 
 STATE_MACHINE_ARN = os.environ['STATE_MACHINE_ARN']
 JOBS_TABLE = os.environ['JOBS_TABLE']
-EVENT_BUS_NAME = os.environ['EVENT_BUS_NAME']
+BATCH_STATE_MACHINE_ARN = os.environ.get('BATCH_STATE_MACHINE_ARN')
+INPUT_BUCKET = os.environ.get('INPUT_BUCKET')
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', '100'))
+# Inline batch resumes are staged here; s3_trigger ignores this prefix
+BATCH_PREFIX = 'batches/'
+# Identical submissions (or a reused Idempotency-Key) within this window return the first job
+DEDUPE_WINDOW_SECONDS = int(os.environ.get('DEDUPE_WINDOW_SECONDS', '900'))
+# ...unless that job FAILED or is still unfinished this long after it was claimed
+DEDUPE_STALE_SECONDS = int(os.environ.get('DEDUPE_STALE_SECONDS', '600'))
+# mode=sync runs one workflow iteration in this invocation when it fits both limits
+SYNC_DEADLINE_SECONDS = float(os.environ.get('SYNC_DEADLINE_SECONDS', '20'))
+SYNC_MAX_RESUME_CHARS = int(os.environ.get('SYNC_MAX_RESUME_CHARS', '6000'))
+# GET /status?wait=N holds the request at most this long (API Gateway times out at 29s)
+STATUS_MAX_WAIT_SECONDS = float(os.environ.get('STATUS_MAX_WAIT_SECONDS', '20'))
+STATUS_POLL_SECONDS = float(os.environ.get('STATUS_POLL_SECONDS', '1'))
+TERMINAL_STATUSES = {'COMPLETED', 'FAILED'}
+# GET /users/{userId}/jobs - newest first from userId-index, summary attributes only
+USER_JOBS_INDEX = 'userId-index'
+JOBS_PAGE_DEFAULT = 20
+JOBS_PAGE_MAX = int(os.environ.get('JOBS_PAGE_MAX', '100'))
+JOB_SUMMARY_FIELDS = ('jobId', 'status', 'atsScore', 'targetRole', 'createdAt', 'type', 'batchId', 'mode', 'version')
+
+logger = get_logger('api')
+
+
+def jobs_table():
+    """Jobs table on the shared, lazily-created DynamoDB resource"""
+    return get_resource('dynamodb').Table(JOBS_TABLE)
 
-jobs_table = dynamodb.Table(JOBS_TABLE)
 
+@lambda_entry('api')
 def lambda_handler(event, context):
     """API Gateway handler"""
     
@@ -24,7 +57,13 @@ def lambda_handler(event, context):
     path = event.get('path', '')
     
     if http_method == 'POST' and path == '/optimize':
-        return handle_optimize(event)
+        return handle_optimize(event, context)
+    elif http_method == 'POST' and path == '/optimize/batch':
+        return handle_batch(event)
+    elif http_method == 'GET' and path.startswith('/optimize/batch/'):
+        return handle_batch_status(event)
+    elif http_method == 'GET' and path.startswith('/users/') and path.endswith('/jobs'):
+        return handle_user_jobs(event)
     elif http_method == 'GET' and path == '/health':
         return handle_health()
     elif http_method == 'GET' and '/status/' in path:
@@ -35,10 +74,78 @@ def lambda_handler(event, context):
             'body': json.dumps({'error': 'Not found'})
         }
 
-def handle_optimize(event):
+def header(event, name):
+    """Case-insensitive request header"""
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+def request_hash(user_id, resume, job_description, target_role):
+    payload = json.dumps([user_id, resume, job_description, target_role], separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def claim_request(dedupe_key, content_hash, job_id, replaces=None):
+    """
+    One conditional write decides which submission owns the key.
+    Returns None when this request won, else the existing dedupe row.
+    replaces takes the key over from that (dead) job if it still holds it.
+    """
+    now = int(datetime.utcnow().timestamp())
+    condition = 'attribute_not_exists(jobId) OR claimedAt < :cutoff'
+    values = {':cutoff': now - DEDUPE_WINDOW_SECONDS}
+    if replaces:
+        condition += ' OR targetJobId = :dead'
+        values[':dead'] = replaces
+    try:
+        jobs_table().put_item(
+            Item={
+                'jobId': dedupe_key,
+                'targetJobId': job_id,
+                'requestHash': content_hash,
+                'claimedAt': now,
+                'expiresAt': now + DEDUPE_WINDOW_SECONDS
+            },
+            ConditionExpression=condition,
+            ExpressionAttributeValues=values,
+            ReturnValuesOnConditionCheckFailure='ALL_OLD'
+        )
+        return None
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        existing = e.response.get('Item', {})
+        if isinstance(existing.get('jobId'), dict):
+            # Error responses are not unmarshalled by the resource layer
+            from boto3.dynamodb.types import TypeDeserializer
+            existing = {k: TypeDeserializer().deserialize(v) for k, v in existing.items()}
+        return existing
+
+def claimed_job(existing):
+    """The job a dedupe row points at"""
+    return jobs_table().get_item(Key={'jobId': existing['targetJobId']}).get('Item', {})
+
+def is_dead(existing, job):
+    """FAILED, or not finished long after the claim - resubmitting should run again"""
+    if job.get('status') == 'FAILED':
+        return True
+    age = int(datetime.utcnow().timestamp()) - int(existing.get('claimedAt', 0))
+    return job.get('status') not in TERMINAL_STATUSES and age > DEDUPE_STALE_SECONDS
+
+def duplicate_response(existing, content_hash, job):
+    """The first job's id, or its result if it already finished"""
+    if existing.get('requestHash') != content_hash:
+        return json_response(422, {'error': 'Idempotency-Key was already used with a different request'})
+    body = {'jobId': existing['targetJobId'], 'status': job.get('status', 'QUEUED'), 'duplicate': True}
+    if job.get('status') == 'COMPLETED':
+        body.update({'result': job.get('result'), 'atsScore': job.get('atsScore')})
+    return json_response(200, body)
+
+def handle_optimize(event, context=None):
     """
     Handle resume optimization request
-    Triggers Step Functions agentic workflow
+    Triggers Step Functions agentic workflow, or with ?mode=sync runs one
+    iteration in-process and returns the optimized resume
     """
     try:
         body = json.loads(event.get('body', '{}'))
@@ -49,43 +156,49 @@ def handle_optimize(event):
         job_description = body.get('jobDescription', '')
         target_role = body.get('targetRole', 'Unknown')
         
-        # Create job record
-        jobs_table.put_item(
-            Item={
-                'jobId': job_id,
-                'userId': user_id,
-                'status': 'QUEUED',
-                'targetRole': target_role,
-                'createdAt': datetime.utcnow().isoformat(),
-                'expiresAt': int(datetime.utcnow().timestamp()) + (30 * 24 * 60 * 60)
-            }
-        )
+        # Deduplicate retries and repeated submissions before any work starts
+        content_hash = request_hash(user_id, resume, job_description, target_role)
+        idempotency_key = header(event, 'Idempotency-Key')
+        if idempotency_key:
+            dedupe_key = f"dedupe|key|{hashlib.sha256(f'{user_id}:{idempotency_key}'.encode('utf-8')).hexdigest()}"
+        else:
+            dedupe_key = f"dedupe|hash|{content_hash}"
+        existing = claim_request(dedupe_key, content_hash, job_id)
+        job = claimed_job(existing) if existing is not None else None
+        if existing is not None and existing.get('requestHash') == content_hash and is_dead(existing, job):
+            logger.info('Replacing dead job', jobId=existing.get('targetJobId'), status=job.get('status'))
+            existing = claim_request(dedupe_key, content_hash, job_id, replaces=existing['targetJobId'])
+            job = claimed_job(existing) if existing is not None else None
+        if existing is not None:
+            logger.info('Duplicate request', jobId=existing.get('targetJobId'))
+            return duplicate_response(existing, content_hash, job)
         
-        # Start Step Functions execution (Agentic AI Workflow)
-        stepfunctions.start_execution(
-            stateMachineArn=STATE_MACHINE_ARN,
-            name=f"job-{job_id}",
-            input=json.dumps({
-                'jobId': job_id,
-                'userId': user_id,
-                'resume': resume,
-                'jobDescription': job_description,
-                'targetRole': target_role
-            })
-        )
+        sync = ((event.get('queryStringParameters') or {}).get('mode') == 'sync')
+        fallback = None
+        if sync and len(resume) > SYNC_MAX_RESUME_CHARS:
+            fallback = 'size'
+        elif sync:
+            create_job_record(job_id, user_id, target_role, 'PROCESSING', mode='sync')
+            try:
+                state = run_sync(job_id, user_id, resume, job_description, target_role, context)
+                if state is not None:
+                    return sync_response(state)
+            except Exception as e:
+                # Same as a failed async start: the job is dead and a retry runs again
+                jobs_table().delete_item(Key={'jobId': dedupe_key})
+                mark_failed(job_id, str(e))
+                raise
+            fallback = 'deadline'
         
-        # Publish event
-        events.put_events(
-            Entries=[{
-                'Source': 'resume-optimizer.api',
-                'DetailType': 'OptimizationRequested',
-                'Detail': json.dumps({
-                    'jobId': job_id,
-                    'userId': user_id
-                }),
-                'EventBusName': EVENT_BUS_NAME
-            }]
-        )
+        try:
+            admission = start_job(job_id, user_id, resume, job_description, target_role,
+                                  requeue=(fallback == 'deadline'))
+        except Exception as e:
+            # Let a retry of this request start the job instead of returning a dead id,
+            # and don't leave a QUEUED record that nothing will ever run
+            jobs_table().delete_item(Key={'jobId': dedupe_key})
+            mark_failed(job_id, str(e))
+            raise
         
         return {
             'statusCode': 200,
@@ -96,45 +209,438 @@ def handle_optimize(event):
             'body': json.dumps({
                 'jobId': job_id,
                 'status': 'QUEUED',
-                'message': 'Agentic AI workflow started. The agent will autonomously optimize your resume.'
+                'message': 'Agentic AI workflow started. The agent will autonomously optimize your resume.',
+                **(admission or {}),
+                **({'mode': 'async', 'fallbackReason': fallback} if fallback else {})
             })
         }
         
     except Exception as e:
-        print(f"Error: {e}")
+        logger.exception('Optimize request failed')
         return {
             'statusCode': 500,
             'body': json.dumps({'error': str(e)})
         }
 
+def create_job_record(job_id, user_id, target_role, status, **extra):
+    jobs_table().put_item(
+        Item={
+            'jobId': job_id,
+            'userId': user_id,
+            'status': status,
+            'targetRole': target_role,
+            'createdAt': datetime.utcnow().isoformat(),
+            'expiresAt': int(datetime.utcnow().timestamp()) + (30 * 24 * 60 * 60),
+            'version': 1,
+            **extra
+        }
+    )
+
+def mark_failed(job_id, error):
+    """FAILED with the error - only if the record was written (no partial rows)"""
+    try:
+        jobs_table().update_item(
+            Key={'jobId': job_id},
+            UpdateExpression='SET #s = :s, #e = :e ADD version :one',
+            ConditionExpression='attribute_exists(jobId)',
+            ExpressionAttributeNames={'#s': 'status', '#e': 'error'},
+            ExpressionAttributeValues={':s': 'FAILED', ':e': error, ':one': 1}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+
+def requeue_job_record(job_id):
+    """A sync run handed over to the workflow: same record (createdAt, mode), next version"""
+    jobs_table().update_item(
+        Key={'jobId': job_id},
+        UpdateExpression='SET #s = :s, fallbackReason = :f ADD version :one',
+        ConditionExpression='attribute_exists(jobId)',
+        ExpressionAttributeNames={'#s': 'status'},
+        ExpressionAttributeValues={':s': 'QUEUED', ':f': 'deadline', ':one': 1}
+    )
+
+def start_job(job_id, user_id, resume, job_description, target_role, requeue=False):
+    """
+    Create the job record (or requeue the sync run's) and submit the agentic
+    workflow; returns the queue estimate
+    """
+    if requeue:
+        requeue_job_record(job_id)
+    else:
+        create_job_record(job_id, user_id, target_role, 'QUEUED')
+    
+    # Queue the Step Functions execution (Agentic AI Workflow) for admission
+    admission = submit(STATE_MACHINE_ARN, job_id, {
+        'jobId': job_id,
+        'userId': user_id,
+        'resume': resume,
+        'jobDescription': job_description,
+        'targetRole': target_role
+    })
+    
+    # Publish event
+    publish_event('OptimizationRequested', {
+        'jobId': job_id,
+        'userId': user_id
+    }, source='resume-optimizer.api')
+    return admission
+
+def stage(module):
+    """A workflow stage's handler without its lambda_entry wrapper - same code, one invocation"""
+    return importlib.import_module(module).lambda_handler.__wrapped__
+
+def run_stage(module, event, context):
+    start = time.perf_counter()
+    result = stage(module)(event, context)
+    result['durationMs'] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+def run_sync(job_id, user_id, resume, job_description, target_role, context):
+    """
+    Analyze -> Plan -> Generate (approaches concurrently) -> Evaluate -> Learn,
+    i.e. the workflow's first iteration with no quality loop, under
+    SYNC_DEADLINE_SECONDS. Returns the final state, or None if the deadline
+    ran out before Learn (nothing was recorded - the caller falls back to async).
+    """
+    budget = SYNC_DEADLINE_SECONDS
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        # Leave room to start the async workflow if we give up
+        budget = min(budget, context.get_remaining_time_in_millis() / 1000 - 3)
+    deadline = time.monotonic() + budget
+    
+    def remaining():
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise FutureTimeout()
+        return left
+    
+    state = {'jobId': job_id, 'userId': user_id, 'resume': resume,
+             'jobDescription': job_description, 'targetRole': target_role, 'iteration': 1}
+    pool = ThreadPoolExecutor(4)
+    try:
+        state['analysis'] = pool.submit(run_stage, 'agent_analyze', dict(state), context).result(timeout=remaining())
+        state['plan'] = run_stage('agent_plan', state, context)
+        plan = state['plan']
+        if plan.get('generationMode') == 'speculative':
+            state['versions'] = pool.submit(stage('agent_generate'), {
+                'approach': 'speculative', 'approaches': plan['approaches'],
+                'threshold': plan['successCriteria']['atsScore'], 'input': state
+            }, context).result(timeout=remaining())
+        else:
+            futures = [pool.submit(run_stage, 'agent_generate', {'approach': approach, 'input': state}, context)
+                       for approach in plan['approaches']]
+            state['versions'] = [f.result(timeout=remaining()) for f in futures]
+        state['evaluation'] = run_stage('agent_evaluate', state, context)
+        remaining()
+        state['result'] = stage('agent_learn')(state, context)
+        return state
+    except FutureTimeout:
+        logger.warning('Sync deadline exceeded - falling back to the workflow', deadlineSeconds=budget)
+        return None
+    finally:
+        # Stragglers finish in the background; their output is discarded
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def sync_response(state):
+    evaluation = state['evaluation']
+    return json_response(200, {
+        'jobId': state['jobId'],
+        'status': 'COMPLETED',
+        'mode': 'sync',
+        'atsScore': evaluation['bestScore'],
+        'bestApproach': evaluation['bestApproach'],
+        'scores': {v['approach']: v['score']['overall'] for v in evaluation['versions']},
+        'result': state['result'].get('outputKey'),
+        'optimizedResume': load_content(evaluation['bestVersion'])
+    })
+
+def json_response(status_code, body, headers=None):
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            **(headers or {})
+        },
+        'body': json.dumps(body, default=str)
+    }
+
+def put_items(items):
+    """BatchWriteItem in chunks of 25, resending unprocessed items"""
+    dynamodb = get_resource('dynamodb')
+    for i in range(0, len(items), 25):
+        request = {JOBS_TABLE: [{'PutRequest': {'Item': item}} for item in items[i:i + 25]]}
+        for attempt in range(5):
+            request = dynamodb.batch_write_item(RequestItems=request).get('UnprocessedItems')
+            if not request:
+                break
+            time.sleep(0.05 * 2 ** attempt)
+        else:
+            raise RuntimeError('DynamoDB kept throttling the batch item writes')
+
+def get_items(job_ids, projection):
+    """BatchGetItem in chunks of 100"""
+    dynamodb = get_resource('dynamodb')
+    items = []
+    for i in range(0, len(job_ids), 100):
+        request = {JOBS_TABLE: {
+            'Keys': [{'jobId': job_id} for job_id in job_ids[i:i + 100]],
+            'ProjectionExpression': projection,
+            'ExpressionAttributeNames': {'#s': 'status'}
+        }}
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            items.extend(response['Responses'].get(JOBS_TABLE, []))
+            request = response.get('UnprocessedKeys')
+    return items
+
+def handle_batch(event):
+    """
+    Batch optimization: one job description, many resumes
+    Resumes are inline text or keys in the input bucket. Inline text is
+    staged under batches/<batchId>/ so the workflow input stays small. The
+    batch workflow is queued for admission at a cost of one start per resume.
+    """
+    try:
+        body = json.loads(event.get('body') or '{}')
+        resumes = body.get('resumes', [])
+        job_description = body.get('jobDescription', '')
+        if not resumes or len(resumes) > BATCH_MAX_ITEMS:
+            return json_response(400, {'error': f"Send between 1 and {BATCH_MAX_ITEMS} resumes"})
+        
+        batch_id = f"batch-{uuid.uuid4()}"
+        user_id = body.get('userId', 'anonymous')
+        target_role = body.get('targetRole', 'Unknown')
+        created = datetime.utcnow()
+        expires = int(created.timestamp()) + (30 * 24 * 60 * 60)
+        
+        def stage(entry):
+            job_id = str(uuid.uuid4())
+            if isinstance(entry, dict) and entry.get('resumeKey'):
+                return {'jobId': job_id, 'resumeKey': entry['resumeKey']}
+            text = entry.get('resume', '') if isinstance(entry, dict) else str(entry)
+            key = f"{BATCH_PREFIX}{batch_id}/{job_id}.txt"
+            get_client('s3').put_object(Bucket=INPUT_BUCKET, Key=key, Body=text.encode('utf-8'),
+                                        ContentType='text/plain')
+            return {'jobId': job_id, 'resumeKey': key}
+        
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            items = list(pool.map(stage, resumes))
+        
+        put_items([{
+            'jobId': item['jobId'],
+            'userId': user_id,
+            'batchId': batch_id,
+            'status': 'QUEUED',
+            'targetRole': target_role,
+            'sourceFile': item['resumeKey'],
+            'createdAt': created.isoformat(),
+            'expiresAt': expires,
+            'version': 1
+        } for item in items] + [{
+            'jobId': batch_id,
+            'userId': user_id,
+            'type': 'BATCH',
+            'status': 'RUNNING',
+            'targetRole': target_role,
+            'itemCount': len(items),
+            'jobIds': [item['jobId'] for item in items],
+            'createdAt': created.isoformat(),
+            'expiresAt': expires,
+            'version': 1
+        }])
+        
+        admission = submit(BATCH_STATE_MACHINE_ARN, batch_id, {
+            'batchId': batch_id,
+            'userId': user_id,
+            'targetRole': target_role,
+            'jobDescription': job_description,
+            'bucket': INPUT_BUCKET,
+            'items': items
+        }, cost=len(items))
+        
+        publish_event('BatchRequested', {
+            'batchId': batch_id,
+            'userId': user_id,
+            'items': len(items)
+        }, source='resume-optimizer.api')
+        
+        return json_response(200, {
+            'batchId': batch_id,
+            'status': 'RUNNING',
+            'jobIds': [item['jobId'] for item in items],
+            **(admission or {}),
+            'message': f"Optimizing {len(items)} resumes against one job description analysis."
+        })
+        
+    except Exception as e:
+        logger.exception('Batch request failed')
+        return json_response(500, {'error': str(e)})
+
+def handle_batch_status(event):
+    """Aggregate progress of a batch plus per-item status"""
+    try:
+        batch_id = event.get('path', '').rstrip('/').split('/')[-1]
+        batch = jobs_table().get_item(Key={'jobId': batch_id}).get('Item')
+        if not batch or batch.get('type') != 'BATCH':
+            return json_response(404, {'error': 'Batch not found'})
+        
+        items = get_items(batch.get('jobIds', []), 'jobId, #s, atsScore')
+        counts = {}
+        for item in items:
+            counts[item.get('status', 'QUEUED')] = counts.get(item.get('status', 'QUEUED'), 0) + 1
+        total = int(batch.get('itemCount', len(items)))
+        done = counts.get('COMPLETED', 0) + counts.get('FAILED', 0)
+        
+        return json_response(200, {
+            'batchId': batch_id,
+            'status': batch.get('status'),
+            'progress': {
+                'total': total,
+                'completed': counts.get('COMPLETED', 0),
+                'failed': counts.get('FAILED', 0),
+                'pending': total - done,
+                'percent': round(100.0 * done / total, 1) if total else 100.0
+            },
+            'summary': batch.get('summary'),
+            'items': [{'jobId': i['jobId'], 'status': i.get('status'), 'atsScore': i.get('atsScore')} for i in items]
+        })
+        
+    except Exception as e:
+        logger.exception('Batch status failed')
+        return json_response(500, {'error': str(e)})
+
+def etag_of(item, fields):
+    """
+    Hash of the response body and the normalized ?fields= projection - it
+    changes with any attribute, whether or not the writer bumped `version`,
+    and never matches across projections
+    """
+    body = json.dumps([sorted(set(fields)), item], sort_keys=True, separators=(',', ':'), default=str)
+    return f'"{hashlib.sha256(body.encode("utf-8")).hexdigest()[:16]}"'
+
+def read_job(job_id, fields):
+    """Job row, projected to `fields` plus what status handling needs"""
+    kwargs = {}
+    if fields:
+        wanted = sorted(set(fields) | {'jobId', 'status', 'version'})
+        kwargs = {
+            'ProjectionExpression': ', '.join(f"#f{i}" for i in range(len(wanted))),
+            'ExpressionAttributeNames': {f"#f{i}": name for i, name in enumerate(wanted)}
+        }
+    return jobs_table().get_item(Key={'jobId': job_id}, **kwargs).get('Item')
+
 def handle_status(event):
-    """Get job status"""
+    """
+    Get job status
+    ?fields=status,atsScore returns only those attributes. If-None-Match with
+    the last ETag (for the same fields) answers 304 while nothing changed.
+    ?wait=N (seconds) holds the request until the job changes - from the
+    If-None-Match ETag, or the one current on arrival - the job finishes, or
+    N passes.
+    """
     try:
         path = event.get('path', '')
         job_id = path.split('/')[-1]
+        params = event.get('queryStringParameters') or {}
+        fields = [f.strip() for f in (params.get('fields') or '').split(',') if f.strip()]
+        if any(not f.isalnum() for f in fields):
+            return json_response(400, {'error': 'fields must be a comma-separated list of attribute names'})
+        try:
+            wait = min(max(float(params.get('wait') or 0), 0), STATUS_MAX_WAIT_SECONDS)
+        except ValueError:
+            return json_response(400, {'error': 'wait must be a number of seconds'})
         
-        response = jobs_table.get_item(Key={'jobId': job_id})
+        # Dedupe rows share the table but are not jobs
+        item = None if '|' in job_id else read_job(job_id, fields)
+        if item is None:
+            return json_response(404, {'error': 'Job not found'})
         
-        if 'Item' not in response:
-            return {
-                'statusCode': 404,
-                'body': json.dumps({'error': 'Job not found'})
-            }
+        known = (header(event, 'If-None-Match') or '').replace('W/', '')
+        baseline = known or (etag_of(item, fields) if wait else None)
+        deadline = time.monotonic() + wait
+        interval = STATUS_POLL_SECONDS
+        while etag_of(item, fields) == baseline and item.get('status') not in TERMINAL_STATUSES:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            time.sleep(min(interval, left))
+            interval = min(interval * 2, 5)
+            item = read_job(job_id, fields) or item
         
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps(response['Item'], default=str)
-        }
+        headers = {'ETag': etag_of(item, fields), 'Cache-Control': 'no-cache',
+                   'Access-Control-Expose-Headers': 'ETag'}
+        if etag_of(item, fields) == known:
+            return {'statusCode': 304, 'headers': {'Access-Control-Allow-Origin': '*', **headers}, 'body': ''}
+        return json_response(200, item, headers)
         
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps({'error': str(e)})
+        logger.exception('Status request failed')
+        return json_response(500, {'error': str(e)})
+
+def encode_cursor(last_key):
+    return base64.urlsafe_b64encode(json.dumps(last_key, default=str).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor, user_id):
+    """LastEvaluatedKey from a cursor; None if it is malformed or was issued for another user"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(key, dict) or key.get('userId') != user_id or set(key) != {'jobId', 'userId', 'createdAt'}:
+        return None
+    return key
+
+def handle_user_jobs(event):
+    """
+    One page of a user's jobs, newest first
+    ?limit= page size (max JOBS_PAGE_MAX), ?status=COMPLETED,FAILED filter,
+    ?cursor= the nextCursor of the previous page. Each page is exactly one
+    index query; with a status filter a page can hold fewer than `limit` jobs
+    (DynamoDB filters after the limit), so keep following nextCursor.
+    """
+    try:
+        user_id = event.get('path', '').split('/')[2]
+        params = event.get('queryStringParameters') or {}
+        try:
+            limit = int(params.get('limit') or JOBS_PAGE_DEFAULT)
+        except ValueError:
+            return json_response(400, {'error': 'limit must be an integer'})
+        limit = max(1, min(limit, JOBS_PAGE_MAX))
+        
+        names = {f"#f{i}": name for i, name in enumerate(JOB_SUMMARY_FIELDS)}
+        names['#u'] = 'userId'
+        values = {':u': user_id}
+        kwargs = {
+            'IndexName': USER_JOBS_INDEX,
+            'KeyConditionExpression': '#u = :u',
+            'ProjectionExpression': ', '.join(f for f in names if f != '#u'),
+            'ScanIndexForward': False,
+            'Limit': limit
         }
+        statuses = [s.strip().upper() for s in (params.get('status') or '').split(',') if s.strip()]
+        if statuses:
+            names['#st'] = 'status'
+            values.update({f":s{i}": status for i, status in enumerate(statuses)})
+            kwargs['FilterExpression'] = ' OR '.join(f"#st = :s{i}" for i in range(len(statuses)))
+        if params.get('cursor'):
+            start = decode_cursor(params['cursor'], user_id)
+            if start is None:
+                return json_response(400, {'error': 'Invalid cursor'})
+            kwargs['ExclusiveStartKey'] = start
+        
+        response = jobs_table().query(ExpressionAttributeNames=names, ExpressionAttributeValues=values, **kwargs)
+        last_key = response.get('LastEvaluatedKey')
+        return json_response(200, {
+            'userId': user_id,
+            'jobs': response.get('Items', []),
+            'nextCursor': encode_cursor(last_key) if last_key else None
+        })
+        
+    except Exception as e:
+        logger.exception('Job listing failed')
+        return json_response(500, {'error': str(e)})
 
 def handle_health():
     """Health check endpoint"""
@@ -0,0 +1,63 @@
+"""
+Batch Handler - Closes out a batch optimization workflow
+Marks items whose workflow failed and writes the batch summary; batches of a
+bulk manifest also write their results part and launch the next staged batch
+"""
+import os
+from datetime import datetime
+from decimal import Decimal
+
+from shared import get_logger, get_resource, lambda_entry, publish_event
+from shared import manifest
+
+logger = get_logger('batch')
+
+
+def jobs_table():
+    return get_resource('dynamodb').Table(os.environ['JOBS_TABLE'])
+
+
+@lambda_entry('batch')
+def lambda_handler(event, context):
+    """CompleteBatch: summarize the Map results"""
+    batch_id = event['batchId']
+    results = event.get('results', [])
+
+    failed = [r for r in results if r.get('status') != 'SUCCEEDED']
+    scores = [r['score'] for r in results if r.get('status') == 'SUCCEEDED' and r.get('score') is not None]
+
+    # Successful items were already marked COMPLETED by Learn
+    for item in failed:
+        jobs_table().update_item(
+            Key={'jobId': item['jobId']},
+            UpdateExpression='SET #s = :s, #e = :e ADD version :one',
+            ExpressionAttributeNames={'#s': 'status', '#e': 'error'},
+            ExpressionAttributeValues={':s': 'FAILED', ':e': item.get('error', 'unknown'), ':one': 1}
+        )
+
+    summary = {
+        'total': len(results),
+        'succeeded': len(results) - len(failed),
+        'failed': len(failed),
+        'averageScore': round(sum(scores) / len(scores), 2) if scores else None
+    }
+    jobs_table().update_item(
+        Key={'jobId': batch_id},
+        UpdateExpression='SET #s = :s, #sm = :sm, completedAt = :t ADD version :one',
+        ExpressionAttributeNames={'#s': 'status', '#sm': 'summary'},
+        ExpressionAttributeValues={
+            ':s': 'COMPLETED',
+            ':sm': {k: Decimal(str(v)) if isinstance(v, float) else v for k, v in summary.items()},
+            ':t': datetime.utcnow().isoformat(),
+            ':one': 1
+        }
+    )
+
+    publish_event('BatchComplete', {'batchId': batch_id, **summary})
+
+    batch = jobs_table().get_item(Key={'jobId': batch_id}, ProjectionExpression='manifestId, jobIds').get('Item', {})
+    if batch.get('manifestId'):
+        manifest.complete_batch(batch['manifestId'], batch_id, batch.get('jobIds', []))
+
+    logger.info('Batch complete', batchId=batch_id, **summary)
+    return {'batchId': batch_id, **summary}
@@ -0,0 +1,121 @@
+"""
+Queue Consumer - Admits queued jobs into the agentic workflow at a controlled rate
+Triggered by the processing queue. Starts executions only while fewer than the
+admission limit are running, in weighted-fair order across tenants; the rest
+go back on the queue with a delay, so waiting never counts toward the
+dead-letter redrive limit. Emits per-tenant queue depth and wait time.
+"""
+import json
+import os
+import time
+
+from botocore.exceptions import ClientError
+
+from shared import admission, get_client, get_logger, lambda_entry
+from shared.metrics import put_metrics
+
+logger = get_logger('queue_consumer')
+
+STATE_MACHINE_ARN = os.environ['STATE_MACHINE_ARN']
+DEFER_SECONDS = int(os.environ.get('ADMISSION_DEFER_SECONDS', '20'))
+SFN_THROTTLE_CODES = ('ThrottlingException', 'TooManyRequestsException')
+
+
+def running_executions(limit):
+    """RUNNING executions, counted up to `limit` - one ListExecutions page"""
+    response = get_client('stepfunctions').list_executions(
+        stateMachineArn=STATE_MACHINE_ARN,
+        statusFilter='RUNNING',
+        maxResults=max(1, min(limit, 1000))
+    )
+    return len(response.get('executions', [])) + (1 if response.get('nextToken') else 0)
+
+
+def defer(entries):
+    """Put (record, message, delay) back on the queue; returns the records that could not be"""
+    failed = []
+    sqs = get_client('sqs')
+    for i in range(0, len(entries), 10):
+        chunk = entries[i:i + 10]
+        response = sqs.send_message_batch(
+            QueueUrl=admission.QUEUE_URL,
+            Entries=[{'Id': str(n), 'MessageBody': json.dumps(message), 'DelaySeconds': delay}
+                     for n, (_, message, delay) in enumerate(chunk)]
+        )
+        failed.extend(chunk[int(f['Id'])][0] for f in response.get('Failed', []))
+    return failed
+
+
+def parse(record):
+    """Queue message, with the tenant filled in for messages queued before it was recorded"""
+    message = json.loads(record['body'])
+    message.setdefault('tenant', message['input'].get('userId') or 'anonymous')
+    return message
+
+
+def emit_tenant_metrics(tenants, waits, started_by, deferred):
+    for tenant, state in tenants.items():
+        put_metrics(
+            {'tenant': tenant, 'tier': admission.tier_of(tenant)},
+            {
+                'TenantQueueDepth': max(0, int(state.get('queued') or 0) - started_by.get(tenant, 0)),
+                'TenantWaitTime': waits.get(tenant, []),
+                'TenantStarted': started_by.get(tenant, 0),
+                'TenantDeferred': deferred.get(tenant, 0)
+            },
+            {'TenantQueueDepth': 'Count', 'TenantWaitTime': 'Milliseconds',
+             'TenantStarted': 'Count', 'TenantDeferred': 'Count'},
+            dimension_sets=[['tier'], ['tier', 'tenant']]
+        )
+
+
+@lambda_entry('admission')
+def lambda_handler(event, context):
+    """Start as many queued jobs as the in-flight limit and tenant quotas allow"""
+    records = event.get('Records', [])
+    controller = admission.read_controller()
+    limit, throttles_seen = admission.current_limit(controller)
+    capacity = max(0, limit - running_executions(limit))
+
+    messages = [(record, parse(record)) for record in records]
+    tenants = admission.read_tenants(sorted({m['tenant'] for _, m in messages}))
+    admitted, deferred, virtual_time = admission.schedule(
+        messages, tenants, capacity, float(controller.get('virtualTime') or 0), DEFER_SECONDS
+    )
+    saturated = bool(deferred) and sum(admission.cost_of(m) for _, m in admitted) >= capacity
+
+    started, failures, waits, started_by = 0, [], {}, {}
+    for record, message in admitted:
+        try:
+            if not admission.start_execution(message.get('stateMachineArn', STATE_MACHINE_ARN),
+                                             message['jobId'], message['input']):
+                continue  # redelivered message for a job that already started
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in SFN_THROTTLE_CODES:
+                deferred.append((record, message, DEFER_SECONDS))
+            else:
+                logger.exception('Could not start workflow', jobId=message.get('jobId'))
+                failures.append(record)
+            continue
+        started += 1
+        tenant = message['tenant']
+        started_by[tenant] = started_by.get(tenant, 0) + admission.cost_of(message)
+        waits.setdefault(tenant, []).append(round((time.time() - message.get('enqueuedAt', time.time())) * 1000))
+
+    if deferred:
+        failures.extend(defer(deferred))
+        if saturated and not throttles_seen:
+            # The limit was binding and Bedrock kept up - probe one higher next pass
+            limit = min(admission.MAX_IN_FLIGHT, limit + 1)
+    for tenant, state in tenants.items():
+        admission.save_tenant(tenant, state, started_by.get(tenant, 0))
+    admission.save_controller(controller, limit, throttles_seen, started, virtual_time)
+
+    deferred_by = {}
+    for _, message, _ in deferred:
+        deferred_by[message['tenant']] = deferred_by.get(message['tenant'], 0) + 1
+    emit_tenant_metrics(tenants, waits, started_by, deferred_by)
+
+    logger.info('Admission pass', received=len(records), started=started, deferred=len(deferred),
+                failed=len(failures), limit=limit, throttles=throttles_seen, tenants=len(tenants))
+    return {'batchItemFailures': [{'itemIdentifier': r['messageId']} for r in failures]}
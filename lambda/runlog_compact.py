@@ -0,0 +1,23 @@
+"""
+Run Log Compaction - merges a day of per-job run log objects into part files
+Scheduled daily for the previous UTC day; {"day": "YYYY-MM-DD"} compacts another one
+"""
+from datetime import datetime, timedelta
+
+from shared import get_logger, lambda_entry
+from shared.runlog import default_run_log
+
+logger = get_logger('runlog_compact')
+run_log = default_run_log()
+
+
+@lambda_entry('runlog_compact')
+def lambda_handler(event, context):
+    """Compact one day of the run log"""
+    if run_log is None:
+        logger.warning('RUN_LOG_URI is not set - nothing to compact')
+        return {'status': 'SKIPPED'}
+    day = event.get('day') or (datetime.utcnow() - timedelta(days=1)).strftime('%Y-%m-%d')
+    summary = run_log.compact(day)
+    logger.info('Run log compacted', **summary)
+    return summary
@@ -3,158 +3,411 @@ S3 Trigger Handler - Processes resume uploads and finds matching job description
 Supports two upload patterns:
 1. user123/resume.pdf + user123/job-description.txt
 2. resume.pdf (generic optimization without JD)
+A resume uploaded before its job description is held for PAIRING_WINDOW_SECONDS:
+the JD upload, or the window closing, starts exactly one workflow for it. A
+scheduled {"sweepPairing": true} invocation starts held resumes whose timer
+message was lost.
+Bulk mode: a CSV/JSONL manifest under manifests/ is streamed into batch
+workflows (see shared/manifest.py); other files under manifests/ are its inputs.
 """
+import fnmatch
 import json
-import boto3
 import os
-from urllib.parse import unquote_plus
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote_plus, unquote_plus
 
-s3 = boto3.client('s3')
-stepfunctions = boto3.client('stepfunctions')
-textract = boto3.client('textract')
+from botocore.exceptions import ClientError
+
+from shared import ReadThroughCache, get_client, get_logger, get_resource, lambda_entry
+from shared import manifest
+from shared.admission import submit
+
+logger = get_logger('s3_trigger')
 
 STATE_MACHINE_ARN = os.environ['STATE_MACHINE_ARN']
+# Job description file names in priority order (case-insensitive globs on the file name)
+JD_PATTERNS = [p.strip().lower() for p in os.environ.get(
+    'JD_PATTERNS',
+    'job-description.txt,job-description.pdf,jd.txt,jd.pdf,job.txt,job.pdf,job-desc.txt,job-desc.pdf,'
+    '*job-description*.txt,*job-description*.pdf'
+).split(',') if p.strip()]
+# Folder listings are reused briefly so a burst of uploads to one folder lists it once
+JD_LISTING_TTL = int(os.environ.get('JD_LISTING_TTL', '10'))
+# Records of one notification processed at once (Textract and SQS calls are I/O bound)
+WORKERS = int(os.environ.get('S3_TRIGGER_WORKERS', '8'))
+# Seconds a resume without a job description waits for one (0 = start generic right away).
+# Held resumes are rows in the analytics table; the timer is a delayed message on the pairing queue
+PAIRING_QUEUE_URL = os.environ.get('PAIRING_QUEUE_URL')
+PAIRING_WINDOW = min(900, int(os.environ.get('PAIRING_WINDOW_SECONDS', '60'))) if PAIRING_QUEUE_URL else 0
+# A held resume still PENDING this long after its window closed lost its timer; the sweep starts it
+PAIRING_SWEEP_GRACE = int(os.environ.get('PAIRING_SWEEP_GRACE_SECONDS', '300'))
+HOLD_TTL = 86400
+GENERIC_JOB_DESCRIPTION = "Generic resume optimization for professional roles"
+
+def uploads_of(event):
+    """
+    (itemIdentifier, bucket, key, expired) per uploaded object. Direct S3
+    notifications are identified by key; S3 events delivered through SQS by
+    messageId, so batchItemFailures retries only the failed messages.
+    `expired` marks the pairing timer of a held resume coming due.
+    """
+    for record in event.get('Records', []):
+        if 'body' in record:
+            body = json.loads(record['body'])
+            for inner in body.get('Records', []):
+                yield (record['messageId'], inner['s3']['bucket']['name'],
+                       unquote_plus(inner['s3']['object']['key']), bool(body.get('pairingExpired')))
+        else:
+            key = unquote_plus(record['s3']['object']['key'])
+            yield key, record['s3']['bucket']['name'], key, False
+
+def skip_reason(key):
+    # Skip output folder
+    if key.startswith('optimized/'):
+        return 'output folder'
+    # Skip resumes staged by POST /optimize/batch - the batch workflow runs them
+    if key.startswith('batches/'):
+        return 'batch staging folder'
+    # Skip files a bulk manifest points at - the manifest's batches run them
+    if key.startswith(manifest.MANIFEST_PREFIX):
+        return 'manifest input folder'
+    # Skip job description files (JD_PATTERNS, plus the original rule: anything
+    # named job-description and every .txt) - we only trigger on resumes
+    if jd_priority(key) is not None or 'job-description' in key.lower() or key.endswith('.txt'):
+        return 'job description file'
+    return None
 
+def folder_of(key):
+    """Pattern: user123/resume.pdf -> ('user123', 'resume.pdf'); resume.pdf -> (None, 'resume.pdf')"""
+    parts = key.split('/')
+    if len(parts) == 2:
+        return parts[0], parts[1]
+    return None, key
+
+def folder_prefix(user_folder):
+    return f"{user_folder}/" if user_folder else ''
+
+@lambda_entry('s3_trigger')
 def lambda_handler(event, context):
     """
     Triggered by S3 upload
     Looks for matching job description file
     Starts Step Functions workflow
+    Records run concurrently on a bounded pool, the job description lookup
+    once per folder; one record's failure does not affect the others.
     """
-    print("📤 S3 Upload detected...")
+    request_id = getattr(context, 'aws_request_id', '')[:8]
+    if event.get('sweepPairing'):
+        return sweep_held(request_id)
     
-    for record in event['Records']:
-        bucket = record['s3']['bucket']['name']
-        key = unquote_plus(record['s3']['object']['key'])
-        
-        print(f"File: s3://{bucket}/{key}")
-        
-        # Skip if this is a job description file (we only trigger on resume)
-        if 'job-description' in key.lower() or key.endswith('.txt'):
-            print("Skipping job description file")
-            continue
-        
-        # Skip output folder
-        if key.startswith('optimized/'):
-            print("Skipping output folder")
-            continue
-        
-        # Extract user folder if present
-        # Pattern: user123/resume.pdf or just resume.pdf
-        parts = key.split('/')
-        if len(parts) == 2:
-            user_folder = parts[0]
-            filename = parts[1]
-        else:
-            user_folder = None
-            filename = key
-        
-        print(f"User folder: {user_folder}")
-        print(f"Filename: {filename}")
-        
-        # Look for matching job description
-        job_description = find_job_description(bucket, user_folder, key)
-        
-        if job_description:
-            print(f"✓ Found job description ({len(job_description)} chars)")
-        else:
-            print("⚠ No job description found - using generic optimization")
-            job_description = "Generic resume optimization for professional roles"
-        
-        # Extract text from resume
-        resume_text = extract_resume_text(bucket, key)
-        
-        if not resume_text:
-            print("❌ Could not extract text from resume")
-            continue
-        
-        print(f"✓ Extracted resume text ({len(resume_text)} chars)")
+    uploads = list(uploads_of(event))
+    logger.info('S3 upload detected', records=len(uploads))
+    
+    jd_lookups = {}
+    failures, submitted = [], 0
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        def job_description_for(bucket, user_folder, key):
+            # First record of a folder schedules the lookup; the rest share it.
+            # It is queued ahead of every record waiting on it, so a full pool can't deadlock
+            folder = (bucket, user_folder)
+            if folder not in jd_lookups:
+                jd_lookups[folder] = pool.submit(find_job_description, bucket, user_folder, key)
+            return jd_lookups[folder]
         
-        # Generate job ID
-        job_id = f"{user_folder or 'user'}-{filename.replace('.pdf', '')}-{context.request_id[:8]}"
+        pending = {}
+        for item_id, bucket, key, expired in uploads:
+            logger.info('Processing upload', bucket=bucket, key=key)
+            if expired:
+                pending[pool.submit(start_held, bucket, key, request_id)] = (item_id, key)
+                continue
+            if manifest.is_manifest(key):
+                pending[pool.submit(process_manifest, bucket, key)] = (item_id, key)
+                continue
+            reason = skip_reason(key)
+            if reason == 'job description file' and PAIRING_WINDOW and jd_priority(key) is not None:
+                pending[pool.submit(release_held, bucket, key, request_id)] = (item_id, key)
+                continue
+            if reason:
+                logger.info('Skipping %s', reason, key=key)
+                continue
+            user_folder, _ = folder_of(key)
+            jd = job_description_for(bucket, user_folder, key)
+            pending[pool.submit(process_upload, bucket, key, jd, request_id)] = (item_id, key)
         
-        # Start Step Functions workflow
-        try:
-            stepfunctions.start_execution(
-                stateMachineArn=STATE_MACHINE_ARN,
-                name=f"job-{job_id}".replace('/', '-')[:80],  # Max 80 chars
-                input=json.dumps({
-                    'jobId': job_id,
-                    'userId': user_folder or 'anonymous',
-                    'resume': resume_text,
-                    'jobDescription': job_description,
-                    'targetRole': 'Professional Role',
-                    'sourceFile': key
-                })
-            )
-            print(f"✓ Started workflow: {job_id}")
-            
-        except Exception as e:
-            print(f"❌ Error starting workflow: {e}")
+        for future in as_completed(pending):
+            item_id, key = pending[future]
+            try:
+                future.result()
+                submitted += 1
+            except Exception:
+                logger.exception('Error processing upload', key=key)
+                if item_id not in failures:
+                    failures.append(item_id)
     
+    logger.info('Uploads processed', submitted=submitted, failed=len(failures))
     return {
         'statusCode': 200,
-        'body': json.dumps('Processing started')
+        'body': json.dumps('Processing started'),
+        'batchItemFailures': [{'itemIdentifier': item_id} for item_id in failures]
     }
 
-def find_job_description(bucket, user_folder, resume_key):
+def process_upload(bucket, key, jd_future, request_id):
+    """Resume text + the folder's job description -> queued workflow (or held for one); raises on failure"""
+    # Extract text from resume (overlaps with the folder's JD lookup)
+    resume_text = extract_resume_text(bucket, key)
+    if not resume_text:
+        raise ValueError(f"Could not extract text from resume {key}")
+    logger.info('Extracted resume text', key=key, chars=len(resume_text))
+    
+    # Look for matching job description
+    job_description = jd_future.result()
+    if job_description:
+        logger.info('Found job description', key=key, chars=len(job_description))
+    elif PAIRING_WINDOW:
+        hold(bucket, key, resume_text, request_id)
+        return
+    else:
+        logger.warning('No job description found - using generic optimization', key=key)
+        job_description = GENERIC_JOB_DESCRIPTION
+    start_workflow(bucket, key, resume_text, job_description, request_id)
+
+def start_workflow(bucket, key, resume_text, job_description, request_id):
+    user_folder, filename = folder_of(key)
+    
+    # Generate job ID
+    job_id = f"{user_folder or 'user'}-{filename.replace('.pdf', '')}-{request_id}"
+    
+    # Queue the Step Functions workflow for admission
+    admission = submit(STATE_MACHINE_ARN, job_id.replace('/', '-'), {
+        'jobId': job_id,
+        'userId': user_folder or 'anonymous',
+        'resume': resume_text,
+        'jobDescription': job_description,
+        'targetRole': 'Professional Role',
+        'sourceFile': key
+    })
+    logger.info('Submitted workflow', jobId=job_id, **(admission or {}))
+
+def pairing_table():
+    return get_resource('dynamodb').Table(os.environ['ANALYTICS_TABLE'])
+
+def pairing_key(bucket, key):
+    """Held resumes are grouped by folder, so a JD upload finds them with one Query"""
+    user_folder, _ = folder_of(key)
+    return {'date': f"pairing|{bucket}/{folder_prefix(user_folder)}", 'metric': key}
+
+def due_key(due_at, bucket, key):
+    """Held resumes are also indexed by the hour their timer comes due, for the sweep"""
+    return {'date': f"pairing-due|{time.strftime('%Y-%m-%dT%H', time.gmtime(due_at))}", 'metric': f"{bucket}/{key}"}
+
+def hold(bucket, key, resume_text, request_id):
+    """Park a resume until a job description lands in its folder or the pairing window closes"""
+    user_folder, _ = folder_of(key)
+    now = int(time.time())
+    try:
+        pairing_table().put_item(
+            Item={**pairing_key(bucket, key), 'status': 'PENDING', 'resume': resume_text,
+                  'heldAt': now, 'expiresAt': now + HOLD_TTL},
+            # A re-upload of an already started resume is held again; a redelivered event is not
+            ConditionExpression='attribute_not_exists(metric) OR #s = :started',
+            ExpressionAttributeNames={'#s': 'status'},
+            ExpressionAttributeValues={':started': 'STARTED'}
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+        logger.info('Resume already waiting for a job description', key=key)
+        return
+    pairing_table().put_item(Item={**due_key(now + PAIRING_WINDOW, bucket, key),
+                                   'dueAt': now + PAIRING_WINDOW, 'expiresAt': now + HOLD_TTL})
+    
+    # A JD uploaded after the folder lookup may have looked for held resumes before this row existed
+    listing_cache.invalidate((bucket, folder_prefix(user_folder)))
+    if find_job_description(bucket, user_folder, key):
+        start_held(bucket, key, request_id)
+        return
+    
+    get_client('sqs').send_message(
+        QueueUrl=PAIRING_QUEUE_URL,
+        MessageBody=json.dumps({'pairingExpired': True, 'Records': [
+            {'s3': {'bucket': {'name': bucket}, 'object': {'key': quote_plus(key)}}}
+        ]}),
+        DelaySeconds=PAIRING_WINDOW
+    )
+    logger.info('Holding resume for its job description', key=key, window=PAIRING_WINDOW)
+
+def start_held(bucket, key, request_id, job_description=None):
     """
-    Look for job description file in same folder
-    Supports both .txt and .pdf files
-    Patterns:
-    - user123/job-description.txt or .pdf
-    - user123/jd.txt or .pdf
-    - user123/job.txt or .pdf
+    Start a held resume with the folder's job description (generic if there is
+    still none). The PENDING -> STARTED claim makes the JD upload, the pairing
+    timer and a redelivery race safely: exactly one of them starts the workflow
+    (and gets True back).
     """
-    if not user_folder:
-        # No user folder, check for JD in root
-        jd_patterns = [
-            'job-description.txt', 'job-description.pdf',
-            'jd.txt', 'jd.pdf',
-            'job.txt', 'job.pdf',
-            'job-desc.txt', 'job-desc.pdf'
-        ]
-    else:
-        # Check in user folder
-        jd_patterns = [
-            f"{user_folder}/job-description.txt",
-            f"{user_folder}/job-description.pdf",
-            f"{user_folder}/jd.txt",
-            f"{user_folder}/jd.pdf",
-            f"{user_folder}/job.txt",
-            f"{user_folder}/job.pdf",
-            f"{user_folder}/job-desc.txt",
-            f"{user_folder}/job-desc.pdf"
-        ]
+    try:
+        held = pairing_table().update_item(
+            Key=pairing_key(bucket, key),
+            UpdateExpression='SET #s = :started',
+            ConditionExpression='#s = :pending',
+            ExpressionAttributeNames={'#s': 'status'},
+            ExpressionAttributeValues={':started': 'STARTED', ':pending': 'PENDING'},
+            ReturnValues='ALL_NEW'
+        )['Attributes']
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+        return  # already started
     
-    for pattern in jd_patterns:
-        try:
-            # Check if file exists
-            s3.head_object(Bucket=bucket, Key=pattern)
-            
-            # Extract text based on file type
-            if pattern.endswith('.pdf'):
-                jd_text = extract_text_from_pdf(bucket, pattern)
-            else:
-                response = s3.get_object(Bucket=bucket, Key=pattern)
-                jd_text = response['Body'].read().decode('utf-8')
-            
-            if jd_text:
-                print(f"✓ Found JD: {pattern}")
-                return jd_text
-                
-        except s3.exceptions.NoSuchKey:
-            continue
-        except Exception as e:
-            print(f"Error reading {pattern}: {e}")
-            continue
+    try:
+        user_folder, _ = folder_of(key)
+        job_description = job_description or find_job_description(bucket, user_folder, key)
+        if not job_description:
+            logger.warning('No job description arrived in time - using generic optimization', key=key)
+        start_workflow(bucket, key, held['resume'], job_description or GENERIC_JOB_DESCRIPTION, request_id)
+        return True
+    except Exception:
+        # Hand the claim back so the retry of this record can start it
+        pairing_table().update_item(Key=pairing_key(bucket, key), UpdateExpression='SET #s = :pending',
+                                    ExpressionAttributeNames={'#s': 'status'},
+                                    ExpressionAttributeValues={':pending': 'PENDING'})
+        raise
+
+def release_held(bucket, jd_key, request_id):
+    """A job description arrived: start every resume held in its folder"""
+    user_folder, _ = folder_of(jd_key)
+    held, start = [], {}
+    while True:
+        response = pairing_table().query(
+            KeyConditionExpression='#d = :d',
+            FilterExpression='#s = :pending',
+            ProjectionExpression='metric',
+            ExpressionAttributeNames={'#d': 'date', '#s': 'status'},
+            ExpressionAttributeValues={':d': pairing_key(bucket, jd_key)['date'], ':pending': 'PENDING'},
+            **start
+        )
+        held.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        start = {'ExclusiveStartKey': response['LastEvaluatedKey']}
+    if not held:
+        logger.info('No resumes waiting for this job description', key=jd_key)
+        return
     
+    listing_cache.invalidate((bucket, folder_prefix(user_folder)))
+    job_description = find_job_description(bucket, user_folder, None)
+    if not job_description:
+        raise ValueError(f"Could not read job description {jd_key}")
+    for item in held:
+        start_held(bucket, item['metric'], request_id, job_description)
+    logger.info('Released held resumes', key=jd_key, resumes=len(held))
+
+def sweep_held(request_id):
+    """
+    Start held resumes whose pairing timer never fired (the message was lost,
+    or never sent because the upload record failed after the hold). Due rows
+    of the last HOLD_TTL hours are checked; start_held's claim makes a sweep
+    racing the timer or a JD upload harmless.
+    """
+    if not PAIRING_WINDOW:
+        return {'checked': 0, 'started': 0}
+    now = int(time.time())
+    swept = started = 0
+    for hour in range(now - HOLD_TTL, now + 3600, 3600):
+        partition = due_key(hour, '', '')['date']
+        start = {}
+        while True:
+            response = pairing_table().query(
+                KeyConditionExpression='#d = :d',
+                ExpressionAttributeNames={'#d': 'date'},
+                ExpressionAttributeValues={':d': partition},
+                **start
+            )
+            for item in response.get('Items', []):
+                if int(item['dueAt']) + PAIRING_SWEEP_GRACE > now:
+                    continue
+                bucket, key = item['metric'].split('/', 1)
+                try:
+                    started += bool(start_held(bucket, key, request_id))
+                except Exception:
+                    logger.exception('Could not start held resume', key=key)
+                    continue  # the next sweep retries it
+                pairing_table().delete_item(Key={'date': item['date'], 'metric': item['metric']})
+                swept += 1
+            if 'LastEvaluatedKey' not in response:
+                break
+            start = {'ExclusiveStartKey': response['LastEvaluatedKey']}
+    logger.info('Pairing sweep', checked=swept, started=started)
+    return {'checked': swept, 'started': started}
+
+def process_manifest(bucket, key):
+    """Bulk manifest -> staged batch workflows, streamed from the object body; raises on failure"""
+    response = get_client('s3').get_object(Bucket=bucket, Key=key)
+    owner, _ = folder_of(key[len(manifest.MANIFEST_PREFIX):])
+    manifest_id = manifest.start(bucket, key, response['Body'], response.get('ETag', ''), owner or 'anonymous',
+                                 lambda jd_key: read_job_description((bucket, jd_key, None)))
+    logger.info('Manifest submitted', key=key, manifestId=manifest_id)
+
+def list_folder(location):
+    """Objects directly inside one folder (Delimiter keeps subfolders out)"""
+    bucket, prefix = location
+    objects, token = [], None
+    while True:
+        kwargs = {'ContinuationToken': token} if token else {}
+        response = get_client('s3').list_objects_v2(Bucket=bucket, Prefix=prefix, Delimiter='/', **kwargs)
+        objects.extend(response.get('Contents', []))
+        if not response.get('IsTruncated'):
+            return objects
+        token = response['NextContinuationToken']
+
+def read_job_description(location):
+    bucket, key, _ = location
+    if key.lower().endswith('.pdf'):
+        return extract_text_from_pdf(bucket, key)
+    return get_client('s3').get_object(Bucket=bucket, Key=key)['Body'].read().decode('utf-8')
+
+# Per container; JD text is keyed by ETag so a replaced file is never served stale
+listing_cache = ReadThroughCache(list_folder, JD_LISTING_TTL, 0, name='jd-listing')
+jd_text_cache = ReadThroughCache(read_job_description, 300, 0, name='jd-text')
+
+def jd_priority(key):
+    """Index of the first JD_PATTERNS entry the file name matches, or None"""
+    name = key.rsplit('/', 1)[-1].lower()
+    for rank, pattern in enumerate(JD_PATTERNS):
+        if fnmatch.fnmatchcase(name, pattern):
+            return rank
     return None
 
+def find_job_description(bucket, user_folder, resume_key):
+    """
+    Look for a job description file in the resume's folder (or the bucket root)
+    One ListObjectsV2 per folder, cached for JD_LISTING_TTL seconds; candidates
+    are tried in JD_PATTERNS order, newest first within a pattern.
+    """
+    prefix = folder_prefix(user_folder)
+    objects = listing_cache.get((bucket, prefix), default=[])
+    candidates = sorted(
+        ((jd_priority(o['Key']), o) for o in objects if o['Key'] != resume_key),
+        key=lambda c: (c[0] if c[0] is not None else len(JD_PATTERNS), -_timestamp(c[1]))
+    )
+    for rank, obj in candidates:
+        if rank is None:
+            break
+        jd_text = jd_text_cache.get((bucket, obj['Key'], obj.get('ETag')))
+        if jd_text:
+            logger.info('Found JD', key=obj['Key'])
+            return jd_text
+        logger.warning('Could not read JD candidate', key=obj['Key'])
+    
+    return None
+
+def _timestamp(obj):
+    modified = obj.get('LastModified')
+    return modified.timestamp() if hasattr(modified, 'timestamp') else 0
+
 def extract_text_from_pdf(bucket, key):
     """Extract text from PDF using Textract"""
     try:
-        response = textract.detect_document_text(
+        response = get_client('textract').detect_document_text(
             Document={
                 'S3Object': {
                     'Bucket': bucket,
@@ -172,7 +425,7 @@ def extract_text_from_pdf(bucket, key):
         return text
         
     except Exception as e:
-        print(f"Error extracting PDF text: {e}")
+        logger.warning('Error extracting PDF text: %s', e, key=key)
         return None
 
 def extract_resume_text(bucket, key):
@@ -180,7 +433,7 @@ def extract_resume_text(bucket, key):
     try:
         # For PDF files, use Textract
         if key.lower().endswith('.pdf'):
-            response = textract.detect_document_text(
+            response = get_client('textract').detect_document_text(
                 Document={
                     'S3Object': {
                         'Bucket': bucket,
@@ -199,13 +452,13 @@ def extract_resume_text(bucket, key):
         
         # For text files, read directly
         elif key.lower().endswith('.txt'):
-            response = s3.get_object(Bucket=bucket, Key=key)
+            response = get_client('s3').get_object(Bucket=bucket, Key=key)
             return response['Body'].read().decode('utf-8')
         
         else:
-            print(f"Unsupported file type: {key}")
+            logger.warning('Unsupported file type', key=key)
             return None
             
     except Exception as e:
-        print(f"Error extracting text: {e}")
+        logger.warning('Error extracting text: %s', e, key=key)
         return None
@@ -0,0 +1,18 @@
+"""
+Shared runtime for all Lambda entry points
+Clients are created lazily and cached per container
+"""
+from .clients import get_client, get_resource
+from .cache import ReadThroughCache
+from .bedrock import invoke_bedrock, HAIKU_MODEL_ID, BEDROCK_MODEL_ID
+from .events import publish_event, send_event, flush_events, EventPublisher
+from .handler import lambda_entry
+from .log import get_logger
+
+__all__ = [
+    'get_client', 'get_resource',
+    'ReadThroughCache',
+    'invoke_bedrock', 'HAIKU_MODEL_ID', 'BEDROCK_MODEL_ID',
+    'publish_event', 'send_event', 'flush_events', 'EventPublisher',
+    'lambda_entry', 'get_logger',
+]
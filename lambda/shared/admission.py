@@ -0,0 +1,269 @@
+"""
+Queue-based admission control for workflow starts
+Submissions go to the SQS processing queue; queue_consumer starts executions
+only while fewer than the current in-flight limit are running. The limit is
+adjusted AIMD-style: +1 after a pass that had to defer jobs, halved when
+invoke_bedrock reported throttles since the last pass. Controller state is one
+row in the analytics table. Without PROCESSING_QUEUE_URL jobs start immediately.
+
+Within that limit, tenants (userId) are scheduled by start-time weighted fair
+queuing: each message gets a start tag max(virtual time, tenant's last finish
+tag) the first time it is seen, and advances the tenant's finish tag by
+1/weight, so a tenant with thousands queued sorts behind a newcomer. Each
+tenant also has a token bucket (TENANT_START_RATE / TENANT_BURST, scaled by
+weight); messages over quota are pushed back until their token is due rather
+than blocking the head of the queue. Weights come from the tenant's tier
+(TENANT_TIERS maps userId -> tier, TENANT_TIER_WEIGHTS tier -> weight).
+Concurrent consumers update tenant rows last-writer-wins, which only makes the
+fairness approximate.
+
+Start tags only order the messages of one receive batch (at most 10); SQS
+hands out the rest of the queue roughly FIFO. To keep a tenant with a deep
+backlog from crowding the head of the queue, a message deferred for lack of
+capacity is delayed by DEFER_SECONDS more for every ADMISSION_FAIR_LAG its
+start tag is ahead of virtual time (capped at 15 minutes), so newer tenants'
+messages surface first. This is still an approximation of per-tenant queues,
+not a replacement for them.
+
+A batch workflow is one message with a cost of its item count: it waits for
+min(cost, burst) tokens, then charges the full cost - leaving the tenant in
+debt until the bucket refills - and advances the finish tag by cost/weight.
+Its executions ramp up under the batch Map's MaxConcurrency and are counted
+against the in-flight limit from the next pass on.
+"""
+import json
+import os
+import time
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+
+from .clients import get_client, get_resource
+from .log import get_logger
+
+logger = get_logger('admission')
+
+QUEUE_URL = os.environ.get('PROCESSING_QUEUE_URL')
+CONTROLLER_TABLE = os.environ.get('ANALYTICS_TABLE')
+CONTROLLER_KEY = {'date': 'admission', 'metric': 'controller'}
+MIN_IN_FLIGHT = int(os.environ.get('ADMISSION_MIN_IN_FLIGHT', '2'))
+INITIAL_IN_FLIGHT = int(os.environ.get('ADMISSION_INITIAL_IN_FLIGHT', '10'))
+MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', '50'))
+# Starts per second assumed until the consumer has measured one
+DEFAULT_START_RATE = float(os.environ.get('ADMISSION_DEFAULT_START_RATE', '0.5'))
+# SQS caps DelaySeconds at 15 minutes
+MAX_DELAY_SECONDS = 900
+# Start-tag lead over virtual time (in starts at weight 1) per extra capacity deferral
+FAIR_LAG = float(os.environ.get('ADMISSION_FAIR_LAG', '10'))
+
+
+def parse_weights(spec):
+    """'interactive=4,standard=2' -> {'interactive': 4.0, 'standard': 2.0}"""
+    pairs = (part.split('=', 1) for part in spec.split(',') if '=' in part)
+    return {name.strip(): float(weight) for name, weight in pairs}
+
+
+TIER_WEIGHTS = parse_weights(os.environ.get('TENANT_TIER_WEIGHTS', 'interactive=4,standard=2,bulk=1'))
+TENANT_TIERS = json.loads(os.environ.get('TENANT_TIERS', '{}'))
+DEFAULT_TIER = os.environ.get('TENANT_DEFAULT_TIER', 'standard')
+# Token bucket per unit of weight: sustained starts/second and burst size
+TENANT_START_RATE = float(os.environ.get('TENANT_START_RATE', '0.5'))
+TENANT_BURST = float(os.environ.get('TENANT_BURST', '10'))
+
+
+def start_execution(state_machine_arn, job_id, execution_input):
+    """Start the workflow; a redelivered message for a started job is a no-op"""
+    try:
+        get_client('stepfunctions').start_execution(
+            stateMachineArn=state_machine_arn,
+            name=f"job-{job_id}"[:80],
+            input=json.dumps(execution_input)
+        )
+        return True
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'ExecutionAlreadyExists':
+            return False
+        raise
+
+
+def submit(state_machine_arn, job_id, execution_input, cost=1):
+    """
+    Enqueue a job for admission, or start it directly when no queue is configured.
+    cost is the number of jobs the execution runs (a batch's item count).
+    Returns queue position and estimated start time (None when started directly).
+    """
+    if not QUEUE_URL:
+        start_execution(state_machine_arn, job_id, execution_input)
+        return None
+    tenant = execution_input.get('userId') or 'anonymous'
+    get_client('sqs').send_message(
+        QueueUrl=QUEUE_URL,
+        MessageBody=json.dumps({'jobId': job_id, 'stateMachineArn': state_machine_arn,
+                                'input': execution_input, 'enqueuedAt': time.time(), 'tenant': tenant,
+                                'cost': cost})
+    )
+    add_queued(tenant, cost)
+    return queue_estimate()
+
+
+def queue_estimate():
+    """Approximate position of a newly queued job and when it should start"""
+    attributes = get_client('sqs').get_queue_attributes(
+        QueueUrl=QUEUE_URL,
+        AttributeNames=['ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesDelayed']
+    )['Attributes']
+    position = sum(int(attributes.get(name, 0)) for name in
+                   ('ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesDelayed'))
+    rate = float(read_controller().get('startRate') or DEFAULT_START_RATE)
+    return {
+        'queuePosition': position,
+        'estimatedStartTime': int(time.time() + position / max(rate, 0.01))
+    }
+
+
+def controller_table():
+    return get_resource('dynamodb').Table(CONTROLLER_TABLE)
+
+
+def read_controller():
+    if not CONTROLLER_TABLE:
+        return {}
+    try:
+        return controller_table().get_item(Key=CONTROLLER_KEY).get('Item', {})
+    except Exception as e:
+        logger.warning('Could not read admission controller: %s', e)
+        return {}
+
+
+def record_throttle():
+    """Called when Bedrock throttling survives client retries; the consumer backs off"""
+    if not CONTROLLER_TABLE:
+        return
+    try:
+        controller_table().update_item(Key=CONTROLLER_KEY, UpdateExpression='ADD throttles :one',
+                                       ExpressionAttributeValues={':one': 1})
+    except Exception as e:
+        logger.warning('Could not record throttle: %s', e)
+
+
+def tier_of(tenant):
+    return TENANT_TIERS.get(tenant, DEFAULT_TIER)
+
+
+def weight_of(tier):
+    return TIER_WEIGHTS.get(tier, 1.0)
+
+
+def tenant_key(tenant):
+    return {'date': f"tenant|{tenant}", 'metric': 'admission'}
+
+
+def add_queued(tenant, count):
+    """Per-tenant queue depth counter (best effort - it only feeds metrics)"""
+    if not CONTROLLER_TABLE or not count:
+        return
+    try:
+        controller_table().update_item(Key=tenant_key(tenant), UpdateExpression='ADD queued :n',
+                                       ExpressionAttributeValues={':n': count})
+    except Exception as e:
+        logger.warning('Could not update queue depth: %s', e, tenant=tenant)
+
+
+def read_tenants(tenants):
+    """Scheduler state for each tenant, one BatchGetItem (a pass has at most 10 messages)"""
+    if not tenants:
+        return {}
+    response = get_resource('dynamodb').batch_get_item(
+        RequestItems={CONTROLLER_TABLE: {'Keys': [tenant_key(t) for t in tenants]}}
+    )
+    found = {item['date'].split('|', 1)[1]: item for item in response['Responses'].get(CONTROLLER_TABLE, [])}
+    return {t: found.get(t, {}) for t in tenants}
+
+
+def save_tenant(tenant, state, started):
+    controller_table().update_item(
+        Key=tenant_key(tenant),
+        UpdateExpression='SET tokens = :k, refilledAt = :r, finishTag = :f ADD queued :q',
+        ExpressionAttributeValues={
+            ':k': Decimal(str(round(state['tokens'], 4))),
+            ':r': Decimal(str(round(state['refilledAt'], 3))),
+            ':f': Decimal(str(round(state['finishTag'], 4))),
+            ':q': -started
+        }
+    )
+
+
+def cost_of(message):
+    """Jobs one queue message starts - messages queued before costs were recorded are 1"""
+    return max(1, int(message.get('cost') or 1))
+
+
+def schedule(messages, tenants, capacity, virtual_time, defer_seconds, now=None):
+    """
+    Pick which messages start this pass
+    messages: [(record, message)]; tenants: tenant -> stored state, refilled and
+    updated in place. Returns (admitted, deferred [(record, message, delay)],
+    new virtual time).
+    """
+    now = time.time() if now is None else now
+    for tenant, state in tenants.items():
+        weight = weight_of(tier_of(tenant))
+        burst = TENANT_BURST * weight
+        tokens = float(state.get('tokens', burst))
+        elapsed = max(0.0, now - float(state.get('refilledAt') or now))
+        state.update(tokens=min(burst, tokens + elapsed * TENANT_START_RATE * weight), refilledAt=now,
+                     finishTag=float(state.get('finishTag') or 0), weight=weight, owed=0)
+
+    # Tag each message once; redelivered (deferred) messages keep their tag
+    for _, message in sorted(messages, key=lambda m: m[1].get('enqueuedAt', 0)):
+        if 'startTag' not in message:
+            state = tenants[message['tenant']]
+            message['startTag'] = max(virtual_time, state['finishTag'])
+            state['finishTag'] = message['startTag'] + cost_of(message) / state['weight']
+
+    admitted, deferred = [], []
+    for record, message in sorted(messages, key=lambda m: m[1]['startTag']):
+        state = tenants[message['tenant']]
+        cost = cost_of(message)
+        # A batch larger than the burst waits for a full bucket, then goes into debt
+        need = min(cost, TENANT_BURST * state['weight'])
+        if state['tokens'] < need:
+            # Over quota: come back when this message's tokens are due
+            state['owed'] += need
+            delay = (state['owed'] - state['tokens']) / (TENANT_START_RATE * state['weight'])
+            deferred.append((record, message, int(min(MAX_DELAY_SECONDS, max(defer_seconds, delay)))))
+        elif capacity <= 0:
+            # Tenants far ahead of their fair share wait longer, leaving the queue head to others
+            lead = max(0.0, message['startTag'] - virtual_time)
+            deferred.append((record, message, int(min(MAX_DELAY_SECONDS, defer_seconds * (1 + lead // FAIR_LAG)))))
+        else:
+            state['tokens'] -= cost
+            capacity -= cost
+            virtual_time = max(virtual_time, message['startTag'])
+            admitted.append((record, message))
+    return admitted, deferred, virtual_time
+
+
+def current_limit(controller):
+    """In-flight limit for this pass; returns (limit, throttles consumed)"""
+    limit = int(controller.get('limit') or INITIAL_IN_FLIGHT)
+    throttles = int(controller.get('throttles') or 0)
+    if throttles:
+        return max(MIN_IN_FLIGHT, limit // 2), throttles
+    return limit, 0
+
+
+def save_controller(controller, limit, throttles_seen, started, virtual_time=0.0):
+    """Persist the new limit, the fair-queuing virtual time and an EWMA of the start rate"""
+    now = time.time()
+    elapsed = max(1.0, now - float(controller.get('updatedAt') or now - 60))
+    rate = 0.7 * float(controller.get('startRate') or DEFAULT_START_RATE) + 0.3 * (started / elapsed)
+    controller_table().update_item(
+        Key=CONTROLLER_KEY,
+        UpdateExpression='SET #l = :l, startRate = :r, updatedAt = :t, virtualTime = :v ADD throttles :seen',
+        ExpressionAttributeNames={'#l': 'limit'},
+        ExpressionAttributeValues={
+            ':l': limit, ':r': Decimal(str(round(rate, 4))), ':t': Decimal(str(round(now, 3))),
+            ':v': Decimal(str(round(virtual_time, 4))), ':seen': -throttles_seen
+        }
+    )
@@ -0,0 +1,43 @@
+"""
+Bedrock Claude invocation shared by the agent stages
+"""
+import json
+import os
+
+from . import metrics
+from .clients import get_client
+from .log import get_logger
+
+logger = get_logger('bedrock')
+
+HAIKU_MODEL_ID = 'anthropic.claude-3-haiku-20240307-v1:0'
+BEDROCK_MODEL_ID = os.environ.get('BEDROCK_MODEL_ID', HAIKU_MODEL_ID)
+THROTTLE_CODES = ('ThrottlingException', 'TooManyRequestsException', 'ServiceUnavailableException')
+
+
+def invoke_bedrock(prompt, max_tokens=500, temperature=None, model_id=None):
+    """Invoke Bedrock Claude model"""
+    try:
+        request = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        if temperature is not None:
+            request["temperature"] = temperature
+        response = get_client('bedrock-runtime').invoke_model(
+            modelId=model_id or BEDROCK_MODEL_ID,
+            body=json.dumps(request)
+        )
+        result = json.loads(response['body'].read())
+        usage = result.get('usage', {})
+        metrics.add('BedrockInputTokens', usage.get('input_tokens', 0))
+        metrics.add('BedrockOutputTokens', usage.get('output_tokens', 0))
+        return result['content'][0]['text']
+    except Exception as e:
+        logger.error('Bedrock error: %s', e)
+        if getattr(e, 'response', {}).get('Error', {}).get('Code') in THROTTLE_CODES:
+            # Still throttled after client retries - tell admission control to back off
+            from .admission import record_throttle
+            record_throttle()
+        return None
@@ -0,0 +1,74 @@
+"""
+Per-container read-through cache with TTL and stale-while-revalidate
+Entries older than `ttl` are served as-is while one background thread
+reloads them; entries older than `ttl + stale_ttl` are reloaded inline.
+A failed reload keeps serving the last good value.
+"""
+import threading
+import time
+
+from .log import get_logger
+
+logger = get_logger('cache')
+
+
+class ReadThroughCache:
+    def __init__(self, loader, ttl, stale_ttl, name='cache', clock=time.monotonic):
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.name = name
+        self.clock = clock
+        self._entries = {}  # key -> (value, loaded_at)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = self.clock() - entry[1]
+            if age < self.ttl:
+                return entry[0]
+            if age < self.ttl + self.stale_ttl:
+                self._refresh_in_background(key)
+                return entry[0]
+        value = self._load(key)
+        if value is not None:
+            return value
+        return entry[0] if entry is not None else default
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _load(self, key):
+        try:
+            value = self.loader(key)
+        except Exception as e:
+            logger.warning('%s refresh failed for %s: %s', self.name, key, e)
+            with self._lock:
+                if key in self._entries:
+                    # Keep the last good value, retried in the background from now on
+                    self._entries[key] = (self._entries[key][0], self.clock() - self.ttl)
+            return None
+        with self._lock:
+            self._entries[key] = (value, self.clock())
+        return value
+
+    def _refresh_in_background(self, key):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._load(key)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"{self.name}-refresh", daemon=True).start()
@@ -0,0 +1,89 @@
+"""
+Pooled AWS clients - created on first use, reused across warm invocations
+"""
+import os
+import threading
+
+from . import metrics
+
+AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+MAX_POOL_CONNECTIONS = int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '32'))
+MAX_ATTEMPTS = int(os.environ.get('AWS_MAX_ATTEMPTS', '3'))
+
+# Model calls stream back thousands of tokens - give them a longer read timeout
+READ_TIMEOUTS = {'bedrock-runtime': 120, 'textract': 60}
+DEFAULT_READ_TIMEOUT = 30
+
+_session = None
+_clients = {}
+_resources = {}
+_lock = threading.Lock()
+
+
+def _config(service):
+    """Connection pooling, keep-alive and retry settings for a service"""
+    from botocore.config import Config
+    return Config(
+        region_name=AWS_REGION,
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        connect_timeout=5,
+        read_timeout=READ_TIMEOUTS.get(service, DEFAULT_READ_TIMEOUT),
+        retries={'mode': 'adaptive', 'max_attempts': MAX_ATTEMPTS}
+    )
+
+
+def _get_session():
+    """boto3 is imported on first use so modules that never call AWS stay cheap to import"""
+    global _session
+    if _session is None:
+        import boto3
+        _session = boto3.session.Session(region_name=AWS_REGION)
+    return _session
+
+
+def get_client(service):
+    """Return the cached low-level client for a service, creating it on first use"""
+    client = _clients.get(service)
+    if client is None:
+        # Session.client is not thread-safe; clients themselves are
+        with _lock:
+            client = _clients.get(service)
+            if client is None:
+                client = metrics.instrument(_get_session().client(service, config=_config(service)))
+                _clients[service] = client
+    return client
+
+
+def get_resource(service):
+    """Return the cached resource (e.g. dynamodb) for a service, creating it on first use"""
+    resource = _resources.get(service)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(service)
+            if resource is None:
+                resource = _get_session().resource(service, config=_config(service))
+                metrics.instrument(resource.meta.client)
+                _resources[service] = resource
+    return resource
+
+
+def override_client(service, client):
+    """Install a client for a service (used by local harnesses to swap in stand-ins)"""
+    with _lock:
+        _clients[service] = client
+
+
+def override_resource(service, resource):
+    """Install a resource for a service (used by local harnesses to swap in stand-ins)"""
+    with _lock:
+        _resources[service] = resource
+
+
+def reset_clients():
+    """Drop cached clients (used by local harnesses that swap in stand-ins)"""
+    global _session
+    with _lock:
+        _clients.clear()
+        _resources.clear()
+        _session = None
@@ -0,0 +1,116 @@
+"""
+EventBridge publishing shared by all handlers
+Events are buffered and sent by a background thread in batches of up to 10,
+so the PutEvents round trip overlaps with the rest of the handler. Handlers
+wrapped in @lambda_entry wait for the tail of the buffer before returning.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from .clients import get_client
+from .log import get_logger
+
+logger = get_logger('events')
+
+EVENT_BUS_NAME = os.environ.get('EVENT_BUS_NAME', 'resume-optimizer-events')
+EVENT_SOURCE = 'resume.optimizer'
+MAX_BATCH = 10  # PutEvents limit
+MAX_ATTEMPTS = int(os.environ.get('EVENT_MAX_ATTEMPTS', '3'))
+# How long a handler waits for unsent events before returning; anything still
+# in flight finishes in the background and is drained on the next invocation
+FLUSH_TIMEOUT = float(os.environ.get('EVENT_FLUSH_TIMEOUT', '2'))
+
+
+class EventPublisher:
+    """Buffers EventBridge entries and drains them in batches on one background thread"""
+
+    def __init__(self, bus_name=EVENT_BUS_NAME, max_attempts=MAX_ATTEMPTS):
+        self.bus_name = bus_name
+        self.max_attempts = max_attempts
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._draining = None  # future of the running drain, if any
+        self._executor = None
+        self.failed = 0
+
+    def entry(self, detail_type, detail, source=EVENT_SOURCE):
+        return {
+            'Source': source,
+            'DetailType': detail_type,
+            'Detail': json.dumps(detail, default=str),
+            'EventBusName': self.bus_name
+        }
+
+    def publish(self, detail_type, detail, source=EVENT_SOURCE):
+        """Queue one event; sending starts immediately if the sender is idle"""
+        entry = self.entry(detail_type, detail, source)
+        with self._lock:
+            self._buffer.append(entry)
+            if self._draining is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='events')
+                self._draining = self._executor.submit(self._drain)
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """Wait for buffered events to be sent; returns False if the timeout passed first"""
+        with self._lock:
+            draining = self._draining
+        if draining is None:
+            return True
+        try:
+            draining.result(timeout=timeout)
+            return True
+        except FutureTimeout:
+            logger.warning('Event flush still running after %ss - continuing in background', timeout)
+            return False
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                batch = self._buffer[:MAX_BATCH]
+                del self._buffer[:MAX_BATCH]
+                if not batch:
+                    self._draining = None
+                    return
+            self._send(batch)
+
+    def _send(self, entries):
+        """PutEvents with retries of only the entries that failed"""
+        for attempt in range(self.max_attempts):
+            try:
+                response = get_client('events').put_events(Entries=entries)
+            except Exception as e:
+                logger.warning('Event publish error: %s', e)
+            else:
+                if not response.get('FailedEntryCount'):
+                    return
+                entries = [entry for entry, result in zip(entries, response['Entries'])
+                           if result.get('ErrorCode')]
+            if attempt + 1 < self.max_attempts:
+                time.sleep(0.05 * (2 ** attempt))
+        self.failed += len(entries)
+        logger.error('Event publish failed', dropped=len(entries), attempts=self.max_attempts)
+
+
+publisher = EventPublisher()
+
+
+def publish_event(detail_type, detail, source=EVENT_SOURCE):
+    """Publish event to EventBridge (buffered, see EventPublisher)"""
+    publisher.publish(detail_type, detail, source)
+
+
+def send_event(detail_type, detail, source=EVENT_SOURCE):
+    """Publish one event now, unbuffered; raises if EventBridge did not accept it"""
+    response = get_client('events').put_events(Entries=[publisher.entry(detail_type, detail, source)])
+    if response.get('FailedEntryCount'):
+        raise RuntimeError(f"PutEvents rejected {detail_type}: {response['Entries'][0].get('ErrorCode')}")
+
+
+def flush_events(timeout=FLUSH_TIMEOUT):
+    """Wait for buffered events to be sent"""
+    return publisher.flush(timeout)
+
@@ -0,0 +1,71 @@
+"""
+Lambda entry-point decorator shared by all handlers
+Binds per-invocation log context, emits latency metrics and drains buffered
+events before returning
+"""
+import functools
+import time
+
+from . import log, metrics
+from .events import flush_events
+
+logger = log.get_logger('handler')
+
+
+def job_id_of(event):
+    """Job id wherever the workflow put it"""
+    if not isinstance(event, dict):
+        return None
+    return (event.get('jobId') or (event.get('input') or {}).get('jobId')
+            or event.get('execution_id'))
+
+
+def dimensions_of(event):
+    """approach / iteration dimensions for the generate loop"""
+    if not isinstance(event, dict):
+        return {}
+    source = event.get('input') if isinstance(event.get('input'), dict) else event
+    return {
+        'approach': event.get('approach') or 'none',
+        'iteration': source.get('iteration') or event.get('iteration') or 1
+    }
+
+
+def lambda_entry(stage, timed=False):
+    """
+    Decorate a lambda_handler(event, context) for the given stage
+    timed=True adds the handler's durationMs to a dict result, so later stages
+    (the run log) can see per-stage timings in the workflow state.
+    """
+    def decorate(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            job_id = job_id_of(event)
+            log.start_invocation(
+                stage=stage,
+                jobId=job_id,
+                requestId=getattr(context, 'aws_request_id', None)
+            )
+            if metrics.ENABLED:
+                metrics.reset()
+            start = time.perf_counter()
+            failed = False
+            try:
+                result = handler(event, context)
+                if timed and isinstance(result, dict):
+                    result['durationMs'] = round((time.perf_counter() - start) * 1000, 1)
+                return result
+            except Exception:
+                failed = True
+                logger.exception('Unhandled error')
+                raise
+            finally:
+                flush_events()
+                if metrics.ENABLED:
+                    metrics.emit(
+                        (time.perf_counter() - start) * 1000,
+                        {'stage': stage, **dimensions_of(event)},
+                        {'jobId': job_id, 'failed': failed}
+                    )
+        return wrapper
+    return decorate
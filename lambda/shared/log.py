@@ -0,0 +1,108 @@
+"""
+Structured JSON-lines logging shared by all handlers
+- Messages use %-style args and are only formatted when the level is enabled
+- Large text fields are truncated, document fields (resume, JD, content) redacted
+- DEBUG output is sampled per invocation (LOG_DEBUG_SAMPLE_RATE)
+"""
+import json
+import os
+import random
+import sys
+import time
+import traceback
+
+LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
+LOG_LEVEL = LEVELS.get(os.environ.get('LOG_LEVEL', 'INFO').upper(), 20)
+DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', '0'))
+MAX_FIELD_CHARS = int(os.environ.get('LOG_MAX_FIELD_CHARS', '200'))
+MAX_LIST_ITEMS = 10
+
+# Document text never reaches the logs - only its size
+REDACTED_FIELDS = {
+    'resume', 'resumeText', 'jobDescription', 'jobDescriptionText',
+    'content', 'body', 'Body', 'Message', 'input', 'resume_text', 'job_description'
+}
+
+_context = {}
+_sampled = False
+
+
+def start_invocation(**context):
+    """Reset per-invocation context and decide whether this invocation samples DEBUG"""
+    global _sampled
+    _context.clear()
+    _context.update({k: v for k, v in context.items() if v is not None})
+    _sampled = DEBUG_SAMPLE_RATE > 0 and random.random() < DEBUG_SAMPLE_RATE
+
+
+def bind(**context):
+    """Add fields to every line logged for the rest of this invocation"""
+    _context.update({k: v for k, v in context.items() if v is not None})
+
+
+def summarize(value, key=None, depth=0):
+    """Log-safe copy of a value: redacts documents, truncates long strings and lists"""
+    if key in REDACTED_FIELDS and isinstance(value, (str, bytes)):
+        return f"[redacted {len(value)} chars]"
+    if isinstance(value, str):
+        if len(value) > MAX_FIELD_CHARS and key != 'traceback':
+            return f"{value[:MAX_FIELD_CHARS]}...[+{len(value) - MAX_FIELD_CHARS} chars]"
+        return value
+    if depth >= 4:
+        return f"[{type(value).__name__}]"
+    if isinstance(value, dict):
+        return {k: summarize(v, k, depth + 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [summarize(v, key, depth + 1) for v in value[:MAX_LIST_ITEMS]]
+        if len(value) > MAX_LIST_ITEMS:
+            items.append(f"...[+{len(value) - MAX_LIST_ITEMS} items]")
+        return items
+    return value
+
+
+class Logger:
+    def __init__(self, name):
+        self.name = name
+
+    def enabled(self, level):
+        return LEVELS[level] >= LOG_LEVEL or (level == 'DEBUG' and _sampled)
+
+    def _log(self, level, msg, args, fields):
+        if not self.enabled(level):
+            return
+        if args:
+            msg = msg % args
+        record = {
+            'timestamp': round(time.time(), 3),
+            'level': level,
+            'logger': self.name,
+            'message': msg,
+            **_context
+        }
+        if fields:
+            record.update(summarize(fields))
+        sys.stdout.write(json.dumps(record, default=str, separators=(',', ':')) + '\n')
+
+    def debug(self, msg, *args, **fields):
+        self._log('DEBUG', msg, args, fields)
+
+    def info(self, msg, *args, **fields):
+        self._log('INFO', msg, args, fields)
+
+    def warning(self, msg, *args, **fields):
+        self._log('WARNING', msg, args, fields)
+
+    def error(self, msg, *args, **fields):
+        self._log('ERROR', msg, args, fields)
+
+    def exception(self, msg, *args, **fields):
+        """ERROR with the active exception and a trimmed traceback"""
+        exc_type, exc, _ = sys.exc_info()
+        if exc is not None:
+            fields.setdefault('error', f"{exc_type.__name__}: {exc}")
+            fields.setdefault('traceback', traceback.format_exc(limit=5)[-2000:])
+        self._log('ERROR', msg, args, fields)
+
+
+def get_logger(name):
+    return Logger(name)
@@ -0,0 +1,335 @@
+"""
+Manifest-driven bulk ingestion
+A CSV or JSONL manifest dropped under MANIFEST_PREFIX in the input bucket lists
+resumes to optimize: resumeKey (or resume), optional jobDescriptionKey,
+userId and targetRole per row. s3_trigger streams it once, cutting rows that
+share a job description, user and role into batches of MANIFEST_BATCH_SIZE,
+and stages each batch workflow input under manifests/<manifestId>/ in the
+output bucket. At most MANIFEST_CONCURRENCY batch workflows of one manifest
+run at a time: every CompleteBatch writes its part of the results and
+launches the next staged batch, and the last one concatenates the parts into
+manifests/<manifestId>/results.jsonl.
+
+The manifest row in the jobs table (type MANIFEST) is the unit of tracking;
+the FAILED and REJECTED lines of results.jsonl, dropped as a new manifest,
+are the retry. Job ids are derived from the manifest line, so a redelivered
+notification restages the same jobs instead of duplicating them.
+"""
+import codecs
+import csv
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+from botocore.exceptions import ClientError
+
+from .admission import submit
+from .clients import get_client, get_resource
+from .events import publish_event
+from .log import get_logger
+
+logger = get_logger('manifest')
+
+MANIFEST_PREFIX = os.environ.get('MANIFEST_PREFIX', 'manifests/')
+MANIFEST_EXTENSIONS = ('.csv', '.jsonl')
+BATCH_SIZE = int(os.environ.get('MANIFEST_BATCH_SIZE', '50'))
+CONCURRENCY = int(os.environ.get('MANIFEST_CONCURRENCY', '4'))
+GENERIC_JOB_DESCRIPTION = 'Generic resume optimization for professional roles'
+# Column names accepted for each field, first match wins
+COLUMNS = {
+    'resumeKey': ('resumeKey', 'resume_key', 'resume'),
+    'jobDescriptionKey': ('jobDescriptionKey', 'job_description_key', 'jobDescription', 'jd'),
+    'userId': ('userId', 'user_id', 'user'),
+    'targetRole': ('targetRole', 'target_role', 'role'),
+}
+
+
+def is_manifest(key):
+    return key.startswith(MANIFEST_PREFIX) and key.lower().endswith(MANIFEST_EXTENSIONS)
+
+
+def jobs_table():
+    return get_resource('dynamodb').Table(os.environ['JOBS_TABLE'])
+
+
+def work_prefix(manifest_id):
+    return f"{MANIFEST_PREFIX}{manifest_id}/"
+
+
+def read_rows(body, key):
+    """(line number, row) streamed from a manifest body; row is None for a line that does not parse"""
+    lines = codecs.getreader('utf-8-sig')(body)
+    if key.lower().endswith('.csv'):
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, {k.strip(): (v or '').strip() for k, v in row.items() if k}
+    else:
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield number, row if isinstance(row, dict) else None
+
+
+def normalize(row):
+    """Manifest row -> {resumeKey, jobDescriptionKey, userId, targetRole}; raises ValueError"""
+    if row is None:
+        raise ValueError('Line is not valid CSV/JSON')
+    fields = {name: next((str(row[c]).strip() for c in aliases if row.get(c)), None)
+              for name, aliases in COLUMNS.items()}
+    if not fields['resumeKey']:
+        raise ValueError('Missing resumeKey')
+    return fields
+
+
+def put_rows(items):
+    """BatchWriteItem in chunks of 25, resending unprocessed items"""
+    dynamodb = get_resource('dynamodb')
+    table = os.environ['JOBS_TABLE']
+    for i in range(0, len(items), 25):
+        request = {table: [{'PutRequest': {'Item': item}} for item in items[i:i + 25]]}
+        for attempt in range(5):
+            request = dynamodb.batch_write_item(RequestItems=request).get('UnprocessedItems')
+            if not request:
+                break
+            time.sleep(0.05 * 2 ** attempt)
+        else:
+            raise RuntimeError('DynamoDB kept throttling the manifest item writes')
+
+
+def put_json_lines(key, records):
+    get_client('s3').put_object(
+        Bucket=os.environ['OUTPUT_BUCKET'], Key=key, ContentType='application/x-ndjson',
+        Body=''.join(json.dumps(r, default=str) + '\n' for r in records).encode('utf-8')
+    )
+
+
+def start(bucket, key, body, etag, owner, read_job_description):
+    """
+    Stream a manifest into staged batches and launch the first MANIFEST_CONCURRENCY
+    Returns the manifest id, or None when this manifest version was already staged.
+    read_job_description(key) -> text or None; called once per distinct key.
+    """
+    manifest_id = 'manifest-' + hashlib.sha1(f"{bucket}/{key}/{etag}".encode('utf-8')).hexdigest()[:16]
+    created = datetime.utcnow()
+    try:
+        jobs_table().put_item(
+            Item={
+                'jobId': manifest_id,
+                'userId': owner,
+                'type': 'MANIFEST',
+                'status': 'STAGING',
+                'sourceManifest': f"s3://{bucket}/{key}",
+                'createdAt': created.isoformat(),
+                'expiresAt': int(created.timestamp()) + (30 * 24 * 60 * 60),
+                'version': 1
+            },
+            # A retry after a crash mid-staging restages; anything later is a duplicate
+            ConditionExpression='attribute_not_exists(jobId) OR #s = :staging',
+            ExpressionAttributeNames={'#s': 'status'},
+            ExpressionAttributeValues={':staging': 'STAGING'}
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+            logger.info('Manifest already staged', manifestId=manifest_id, key=key)
+            return None
+        raise
+
+    texts = {}
+    def job_description(jd_key):
+        if jd_key not in texts:
+            text = None
+            if jd_key:
+                try:
+                    text = read_job_description(jd_key)
+                except Exception as e:
+                    logger.warning('Could not read job description: %s', e, key=jd_key)
+            texts[jd_key] = text or GENERIC_JOB_DESCRIPTION
+        return texts[jd_key]
+
+    # Only the open batch of each (JD, user, role) group is held in memory
+    open_batches, rejected = {}, []
+    batch_count = item_count = 0
+    def stage(group, items):
+        nonlocal batch_count
+        jd_key, user_id, target_role = group
+        batch_id = f"{manifest_id}-b{batch_count:05d}"
+        put_json_lines(f"{work_prefix(manifest_id)}batches/{batch_count:05d}.json", [{
+            'stateMachineArn': os.environ['BATCH_STATE_MACHINE_ARN'],
+            'input': {
+                'batchId': batch_id,
+                'manifestId': manifest_id,
+                'userId': user_id,
+                'targetRole': target_role,
+                'jobDescription': job_description(jd_key),
+                'jobDescriptionKey': jd_key,
+                'bucket': bucket,
+                'items': items
+            }
+        }])
+        batch_count += 1
+
+    for line, row in read_rows(body, key):
+        try:
+            fields = normalize(row)
+        except ValueError as e:
+            rejected.append({'line': line, 'status': 'REJECTED', 'error': str(e),
+                             'resumeKey': (row or {}).get('resumeKey') or (row or {}).get('resume')})
+            continue
+        group = (fields['jobDescriptionKey'], fields['userId'] or owner, fields['targetRole'] or 'Professional Role')
+        items = open_batches.setdefault(group, [])
+        items.append({'jobId': f"{manifest_id}-{line}", 'resumeKey': fields['resumeKey'], 'line': line})
+        item_count += 1
+        if len(items) >= BATCH_SIZE:
+            stage(group, open_batches.pop(group))
+    for group, items in open_batches.items():
+        stage(group, items)
+    if rejected:
+        put_json_lines(f"{work_prefix(manifest_id)}parts/rejected.jsonl", rejected)
+
+    first = min(batch_count, CONCURRENCY)
+    jobs_table().update_item(
+        Key={'jobId': manifest_id},
+        UpdateExpression='SET batchCount = :b, itemCount = :i, rejectedCount = :r, '
+                         'launched = if_not_exists(launched, :l), batchesDone = if_not_exists(batchesDone, :z) '
+                         'ADD version :one',
+        ExpressionAttributeValues={':b': batch_count, ':i': item_count, ':r': len(rejected),
+                                   ':l': first, ':z': 0, ':one': 1}
+    )
+    for index in range(first):
+        launch(manifest_id, index)
+    if not batch_count:
+        finish(manifest_id)
+    try:
+        jobs_table().update_item(
+            Key={'jobId': manifest_id},
+            UpdateExpression='SET #s = :running ADD version :one',
+            ConditionExpression='#s = :staging',
+            ExpressionAttributeNames={'#s': 'status'},
+            ExpressionAttributeValues={':running': 'RUNNING', ':staging': 'STAGING', ':one': 1}
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise  # otherwise every batch already finished
+
+    publish_event('ManifestRequested', {'manifestId': manifest_id, 'userId': owner, 'items': item_count,
+                                        'batches': batch_count, 'rejected': len(rejected)})
+    logger.info('Manifest staged', manifestId=manifest_id, items=item_count, batches=batch_count,
+                rejected=len(rejected), launched=first)
+    return manifest_id
+
+
+def launch(manifest_id, index):
+    """Write the job rows of one staged batch and queue its workflow"""
+    staged = json.loads(get_client('s3').get_object(
+        Bucket=os.environ['OUTPUT_BUCKET'], Key=f"{work_prefix(manifest_id)}batches/{index:05d}.json"
+    )['Body'].read())
+    batch = staged['input']
+    created = datetime.utcnow()
+    expires = int(created.timestamp()) + (30 * 24 * 60 * 60)
+    put_rows([{
+        'jobId': item['jobId'],
+        'userId': batch['userId'],
+        'batchId': batch['batchId'],
+        'manifestId': manifest_id,
+        'manifestLine': item['line'],
+        'status': 'QUEUED',
+        'targetRole': batch['targetRole'],
+        'sourceFile': item['resumeKey'],
+        'createdAt': created.isoformat(),
+        'expiresAt': expires,
+        'version': 1
+    } for item in batch['items']] + [{
+        'jobId': batch['batchId'],
+        'userId': batch['userId'],
+        'type': 'BATCH',
+        'manifestId': manifest_id,
+        'status': 'RUNNING',
+        'targetRole': batch['targetRole'],
+        'itemCount': len(batch['items']),
+        'jobIds': [item['jobId'] for item in batch['items']],
+        'createdAt': created.isoformat(),
+        'expiresAt': expires,
+        'version': 1
+    }])
+    submit(staged['stateMachineArn'], batch['batchId'], batch, cost=len(batch['items']))
+
+
+def complete_batch(manifest_id, batch_id, job_ids):
+    """CompleteBatch of a manifest batch: write its results part, launch the next batch, finish if last"""
+    dynamodb = get_resource('dynamodb')
+    table = os.environ['JOBS_TABLE']
+    rows = []
+    for i in range(0, len(job_ids), 100):
+        request = {table: {
+            'Keys': [{'jobId': job_id} for job_id in job_ids[i:i + 100]],
+            'ProjectionExpression': 'jobId, #s, atsScore, #r, #e, sourceFile, manifestLine, userId',
+            'ExpressionAttributeNames': {'#s': 'status', '#r': 'result', '#e': 'error'}
+        }}
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            rows.extend(response['Responses'].get(table, []))
+            request = response.get('UnprocessedKeys')
+    put_json_lines(f"{work_prefix(manifest_id)}parts/{batch_id}.jsonl", [{
+        'line': int(row.get('manifestLine', 0)),
+        'resumeKey': row.get('sourceFile'),
+        'userId': row.get('userId'),
+        'jobId': row['jobId'],
+        'batchId': batch_id,
+        'status': row.get('status'),
+        'atsScore': float(row['atsScore']) if row.get('atsScore') is not None else None,
+        'outputKey': row.get('result'),
+        'error': row.get('error')
+    } for row in sorted(rows, key=lambda r: int(r.get('manifestLine', 0)))])
+
+    manifest = jobs_table().update_item(
+        Key={'jobId': manifest_id},
+        UpdateExpression='ADD batchesDone :one, launched :one',
+        ExpressionAttributeValues={':one': 1},
+        ReturnValues='ALL_NEW'
+    )['Attributes']
+    following = int(manifest['launched']) - 1
+    if following < int(manifest['batchCount']):
+        launch(manifest_id, following)
+    if int(manifest['batchesDone']) >= int(manifest['batchCount']):
+        finish(manifest_id)
+
+
+def finish(manifest_id):
+    """Concatenate the result parts into results.jsonl and close the manifest row"""
+    s3 = get_client('s3')
+    bucket = os.environ['OUTPUT_BUCKET']
+    prefix = f"{work_prefix(manifest_id)}parts/"
+    keys, token = [], None
+    while True:
+        kwargs = {'ContinuationToken': token} if token else {}
+        response = s3.list_objects_v2(Bucket=bucket, Prefix=prefix, **kwargs)
+        keys.extend(o['Key'] for o in response.get('Contents', []))
+        if not response.get('IsTruncated'):
+            break
+        token = response['NextContinuationToken']
+
+    chunks, counts = [], {}
+    for key in sorted(keys):
+        data = s3.get_object(Bucket=bucket, Key=key)['Body'].read()
+        for line in data.splitlines():
+            status = json.loads(line).get('status') or 'UNKNOWN'
+            counts[status] = counts.get(status, 0) + 1
+        chunks.append(data)
+    results_key = f"{work_prefix(manifest_id)}results.jsonl"
+    s3.put_object(Bucket=bucket, Key=results_key, Body=b''.join(chunks), ContentType='application/x-ndjson')
+
+    jobs_table().update_item(
+        Key={'jobId': manifest_id},
+        UpdateExpression='SET #s = :s, resultsKey = :k, #sm = :sm, completedAt = :t ADD version :one',
+        ExpressionAttributeNames={'#s': 'status', '#sm': 'summary'},
+        ExpressionAttributeValues={':s': 'COMPLETED', ':k': f"s3://{bucket}/{results_key}", ':sm': counts,
+                                   ':t': datetime.utcnow().isoformat(), ':one': 1}
+    )
+    publish_event('ManifestComplete', {'manifestId': manifest_id, 'results': f"s3://{bucket}/{results_key}", **counts})
+    logger.info('Manifest complete', manifestId=manifest_id, **counts)
@@ -0,0 +1,149 @@
+"""
+Per-invocation latency metrics as CloudWatch Embedded Metric Format
+@lambda_entry times the whole invocation; every AWS API call is timed through
+botocore's before-call/after-call hooks on the shared clients, and Bedrock
+token usage is added by invoke_bedrock. One EMF line is written per invocation.
+Set METRICS_ENABLED=false to skip the hooks entirely.
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'ResumeOptimizer')
+DIMENSION_SETS = [['stage'], ['stage', 'coldStart'], ['stage', 'approach', 'iteration']]
+
+_lock = threading.Lock()
+_calls = {}     # 'service.Operation' -> [count, total_ms, max_ms, errors]
+_counters = {}  # e.g. BedrockInputTokens
+_cold = True
+
+
+def reset():
+    with _lock:
+        _calls.clear()
+        _counters.clear()
+
+
+def record_call(service, operation, elapsed_ms, error=False):
+    """Add one AWS API call to the current invocation"""
+    if not ENABLED:
+        return
+    with _lock:
+        stats = _calls.setdefault(f"{service}.{operation}", [0, 0.0, 0.0, 0])
+        stats[0] += 1
+        stats[1] += elapsed_ms
+        stats[2] = max(stats[2], elapsed_ms)
+        stats[3] += 1 if error else 0
+
+
+def add(name, value):
+    """Add to a counter metric for the current invocation"""
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+# ---------------------------------------------------------------------------
+# botocore hooks
+# ---------------------------------------------------------------------------
+def _before_call(model, context, **kwargs):
+    context['metrics_call'] = (model.service_model.service_name, model.name, time.perf_counter())
+
+
+def _after_call(context, http_response=None, **kwargs):
+    call = context.pop('metrics_call', None)
+    if call is not None:
+        error = http_response is not None and http_response.status_code >= 300
+        record_call(call[0], call[1], (time.perf_counter() - call[2]) * 1000, error=error)
+
+
+def _after_call_error(context, **kwargs):
+    # Connection-level failures; HTTP errors come through after-call
+    call = context.pop('metrics_call', None)
+    if call is not None:
+        record_call(call[0], call[1], (time.perf_counter() - call[2]) * 1000, error=True)
+
+
+def instrument(client):
+    """Register timing hooks on a botocore client (no-op when disabled)"""
+    if ENABLED:
+        client.meta.events.register('before-call', _before_call)
+        client.meta.events.register('after-call', _after_call)
+        client.meta.events.register('after-call-error', _after_call_error)
+    return client
+
+
+# ---------------------------------------------------------------------------
+# EMF output
+# ---------------------------------------------------------------------------
+def put_metrics(dimensions, values, units, dimension_sets=None):
+    """
+    Write a standalone EMF line outside the per-invocation record, for metrics
+    keyed by something other than the stage (e.g. per-tenant queue metrics).
+    A value may be a list - CloudWatch records each entry as a sample.
+    """
+    if not ENABLED:
+        return
+    record = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': NAMESPACE,
+                'Dimensions': dimension_sets or [list(dimensions)],
+                'Metrics': [{'Name': n, 'Unit': units[n]} for n in values]
+            }]
+        },
+        **{k: str(v) for k, v in dimensions.items()},
+        **values
+    }
+    sys.stdout.write(json.dumps(record, default=str, separators=(',', ':')) + '\n')
+
+
+def emit(duration_ms, dimensions, properties=None):
+    """Write one EMF line for the invocation and reset the per-invocation state"""
+    global _cold
+    cold, _cold = _cold, False
+    if not ENABLED:
+        return
+    with _lock:
+        calls = dict(_calls)
+        counters = dict(_counters)
+        _calls.clear()
+        _counters.clear()
+
+    dimensions = {k: str(v).lower() if isinstance(v, bool) else str(v)
+                  for k, v in {**dimensions, 'coldStart': cold}.items()}
+    values = {'Duration': round(duration_ms, 2)}
+    units = {'Duration': 'Milliseconds'}
+    for name, (count, total_ms, max_ms, errors) in calls.items():
+        values[f"{name}.Time"] = round(total_ms, 2)
+        values[f"{name}.Calls"] = count
+        units[f"{name}.Time"] = 'Milliseconds'
+        units[f"{name}.Calls"] = 'Count'
+        if errors:
+            values[f"{name}.Errors"] = errors
+            units[f"{name}.Errors"] = 'Count'
+    values['AwsCallTime'] = round(sum(c[1] for c in calls.values()), 2)
+    units['AwsCallTime'] = 'Milliseconds'
+    for name, value in counters.items():
+        values[name] = value
+        units[name] = 'Count'
+
+    record = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': NAMESPACE,
+                'Dimensions': [d for d in DIMENSION_SETS if all(k in dimensions for k in d)],
+                'Metrics': [{'Name': n, 'Unit': units[n]} for n in values]
+            }]
+        },
+        **dimensions,
+        **(properties or {}),
+        **values
+    }
+    sys.stdout.write(json.dumps(record, default=str, separators=(',', ':')) + '\n')
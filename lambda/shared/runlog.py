@@ -0,0 +1,200 @@
+"""
+Append-only run log - one compact record per finished job
+Records are gzip JSONL objects under <prefix>/date=YYYY-MM-DD/<jobId>.jsonl.gz,
+a layout Athena / Spark read directly as a date-partitioned table. The object
+key is derived from the jobId, so a retried write replaces rather than
+duplicates. No resume or job description text is stored unless
+RUN_LOG_INCLUDE_TEXT is set.
+
+Per-job objects are small, so a daily job (runlog_compact) merges each day
+into part-*.jsonl.gz files of up to RUN_LOG_COMPACT_RECORDS records, dropping
+duplicate jobIds, before Athena scans it.
+
+RUN_LOG_URI selects the backend: s3://bucket/prefix or a local directory
+(file:///path or a plain path) for tests and offline runs.
+"""
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+from .clients import get_client
+from .strategy import gap_count
+
+RUN_LOG_URI = os.environ.get('RUN_LOG_URI', '')
+INCLUDE_TEXT = os.environ.get('RUN_LOG_INCLUDE_TEXT', 'false').lower() in ('1', 'true', 'yes')
+COMPACT_RECORDS = int(os.environ.get('RUN_LOG_COMPACT_RECORDS', '50000'))
+SCHEMA_VERSION = 2
+
+
+class S3Backend:
+    def __init__(self, bucket, prefix):
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+
+    def _full(self, key):
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def write(self, key, data):
+        key = self._full(key)
+        get_client('s3').put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=data,
+            ContentType='application/gzip'
+        )
+        return f"s3://{self.bucket}/{key}"
+
+    def keys(self, prefix):
+        s3 = get_client('s3')
+        full = self._full(prefix)
+        strip = len(self._full(''))
+        keys, token = [], None
+        while True:
+            kwargs = {'ContinuationToken': token} if token else {}
+            response = s3.list_objects_v2(Bucket=self.bucket, Prefix=full, **kwargs)
+            keys.extend(o['Key'][strip:] for o in response.get('Contents', []))
+            if not response.get('IsTruncated'):
+                return keys
+            token = response['NextContinuationToken']
+
+    def read(self, key):
+        return get_client('s3').get_object(Bucket=self.bucket, Key=self._full(key))['Body'].read()
+
+    def delete(self, keys):
+        s3 = get_client('s3')
+        for i in range(0, len(keys), 1000):
+            s3.delete_objects(Bucket=self.bucket, Delete={
+                'Objects': [{'Key': self._full(key)} for key in keys[i:i + 1000]],
+                'Quiet': True
+            })
+
+
+class LocalBackend:
+    def __init__(self, root):
+        self.root = root
+
+    def write(self, key, data):
+        path = os.path.join(self.root, *key.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return path
+
+    def keys(self, prefix):
+        folder = os.path.join(self.root, *prefix.rstrip('/').split('/'))
+        if not os.path.isdir(folder):
+            return []
+        return [f"{prefix.rstrip('/')}/{name}" for name in os.listdir(folder) if not name.endswith('.tmp')]
+
+    def read(self, key):
+        with open(os.path.join(self.root, *key.split('/')), 'rb') as f:
+            return f.read()
+
+    def delete(self, keys):
+        for key in keys:
+            os.remove(os.path.join(self.root, *key.split('/')))
+
+
+def backend_for(uri):
+    if uri.startswith('s3://'):
+        bucket, _, prefix = uri[5:].partition('/')
+        return S3Backend(bucket, prefix)
+    return LocalBackend(uri[7:] if uri.startswith('file://') else uri)
+
+
+def build_record(job_id, analysis, plan, evaluation, iteration, include_text=INCLUDE_TEXT, best_content=None,
+                 request=None):
+    """
+    Score breakdowns of every iteration, strategy and stage timings for one
+    job - no raw text by default
+    """
+    rounds = evaluation.get('rounds') or [{'iteration': iteration, 'versions': evaluation.get('versions', [])}]
+    versions = [{**v, 'iteration': r['iteration']} for r in rounds for v in r['versions']]
+    record = {
+        'schema': SCHEMA_VERSION,
+        'jobId': job_id,
+        'userId': (request or {}).get('userId'),
+        'targetRole': (request or {}).get('targetRole'),
+        'finishedAt': int(time.time() * 1000),
+        'jobType': analysis.get('jobType'),
+        'skillsGap': gap_count(analysis),
+        'originalScore': analysis.get('originalScore'),
+        'strategy': plan.get('strategy'),
+        'selector': plan.get('selector'),
+        'iterations': iteration,
+        'bestApproach': evaluation.get('bestApproach'),
+        'bestScore': evaluation.get('bestScore'),
+        'versions': [
+            {'iteration': v['iteration'], 'approach': v.get('approach'), 'score': v.get('score'),
+             'durationMs': v.get('durationMs'), 'chars': v.get('chars', len(v.get('content', '')))}
+            for v in versions
+        ],
+        'timings': {
+            'analyze': analysis.get('durationMs'),
+            'plan': plan.get('durationMs'),
+            # Branches of one round run concurrently: the slowest one per round, summed
+            'generate': sum(max((v.get('durationMs') or 0 for v in r['versions']), default=0) for r in rounds),
+            'evaluate': evaluation.get('durationMs')
+        }
+    }
+    if include_text:
+        record['bestContent'] = best_content if best_content is not None else \
+            evaluation.get('bestVersion', {}).get('content')
+    return record
+
+
+class RunLog:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def append(self, record):
+        """Write one record; returns where it went"""
+        day = datetime.fromtimestamp(record['finishedAt'] / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+        data = gzip.compress((json.dumps(record, default=str, separators=(',', ':')) + '\n').encode('utf-8'))
+        return self.backend.write(f"date={day}/{record['jobId']}.jsonl.gz", data)
+
+    def compact(self, day, max_records=COMPACT_RECORDS):
+        """
+        Merge a day's objects into part files, keeping the first record per
+        jobId, then delete the inputs. Re-running merges earlier parts and any
+        late records again, so it is safe to repeat.
+        """
+        prefix = f"date={day}/"
+        # Earlier parts first, so the record kept per jobId is the earliest written
+        keys = sorted(self.backend.keys(prefix), key=lambda k: (not k[len(prefix):].startswith('part-'), k))
+        if len(keys) < 2:
+            return {'day': day, 'inputs': len(keys), 'records': None, 'parts': 0}
+        stamp = int(time.time() * 1000)
+        seen, lines, parts = set(), [], []
+
+        def flush():
+            key = f"{prefix}part-{stamp}-{len(parts):04d}.jsonl.gz"
+            self.backend.write(key, gzip.compress(''.join(lines).encode('utf-8')))
+            parts.append(key)
+            lines.clear()
+
+        for key in keys:
+            for line in gzip.decompress(self.backend.read(key)).decode('utf-8').splitlines():
+                if not line.strip():
+                    continue
+                job_id = json.loads(line).get('jobId')
+                if job_id in seen:
+                    continue
+                seen.add(job_id)
+                lines.append(line + '\n')
+                if len(lines) >= max_records:
+                    flush()
+        if lines:
+            flush()
+        # Parts are written before anything is deleted; a crash in between only leaves duplicates
+        self.backend.delete([key for key in keys if key not in parts])
+        return {'day': day, 'inputs': len(keys), 'records': len(seen), 'parts': len(parts)}
+
+
+def default_run_log():
+    """RunLog for RUN_LOG_URI, or None when the run log is not configured"""
+    return RunLog(backend_for(RUN_LOG_URI)) if RUN_LOG_URI else None
@@ -0,0 +1,102 @@
+"""
+Strategy selection - Thompson sampling over per-(jobType, gap bucket) outcomes
+Outcomes are rolled up by Learn into one analytics row per job type, with one
+counter attribute per (gap bucket, strategy, approach, field), updated with ADD.
+"""
+import os
+import random
+import time
+from decimal import Decimal
+
+STRATEGIES = [
+    'keyword_optimization', 'achievement_focus', 'skills_emphasis',
+    'structure_improvement', 'balanced_approach'
+]
+SUCCESS_SCORE = 85
+
+STRATEGY_SEED = os.environ.get('STRATEGY_SEED', '0')
+EXPLORATION_RATE = float(os.environ.get('STRATEGY_EXPLORATION_RATE', '0.05'))
+# Beta prior - one pseudo win and one pseudo loss per strategy
+PRIOR_WINS = 1.0
+PRIOR_LOSSES = 1.0
+
+STATS_METRIC = 'strategy-stats'
+STATS_FIELDS = ('attempts', 'wins', 'scoreSum', 'scoreSumSq')
+SEPARATOR = '|'
+
+
+def gap_count(analysis):
+    """Skill gaps of an analysis, full or as carried through the refinement loop"""
+    return analysis.get('gapCount', len(analysis.get('skillsGap', [])))
+
+
+def gap_bucket(gaps):
+    """Coarse bucket for the number of skill gaps"""
+    if gaps <= 3:
+        return 'low'
+    if gaps <= 10:
+        return 'medium'
+    return 'high'
+
+
+def stats_key(job_type):
+    """Analytics table key of the rollup row for a job type"""
+    return {'date': f"rollup{SEPARATOR}{job_type}", 'metric': STATS_METRIC}
+
+
+def outcome_update(gap_bucket_name, strategy, approach, score):
+    """UpdateItem arguments adding one outcome to a rollup row"""
+    prefix = SEPARATOR.join((gap_bucket_name, strategy, approach))
+    score = Decimal(str(score))
+    increments = (1, 1 if score >= SUCCESS_SCORE else 0, score, score * score)
+    names, values, adds = {}, {}, []
+    for i, (field, increment) in enumerate(zip(STATS_FIELDS, increments)):
+        names[f"#c{i}"] = f"{prefix}{SEPARATOR}{field}"
+        values[f":c{i}"] = increment
+        adds.append(f"#c{i} :c{i}")
+    names['#u'] = 'updatedAt'
+    values[':u'] = int(time.time())
+    return {
+        'UpdateExpression': f"ADD {', '.join(adds)} SET #u = :u",
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values
+    }
+
+
+def parse_stats(item):
+    """Rollup row -> {gap bucket: {strategy: {field: total}}}, summed over approaches"""
+    stats = {}
+    for name, value in (item or {}).items():
+        parts = name.split(SEPARATOR)
+        if len(parts) != 4 or parts[3] not in STATS_FIELDS:
+            continue
+        bucket, strategy, _, field = parts
+        entry = stats.setdefault(bucket, {}).setdefault(strategy, dict.fromkeys(STATS_FIELDS, 0.0))
+        entry[field] += float(value)
+    return stats
+
+
+class ThompsonSelector:
+    """
+    stats: {strategy: {'attempts': n, 'wins': w}} for one (jobType, gap bucket)
+    Same seed + job id always gives the same choice for the same stats.
+    """
+
+    def __init__(self, strategies=STRATEGIES, exploration_rate=EXPLORATION_RATE, seed=STRATEGY_SEED):
+        self.strategies = list(strategies)
+        self.exploration_rate = exploration_rate
+        self.seed = seed
+
+    def choose(self, stats, job_id=''):
+        rng = random.Random(f"{self.seed}:{job_id}")
+        if rng.random() < self.exploration_rate:
+            return rng.choice(self.strategies), 'explore'
+        best, best_sample = None, -1.0
+        for strategy in self.strategies:
+            s = stats.get(strategy, {})
+            wins = float(s.get('wins', 0))
+            losses = max(0.0, float(s.get('attempts', 0)) - wins)
+            sample = rng.betavariate(PRIOR_WINS + wins, PRIOR_LOSSES + losses)
+            if sample > best_sample:
+                best, best_sample = strategy, sample
+        return best, 'exploit'
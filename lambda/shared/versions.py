@@ -0,0 +1,58 @@
+"""
+Version content for the refinement loop, kept out of the workflow state
+Evaluate writes the text of each version it keeps in its best-N history under
+work/<jobId>/ in the output bucket; the state only carries the key. Learn and
+the sync API read the winner back. Analyze stores the resume and job
+description the same way, so the loop carries only textsKey.
+"""
+import json
+import os
+
+from .clients import get_client
+
+WORK_PREFIX = 'work/'
+
+
+def store_content(job_id, version):
+    """Write a version's text; returns its key (stable per job, iteration and approach)"""
+    key = f"{WORK_PREFIX}{job_id}/{version.get('iteration', 1)}-{version['approach']}.txt"
+    get_client('s3').put_object(
+        Bucket=os.environ['OUTPUT_BUCKET'],
+        Key=key,
+        Body=version.get('content', '').encode('utf-8'),
+        ContentType='text/plain'
+    )
+    return key
+
+
+def load_content(version):
+    """Text of a version, inline or by reference"""
+    if 'content' in version:
+        return version['content']
+    if not version.get('contentKey'):
+        return ''
+    return get_client('s3').get_object(
+        Bucket=os.environ['OUTPUT_BUCKET'], Key=version['contentKey']
+    )['Body'].read().decode('utf-8')
+
+
+def store_texts(job_id, resume, job_description):
+    """Write the job's input texts once; returns their key"""
+    key = f"{WORK_PREFIX}{job_id}/texts.json"
+    get_client('s3').put_object(
+        Bucket=os.environ['OUTPUT_BUCKET'],
+        Key=key,
+        Body=json.dumps({'resume': resume, 'jobDescription': job_description}).encode('utf-8'),
+        ContentType='application/json'
+    )
+    return key
+
+
+def with_texts(data):
+    """`data` with resume and jobDescription, read from its textsKey when they are not inline"""
+    if data.get('resume') or not data.get('textsKey'):
+        return data
+    texts = json.loads(get_client('s3').get_object(
+        Bucket=os.environ['OUTPUT_BUCKET'], Key=data['textsKey']
+    )['Body'].read())
+    return {**data, 'resume': texts['resume'], 'jobDescription': data.get('jobDescription') or texts['jobDescription']}
@@ -96,14 +96,29 @@ resource "aws_s3_bucket_lifecycle_configuration" "output" {
     id     = "delete-old-files"
     status = "Enabled"
     
+    # runs/ (the run log) is kept for analytics
     filter {
-      prefix = ""
+      prefix = "optimized/"
     }
     
     expiration {
       days = 30
     }
   }
+
+  # work/ holds version text for in-flight refinement loops
+  rule {
+    id     = "delete-work-files"
+    status = "Enabled"
+
+    filter {
+      prefix = "work/"
+    }
+
+    expiration {
+      days = 7
+    }
+  }
 }
 
 # S3 notification triggers Lambda (which then starts Step Functions)
@@ -138,10 +153,18 @@ resource "aws_dynamodb_table" "jobs" {
     type = "S"
   }
 
+  attribute {
+    name = "createdAt"
+    type = "S"
+  }
+
+  # GET /users/{userId}/jobs - newest first, summary attributes only
   global_secondary_index {
-    name            = "userId-index"
-    hash_key        = "userId"
-    projection_type = "ALL"
+    name               = "userId-index"
+    hash_key           = "userId"
+    range_key          = "createdAt"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["status", "atsScore", "targetRole", "type", "batchId", "mode", "version"]
   }
 
   ttl {
@@ -199,6 +222,12 @@ resource "aws_dynamodb_table" "analytics" {
     name = "metric"
     type = "S"
   }
+
+  # Only short-lived rows (held resumes) set it
+  ttl {
+    attribute_name = "expiresAt"
+    enabled        = true
+  }
 }
 
 # ============================================================================
@@ -216,6 +245,19 @@ resource "aws_sqs_queue" "processing" {
   })
 }
 
+# Pairing timers: a resume uploaded without a job description is re-delivered
+# to s3_trigger after pairing_window_seconds unless its JD arrives first
+resource "aws_sqs_queue" "pairing" {
+  name                       = "${local.name_prefix}-pairing"
+  visibility_timeout_seconds = 330 # above the s3_trigger timeout
+  message_retention_seconds  = 86400
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.dlq.arn
+    maxReceiveCount     = 3
+  })
+}
+
 resource "aws_sqs_queue" "dlq" {
   name                      = "${local.name_prefix}-dlq"
   message_retention_seconds = 1209600
@@ -280,12 +322,27 @@ resource "aws_iam_role_policy" "lambda" {
           "${aws_s3_bucket.output.arn}/*"
         ]
       },
+      {
+        # Run log compaction replaces a day's per-job objects with part files
+        Effect   = "Allow"
+        Action   = ["s3:DeleteObject"]
+        Resource = "${aws_s3_bucket.output.arn}/runs/*"
+      },
+      {
+        # Job description discovery and manifest result parts list folders
+        Effect   = "Allow"
+        Action   = ["s3:ListBucket"]
+        Resource = [aws_s3_bucket.input.arn, aws_s3_bucket.output.arn]
+      },
       {
         Effect = "Allow"
         Action = [
           "dynamodb:PutItem",
           "dynamodb:GetItem",
           "dynamodb:UpdateItem",
+          "dynamodb:DeleteItem",
+          "dynamodb:BatchGetItem",
+          "dynamodb:BatchWriteItem",
           "dynamodb:Query",
           "dynamodb:Scan"
         ]
@@ -307,6 +364,7 @@ resource "aws_iam_role_policy" "lambda" {
         ]
         Resource = [
           aws_sqs_queue.processing.arn,
+          aws_sqs_queue.pairing.arn,
           aws_sqs_queue.dlq.arn
         ]
       },
@@ -346,9 +404,13 @@ resource "aws_iam_role_policy" "lambda" {
       {
         Effect = "Allow"
         Action = [
-          "states:StartExecution"
+          "states:StartExecution",
+          "states:ListExecutions"
+        ]
+        Resource = [
+          aws_sfn_state_machine.agentic_workflow.arn,
+          aws_sfn_state_machine.batch_workflow.arn
         ]
-        Resource = aws_sfn_state_machine.agentic_workflow.arn
       }
     ]
   })
@@ -387,7 +449,8 @@ resource "aws_iam_role_policy" "step_functions" {
           aws_lambda_function.plan.arn,
           aws_lambda_function.generate.arn,
           aws_lambda_function.evaluate.arn,
-          aws_lambda_function.learn.arn
+          aws_lambda_function.learn.arn,
+          aws_lambda_function.batch.arn
         ]
       },
       {
@@ -396,6 +459,31 @@ resource "aws_iam_role_policy" "step_functions" {
           "events:PutEvents"
         ]
         Resource = aws_cloudwatch_event_bus.resume_events.arn
+      },
+      {
+        # Batch workflow runs one agentic workflow execution per resume (.sync:2)
+        Effect = "Allow"
+        Action = [
+          "states:StartExecution"
+        ]
+        Resource = aws_sfn_state_machine.agentic_workflow.arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "states:DescribeExecution",
+          "states:StopExecution"
+        ]
+        Resource = "arn:aws:states:${var.aws_region}:${data.aws_caller_identity.current.account_id}:execution:${local.name_prefix}-agentic-workflow:*"
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "events:PutTargets",
+          "events:PutRule",
+          "events:DescribeRule"
+        ]
+        Resource = "arn:aws:events:${var.aws_region}:${data.aws_caller_identity.current.account_id}:rule/StepFunctionsGetEventsForStepFunctionsExecutionRule"
       }
     ]
   })
@@ -421,11 +509,24 @@ resource "aws_lambda_function" "api" {
   timeout          = 30
   memory_size      = 256
 
+  # POST /optimize?mode=sync runs the workflow stages in-process, so the API
+  # also carries their settings
   environment {
     variables = {
-      STATE_MACHINE_ARN = aws_sfn_state_machine.agentic_workflow.arn
-      JOBS_TABLE        = aws_dynamodb_table.jobs.name
-      EVENT_BUS_NAME    = aws_cloudwatch_event_bus.resume_events.name
+      STATE_MACHINE_ARN       = aws_sfn_state_machine.agentic_workflow.arn
+      BATCH_STATE_MACHINE_ARN = aws_sfn_state_machine.batch_workflow.arn
+      JOBS_TABLE              = aws_dynamodb_table.jobs.name
+      ANALYTICS_TABLE         = aws_dynamodb_table.analytics.name
+      INPUT_BUCKET            = aws_s3_bucket.input.id
+      EVENT_BUS_NAME          = aws_cloudwatch_event_bus.resume_events.name
+      PROCESSING_QUEUE_URL    = aws_sqs_queue.processing.url
+      BEDROCK_MODEL_ID        = var.bedrock_model_id
+      STRATEGY_SELECTOR       = var.strategy_selector
+      GENERATION_MODE         = var.generation_mode
+      OUTPUT_BUCKET           = aws_s3_bucket.output.id
+      SNS_TOPIC_ARN           = aws_sns_topic.notifications.arn
+      RUN_LOG_URI             = "s3://${aws_s3_bucket.output.id}/runs"
+      SYNC_DEADLINE_SECONDS   = 20
     }
   }
 }
@@ -445,8 +546,10 @@ resource "aws_lambda_function" "analyze" {
     variables = {
       BEDROCK_MODEL_ID = var.bedrock_model_id
       JOBS_TABLE       = aws_dynamodb_table.jobs.name
+      ANALYTICS_TABLE  = aws_dynamodb_table.analytics.name
       EVENT_BUS_NAME   = aws_cloudwatch_event_bus.resume_events.name
       INPUT_BUCKET     = aws_s3_bucket.input.id
+      OUTPUT_BUCKET    = aws_s3_bucket.output.id
     }
   }
 }
@@ -464,9 +567,11 @@ resource "aws_lambda_function" "plan" {
 
   environment {
     variables = {
-      BEDROCK_MODEL_ID   = var.bedrock_model_id
-      AGENT_MEMORY_TABLE = aws_dynamodb_table.agent_memory.name
-      EVENT_BUS_NAME     = aws_cloudwatch_event_bus.resume_events.name
+      BEDROCK_MODEL_ID  = var.bedrock_model_id
+      ANALYTICS_TABLE   = aws_dynamodb_table.analytics.name
+      EVENT_BUS_NAME    = aws_cloudwatch_event_bus.resume_events.name
+      STRATEGY_SELECTOR = var.strategy_selector
+      GENERATION_MODE   = var.generation_mode
     }
   }
 }
@@ -485,7 +590,9 @@ resource "aws_lambda_function" "generate" {
   environment {
     variables = {
       BEDROCK_MODEL_ID = var.bedrock_model_id
+      ANALYTICS_TABLE  = aws_dynamodb_table.analytics.name
       EVENT_BUS_NAME   = aws_cloudwatch_event_bus.resume_events.name
+      OUTPUT_BUCKET    = aws_s3_bucket.output.id
     }
   }
 }
@@ -504,6 +611,7 @@ resource "aws_lambda_function" "evaluate" {
   environment {
     variables = {
       EVENT_BUS_NAME = aws_cloudwatch_event_bus.resume_events.name
+      OUTPUT_BUCKET  = aws_s3_bucket.output.id
     }
   }
 }
@@ -521,11 +629,12 @@ resource "aws_lambda_function" "learn" {
 
   environment {
     variables = {
-      AGENT_MEMORY_TABLE = aws_dynamodb_table.agent_memory.name
-      OUTPUT_BUCKET      = aws_s3_bucket.output.id
-      SNS_TOPIC_ARN      = aws_sns_topic.notifications.arn
-      JOBS_TABLE         = aws_dynamodb_table.jobs.name
-      EVENT_BUS_NAME     = aws_cloudwatch_event_bus.resume_events.name
+      ANALYTICS_TABLE = aws_dynamodb_table.analytics.name
+      OUTPUT_BUCKET   = aws_s3_bucket.output.id
+      SNS_TOPIC_ARN   = aws_sns_topic.notifications.arn
+      JOBS_TABLE      = aws_dynamodb_table.jobs.name
+      EVENT_BUS_NAME  = aws_cloudwatch_event_bus.resume_events.name
+      RUN_LOG_URI     = "s3://${aws_s3_bucket.output.id}/runs"
     }
   }
 }
@@ -538,16 +647,149 @@ resource "aws_lambda_function" "s3_trigger" {
   handler          = "s3_trigger.lambda_handler"
   source_code_hash = data.archive_file.lambda.output_base64sha256
   runtime          = "python3.11"
-  timeout          = 60
+  timeout          = 300 # a bulk manifest is streamed and staged in one invocation
   memory_size      = 512
 
   environment {
     variables = {
-      STATE_MACHINE_ARN = aws_sfn_state_machine.agentic_workflow.arn
+      STATE_MACHINE_ARN       = aws_sfn_state_machine.agentic_workflow.arn
+      BATCH_STATE_MACHINE_ARN = aws_sfn_state_machine.batch_workflow.arn
+      JOBS_TABLE              = aws_dynamodb_table.jobs.name
+      ANALYTICS_TABLE         = aws_dynamodb_table.analytics.name
+      OUTPUT_BUCKET           = aws_s3_bucket.output.id
+      PROCESSING_QUEUE_URL    = aws_sqs_queue.processing.url
+      EVENT_BUS_NAME          = aws_cloudwatch_event_bus.resume_events.name
+      MANIFEST_CONCURRENCY    = var.manifest_concurrency
+      PAIRING_QUEUE_URL       = aws_sqs_queue.pairing.url
+      PAIRING_WINDOW_SECONDS  = var.pairing_window_seconds
+    }
+  }
+}
+
+resource "aws_lambda_event_source_mapping" "pairing_queue" {
+  event_source_arn        = aws_sqs_queue.pairing.arn
+  function_name           = aws_lambda_function.s3_trigger.arn
+  batch_size              = 10
+  function_response_types = ["ReportBatchItemFailures"]
+}
+
+# Pairing sweep: starts held resumes whose timer message was lost
+resource "aws_cloudwatch_event_rule" "pairing_sweep" {
+  name                = "${local.name_prefix}-pairing-sweep"
+  schedule_expression = "rate(5 minutes)"
+}
+
+resource "aws_cloudwatch_event_target" "pairing_sweep" {
+  rule  = aws_cloudwatch_event_rule.pairing_sweep.name
+  arn   = aws_lambda_function.s3_trigger.arn
+  input = jsonencode({ sweepPairing = true })
+}
+
+resource "aws_lambda_permission" "pairing_sweep" {
+  statement_id  = "AllowEventBridgeInvokePairingSweep"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.s3_trigger.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.pairing_sweep.arn
+}
+
+# Queue Consumer Lambda - Admits queued jobs under the in-flight limit
+resource "aws_lambda_function" "queue_consumer" {
+  filename         = data.archive_file.lambda.output_path
+  function_name    = "${local.name_prefix}-queue-consumer"
+  role             = aws_iam_role.lambda.arn
+  handler          = "queue_consumer.lambda_handler"
+  source_code_hash = data.archive_file.lambda.output_base64sha256
+  runtime          = "python3.11"
+  timeout          = 60
+  memory_size      = 256
+
+  environment {
+    variables = {
+      STATE_MACHINE_ARN       = aws_sfn_state_machine.agentic_workflow.arn
+      ANALYTICS_TABLE         = aws_dynamodb_table.analytics.name
+      PROCESSING_QUEUE_URL    = aws_sqs_queue.processing.url
+      ADMISSION_MAX_IN_FLIGHT = var.admission_max_in_flight
+      TENANT_TIERS            = jsonencode(var.tenant_tiers)
+      TENANT_TIER_WEIGHTS     = var.tenant_tier_weights
+    }
+  }
+}
+
+# Two consumers at most, so admission passes don't overshoot the limit together
+resource "aws_lambda_event_source_mapping" "processing_queue" {
+  event_source_arn                   = aws_sqs_queue.processing.arn
+  function_name                      = aws_lambda_function.queue_consumer.arn
+  batch_size                         = 10
+  maximum_batching_window_in_seconds = 1
+  function_response_types            = ["ReportBatchItemFailures"]
+
+  scaling_config {
+    maximum_concurrency = 2
+  }
+}
+
+# Batch Lambda - Closes out a batch workflow
+resource "aws_lambda_function" "batch" {
+  filename         = data.archive_file.lambda.output_path
+  function_name    = "${local.name_prefix}-batch"
+  role             = aws_iam_role.lambda.arn
+  handler          = "batch_handler.lambda_handler"
+  source_code_hash = data.archive_file.lambda.output_base64sha256
+  runtime          = "python3.11"
+  timeout          = 60
+  memory_size      = 256
+
+  # Manifest batches launch their successor from here (the state machine ARN
+  # comes from the staged batch, which avoids a dependency cycle)
+  environment {
+    variables = {
+      JOBS_TABLE           = aws_dynamodb_table.jobs.name
+      EVENT_BUS_NAME       = aws_cloudwatch_event_bus.resume_events.name
+      OUTPUT_BUCKET        = aws_s3_bucket.output.id
+      ANALYTICS_TABLE      = aws_dynamodb_table.analytics.name
+      PROCESSING_QUEUE_URL = aws_sqs_queue.processing.url
+    }
+  }
+}
+
+# Run Log Compaction Lambda - merges yesterday's per-job run log objects
+resource "aws_lambda_function" "runlog_compact" {
+  filename         = data.archive_file.lambda.output_path
+  function_name    = "${local.name_prefix}-runlog-compact"
+  role             = aws_iam_role.lambda.arn
+  handler          = "runlog_compact.lambda_handler"
+  source_code_hash = data.archive_file.lambda.output_base64sha256
+  runtime          = "python3.11"
+  timeout          = 900
+  memory_size      = 1024
+
+  environment {
+    variables = {
+      RUN_LOG_URI = "s3://${aws_s3_bucket.output.id}/runs"
     }
   }
 }
 
+# Daily, after the UTC day has closed
+resource "aws_cloudwatch_event_rule" "runlog_compact" {
+  name                = "${local.name_prefix}-runlog-compact"
+  schedule_expression = "cron(15 0 * * ? *)"
+}
+
+resource "aws_cloudwatch_event_target" "runlog_compact" {
+  rule = aws_cloudwatch_event_rule.runlog_compact.name
+  arn  = aws_lambda_function.runlog_compact.arn
+}
+
+resource "aws_lambda_permission" "runlog_compact" {
+  statement_id  = "AllowEventBridgeInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.runlog_compact.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.runlog_compact.arn
+}
+
 # Lambda permission for S3 to invoke trigger
 resource "aws_lambda_permission" "s3_trigger" {
   statement_id  = "AllowS3Invoke"
@@ -564,150 +806,26 @@ resource "aws_sfn_state_machine" "agentic_workflow" {
   name     = "${local.name_prefix}-agentic-workflow"
   role_arn = aws_iam_role.step_functions.arn
 
-  definition = jsonencode({
-    Comment = "Agentic AI Resume Optimization Workflow"
-    StartAt = "Analyze"
-    States = {
-      # PERCEIVE: Analyze resume and job description
-      Analyze = {
-        Type       = "Task"
-        Resource   = aws_lambda_function.analyze.arn
-        ResultPath = "$.analysis"
-        Next       = "Plan"
-        Catch = [{
-          ErrorEquals = ["States.ALL"]
-          ResultPath  = "$.error"
-          Next        = "HandleError"
-        }]
-      }
-
-      # PLAN: Create optimization strategy
-      Plan = {
-        Type       = "Task"
-        Resource   = aws_lambda_function.plan.arn
-        ResultPath = "$.plan"
-        Next       = "InitializeIteration"
-      }
-
-      # Initialize iteration counter
-      InitializeIteration = {
-        Type       = "Pass"
-        Result     = 1
-        ResultPath = "$.iteration"
-        Next       = "GenerateVersions"
-      }
-
-      # ACT: Generate optimized versions (parallel)
-      GenerateVersions = {
-        Type       = "Parallel"
-        ResultPath = "$.versions"
-        Next       = "Evaluate"
-        Branches = [
-          {
-            StartAt = "GenerateKeywordVersion"
-            States = {
-              GenerateKeywordVersion = {
-                Type     = "Task"
-                Resource = aws_lambda_function.generate.arn
-                Parameters = {
-                  "approach" : "keywords"
-                  "input.$" : "$"
-                }
-                End = true
-              }
-            }
-          },
-          {
-            StartAt = "GenerateAchievementVersion"
-            States = {
-              GenerateAchievementVersion = {
-                Type     = "Task"
-                Resource = aws_lambda_function.generate.arn
-                Parameters = {
-                  "approach" : "achievements"
-                  "input.$" : "$"
-                }
-                End = true
-              }
-            }
-          },
-          {
-            StartAt = "GenerateStructureVersion"
-            States = {
-              GenerateStructureVersion = {
-                Type     = "Task"
-                Resource = aws_lambda_function.generate.arn
-                Parameters = {
-                  "approach" : "structure"
-                  "input.$" : "$"
-                }
-                End = true
-              }
-            }
-          }
-        ]
-      }
-
-      # EVALUATE: Score all versions
-      Evaluate = {
-        Type       = "Task"
-        Resource   = aws_lambda_function.evaluate.arn
-        ResultPath = "$.evaluation"
-        Next       = "CheckQuality"
-      }
-
-      # DECIDE: Is quality good enough?
-      CheckQuality = {
-        Type = "Choice"
-        Choices = [
-          {
-            Variable                 = "$.evaluation.bestScore"
-            NumericGreaterThanEquals = 85
-            Next                     = "Learn"
-          },
-          {
-            Variable                 = "$.iteration"
-            NumericGreaterThanEquals = 3
-            Next                     = "Learn"
-          }
-        ]
-        Default = "IncrementIteration"
-      }
-
-      # ITERATE: Improve and try again
-      IncrementIteration = {
-        Type = "Pass"
-        Parameters = {
-          "iteration.$"      = "States.MathAdd($.iteration, 1)"
-          "analysis.$"       = "$.analysis"
-          "plan.$"           = "$.plan"
-          "evaluation.$"     = "$.evaluation"
-          "user_id.$"        = "$.user_id"
-          "execution_id.$"   = "$.execution_id"
-          "resume.$"         = "$.analysis.resume"
-          "jobDescription.$" = "$.analysis.jobDescription"
-        }
-        Next = "GenerateVersions"
-      }
-
-      # LEARN: Store successful strategy
-      Learn = {
-        Type       = "Task"
-        Resource   = aws_lambda_function.learn.arn
-        ResultPath = "$.result"
-        Next       = "Success"
-      }
+  # Definition lives in state_machine.asl.json so tools/sfn_local.py can run the same file
+  definition = templatefile("${path.module}/state_machine.asl.json", {
+    analyze_arn  = aws_lambda_function.analyze.arn
+    plan_arn     = aws_lambda_function.plan.arn
+    generate_arn = aws_lambda_function.generate.arn
+    evaluate_arn = aws_lambda_function.evaluate.arn
+    learn_arn    = aws_lambda_function.learn.arn
+  })
+}
 
-      Success = {
-        Type = "Succeed"
-      }
+# Batch workflow - one job description analysis, one agentic workflow per resume
+resource "aws_sfn_state_machine" "batch_workflow" {
+  name     = "${local.name_prefix}-batch-workflow"
+  role_arn = aws_iam_role.step_functions.arn
 
-      HandleError = {
-        Type  = "Fail"
-        Error = "WorkflowFailed"
-        Cause = "Agentic workflow encountered an error"
-      }
-    }
+  definition = templatefile("${path.module}/batch_state_machine.asl.json", {
+    analyze_arn       = aws_lambda_function.analyze.arn
+    batch_arn         = aws_lambda_function.batch.arn
+    workflow_arn      = aws_sfn_state_machine.agentic_workflow.arn
+    batch_concurrency = var.batch_concurrency
   })
 }
 
@@ -740,6 +858,84 @@ resource "aws_api_gateway_integration" "optimize" {
   uri                     = aws_lambda_function.api.invoke_arn
 }
 
+resource "aws_api_gateway_resource" "optimize_batch" {
+  rest_api_id = aws_api_gateway_rest_api.main.id
+  parent_id   = aws_api_gateway_resource.optimize.id
+  path_part   = "batch"
+}
+
+resource "aws_api_gateway_method" "optimize_batch_post" {
+  rest_api_id   = aws_api_gateway_rest_api.main.id
+  resource_id   = aws_api_gateway_resource.optimize_batch.id
+  http_method   = "POST"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "optimize_batch" {
+  rest_api_id             = aws_api_gateway_rest_api.main.id
+  resource_id             = aws_api_gateway_resource.optimize_batch.id
+  http_method             = aws_api_gateway_method.optimize_batch_post.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.api.invoke_arn
+}
+
+resource "aws_api_gateway_resource" "optimize_batch_id" {
+  rest_api_id = aws_api_gateway_rest_api.main.id
+  parent_id   = aws_api_gateway_resource.optimize_batch.id
+  path_part   = "{batchId}"
+}
+
+resource "aws_api_gateway_method" "optimize_batch_get" {
+  rest_api_id   = aws_api_gateway_rest_api.main.id
+  resource_id   = aws_api_gateway_resource.optimize_batch_id.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "optimize_batch_status" {
+  rest_api_id             = aws_api_gateway_rest_api.main.id
+  resource_id             = aws_api_gateway_resource.optimize_batch_id.id
+  http_method             = aws_api_gateway_method.optimize_batch_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.api.invoke_arn
+}
+
+resource "aws_api_gateway_resource" "users" {
+  rest_api_id = aws_api_gateway_rest_api.main.id
+  parent_id   = aws_api_gateway_rest_api.main.root_resource_id
+  path_part   = "users"
+}
+
+resource "aws_api_gateway_resource" "user_id" {
+  rest_api_id = aws_api_gateway_rest_api.main.id
+  parent_id   = aws_api_gateway_resource.users.id
+  path_part   = "{userId}"
+}
+
+resource "aws_api_gateway_resource" "user_jobs" {
+  rest_api_id = aws_api_gateway_rest_api.main.id
+  parent_id   = aws_api_gateway_resource.user_id.id
+  path_part   = "jobs"
+}
+
+resource "aws_api_gateway_method" "user_jobs_get" {
+  rest_api_id   = aws_api_gateway_rest_api.main.id
+  resource_id   = aws_api_gateway_resource.user_jobs.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "user_jobs" {
+  rest_api_id             = aws_api_gateway_rest_api.main.id
+  resource_id             = aws_api_gateway_resource.user_jobs.id
+  http_method             = aws_api_gateway_method.user_jobs_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.api.invoke_arn
+}
+
 resource "aws_api_gateway_resource" "health" {
   rest_api_id = aws_api_gateway_rest_api.main.id
   parent_id   = aws_api_gateway_rest_api.main.root_resource_id
@@ -767,6 +963,9 @@ resource "aws_api_gateway_deployment" "main" {
 
   depends_on = [
     aws_api_gateway_integration.optimize,
+    aws_api_gateway_integration.optimize_batch,
+    aws_api_gateway_integration.optimize_batch_status,
+    aws_api_gateway_integration.user_jobs,
     aws_api_gateway_integration.health
   ]
 
@@ -812,6 +1011,11 @@ output "state_machine_arn" {
   value       = aws_sfn_state_machine.agentic_workflow.arn
 }
 
+output "batch_state_machine_arn" {
+  description = "Batch Step Functions state machine ARN"
+  value       = aws_sfn_state_machine.batch_workflow.arn
+}
+
 output "event_bus_name" {
   description = "EventBridge custom event bus name"
   value       = aws_cloudwatch_event_bus.resume_events.name
@@ -55,6 +55,24 @@ variable "bedrock_model_id" {
   default     = "anthropic.claude-3-sonnet-20240229-v1:0" # OPTIONAL: Change model
 }
 
+# CHANGE THIS: How the Plan stage picks a strategy
+# bandit = local Thompson sampling (no model call), llm = ask the model,
+# ab = split jobs between the two for comparison
+variable "strategy_selector" {
+  description = "Plan strategy selector: bandit, llm or ab"
+  type        = string
+  default     = "bandit" # OPTIONAL: Use "ab" to compare against the LLM
+}
+
+# CHANGE THIS: How the Generate stage runs the plan's approaches
+# speculative = all at once, stopping at the first version that meets the
+# success criteria; parallel = always finish and score all of them
+variable "generation_mode" {
+  description = "Generate stage mode: speculative or parallel"
+  type        = string
+  default     = "speculative" # OPTIONAL: Use "parallel" to compare every approach
+}
+
 # ----------------------------------------------------------------------------
 # OPTIONAL: Lambda Performance Settings
 # ----------------------------------------------------------------------------
@@ -76,6 +94,55 @@ variable "lambda_memory" {
   default     = 512 # OPTIONAL: Increase for better performance
 }
 
+# CHANGE THIS: How many resumes of one batch are optimized at the same time
+# Each one runs the full workflow, so this bounds Bedrock load per batch
+variable "batch_concurrency" {
+  description = "Max concurrent resume workflows per POST /optimize/batch"
+  type        = number
+  default     = 10 # OPTIONAL: Raise if your Bedrock quota allows
+}
+
+# CHANGE THIS: How long a resume uploaded without a job description waits for one
+# The JD upload (or the window closing) starts exactly one workflow; 0 starts
+# a generic optimization right away as before. SQS caps it at 900 seconds
+variable "pairing_window_seconds" {
+  description = "Seconds a resume waits for a job description in its folder"
+  type        = number
+  default     = 60 # OPTIONAL: Raise if users upload the JD much later
+}
+
+# CHANGE THIS: How many batches of one bulk manifest run at the same time
+# A manifest under manifests/ in the input bucket is cut into batches; each runs
+# with batch_concurrency resumes in flight
+variable "manifest_concurrency" {
+  description = "Max concurrent batch workflows per bulk manifest"
+  type        = number
+  default     = 4 # OPTIONAL: Raise for faster bulk jobs
+}
+
+# CHANGE THIS: Upper bound on agentic workflows running at once
+# Queued jobs are admitted below this; the live limit backs off on Bedrock throttling
+variable "admission_max_in_flight" {
+  description = "Max concurrent workflow executions admitted from the processing queue"
+  type        = number
+  default     = 50 # OPTIONAL: Match your Bedrock quota
+}
+
+# CHANGE THIS: Scheduling tier per user (userId -> tier); everyone else is "standard"
+# Queued jobs are shared between users by tier weight, and each user's start
+# rate is capped by a token bucket scaled by the same weight
+variable "tenant_tiers" {
+  description = "Map of userId to admission tier"
+  type        = map(string)
+  default     = {} # OPTIONAL: e.g. { "bulk-importer" = "bulk" }
+}
+
+variable "tenant_tier_weights" {
+  description = "Admission weight per tier, as tier=weight pairs"
+  type        = string
+  default     = "interactive=4,standard=2,bulk=1"
+}
+
 # ----------------------------------------------------------------------------
 # OPTIONAL: Cost and Resource Tags
 # ----------------------------------------------------------------------------
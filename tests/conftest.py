@@ -0,0 +1,30 @@
+"""
+Behavior tests against the local AWS stand-ins (tools/local_aws.py)
+Handlers read their environment at import time, so LOCAL_ENV is applied
+before anything under lambda/ is imported.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (os.path.join(ROOT, 'lambda'), ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from tools.local_aws import LOCAL_ENV, LocalAWS  # noqa: E402
+
+os.environ.update(LOCAL_ENV)
+os.environ.update(METRICS_ENABLED='false', LOG_LEVEL='ERROR')
+
+
+@pytest.fixture
+def aws():
+    """Fresh stand-ins per test; warm-container caches of imported handlers are dropped"""
+    stand_ins = LocalAWS().install()
+    for module, caches in (('agent_plan', ('strategy_cache',)), ('s3_trigger', ('listing_cache', 'jd_text_cache'))):
+        if module in sys.modules:
+            for cache in caches:
+                getattr(sys.modules[module], cache).invalidate()
+    return stand_ins
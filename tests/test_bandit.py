@@ -0,0 +1,49 @@
+from shared.strategy import STRATEGIES, ThompsonSelector, gap_bucket, outcome_update, stats_key
+
+JOB_IDS = [f"job-{i}" for i in range(200)]
+STATS = {'keyword_optimization': {'attempts': 20, 'wins': 12}, 'achievement_focus': {'attempts': 20, 'wins': 10}}
+
+
+def choices(selector, stats=STATS):
+    return [selector.choose(stats, job_id) for job_id in JOB_IDS]
+
+
+def test_same_seed_and_job_id_reproduce_the_choice():
+    assert choices(ThompsonSelector(seed='42')) == choices(ThompsonSelector(seed='42'))
+
+
+def test_different_seeds_draw_differently():
+    assert choices(ThompsonSelector(seed='1')) != choices(ThompsonSelector(seed='2'))
+
+
+def test_choice_does_not_depend_on_call_order():
+    selector = ThompsonSelector(seed='7')
+    forward = {job_id: selector.choose(STATS, job_id) for job_id in JOB_IDS}
+    backward = {job_id: selector.choose(STATS, job_id) for job_id in reversed(JOB_IDS)}
+    assert forward == backward
+
+
+def test_exploit_favors_the_proven_strategy():
+    stats = {strategy: {'attempts': 200, 'wins': 20} for strategy in STRATEGIES}
+    stats['keyword_optimization'] = {'attempts': 200, 'wins': 190}
+    picks = [strategy for strategy, _ in choices(ThompsonSelector(exploration_rate=0.0), stats)]
+    assert picks.count('keyword_optimization') > 0.9 * len(picks)
+
+
+def test_exploration_rate_one_always_explores():
+    picks = choices(ThompsonSelector(exploration_rate=1.0))
+    assert {mode for _, mode in picks} == {'explore'}
+    assert {strategy for strategy, _ in picks} <= set(STRATEGIES)
+
+
+def test_plan_is_reproducible_for_a_job(aws):
+    import agent_plan
+    table = aws.dynamodb.Table('analytics')
+    for score in (90, 70, 88):
+        table.update_item(Key=stats_key('technical'), **outcome_update(gap_bucket(2), 'skills_emphasis', 'keywords', score))
+    event = {'jobId': 'plan-1', 'analysis': {'jobType': 'technical', 'skillsGap': ['a', 'b']}}
+    first = agent_plan.lambda_handler(event, None)
+    agent_plan.strategy_cache.invalidate()
+    second = agent_plan.lambda_handler(event, None)
+    assert (first['strategy'], first['selector']) == (second['strategy'], second['selector'])
+    assert first['selector'].startswith('bandit-')
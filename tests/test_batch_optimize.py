@@ -0,0 +1,51 @@
+import json
+import os
+
+from tools import batch_optimize
+from tools.fixtures import SAMPLE_JOB_DESCRIPTION, SAMPLE_RESUME
+
+
+def write_manifest(tmp_path, names):
+    for name in names:
+        (tmp_path / name).write_text(f"{SAMPLE_RESUME}\n{name}\n")
+    manifest = tmp_path / 'batch.jsonl'
+    manifest.write_text(''.join(json.dumps({'resume': name}) + '\n' for name in names))
+    return str(manifest)
+
+
+def read_results(output):
+    with open(os.path.join(output, batch_optimize.RESULTS_FILE)) as f:
+        return [json.loads(line) for line in f if not line.startswith('{"jobId": "torn')]
+
+
+def test_resume_skips_succeeded_and_reruns_failed(tmp_path):
+    sources = batch_optimize.list_sources(manifest=write_manifest(tmp_path, ['a.txt', 'b.txt', 'c.txt']))
+    output = str(tmp_path / 'out')
+    os.makedirs(output)
+    done, failed, new = (batch_optimize.job_id_for(s) for s in sources)
+    with open(os.path.join(output, batch_optimize.RESULTS_FILE), 'w') as f:
+        f.write(json.dumps({'jobId': done, 'status': 'SUCCEEDED'}) + '\n')
+        f.write(json.dumps({'jobId': failed, 'status': 'FAILED', 'error': 'boom'}) + '\n')
+        f.write('{"jobId": "torn')  # interrupted mid-write
+
+    counts = batch_optimize.run_batch(sources, SAMPLE_JOB_DESCRIPTION, output, workers=1,
+                                      bedrock_concurrency=2, stub_model=True)
+
+    assert counts == {'SUCCEEDED': 2, 'FAILED': 0}
+    rerun = read_results(output)[2:]
+    assert sorted(r['jobId'] for r in rerun) == sorted([failed, new])
+    assert batch_optimize.load_checkpoint(output) == {done, failed, new}
+    assert os.path.exists(os.path.join(output, f"{new}_optimized.txt"))
+    assert not os.path.exists(os.path.join(output, f"{done}_optimized.txt"))
+
+
+def test_second_run_has_nothing_to_do(tmp_path):
+    sources = batch_optimize.list_sources(manifest=write_manifest(tmp_path, ['a.txt']))
+    output = str(tmp_path / 'out')
+    first = batch_optimize.run_batch(sources, SAMPLE_JOB_DESCRIPTION, output, workers=1,
+                                     bedrock_concurrency=1, stub_model=True)
+    second = batch_optimize.run_batch(sources, SAMPLE_JOB_DESCRIPTION, output, workers=1,
+                                      bedrock_concurrency=1, stub_model=True)
+    assert first == {'SUCCEEDED': 1, 'FAILED': 0}
+    assert second == {'SUCCEEDED': 0, 'FAILED': 0}
+    assert len(read_results(output)) == 1
@@ -0,0 +1,109 @@
+import threading
+
+from shared.cache import ReadThroughCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Loader:
+    """Counts loads; returns the next queued value or raises a queued exception"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self, key):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def settle(cache):
+    """Wait for background refreshes to finish"""
+    for thread in threading.enumerate():
+        if thread.name == f"{cache.name}-refresh":
+            thread.join(5)
+
+
+def test_fresh_entry_is_served_without_reloading():
+    clock, loader = Clock(), Loader('v1')
+    cache = ReadThroughCache(loader, ttl=10, stale_ttl=20, clock=clock)
+    assert cache.get('k') == 'v1'
+    clock.now = 9
+    assert cache.get('k') == 'v1'
+    assert loader.calls == 1
+
+
+def test_stale_entry_is_served_while_refreshed_in_background():
+    clock, loader = Clock(), Loader('v1', 'v2')
+    cache = ReadThroughCache(loader, ttl=10, stale_ttl=20, clock=clock)
+    cache.get('k')
+    clock.now = 15
+    assert cache.get('k') == 'v1'  # stale value right away
+    settle(cache)
+    assert loader.calls == 2
+    assert cache.get('k') == 'v2'
+
+
+def test_expired_entry_is_reloaded_inline():
+    clock, loader = Clock(), Loader('v1', 'v2')
+    cache = ReadThroughCache(loader, ttl=10, stale_ttl=20, clock=clock)
+    cache.get('k')
+    clock.now = 31
+    assert cache.get('k') == 'v2'
+    assert loader.calls == 2
+
+
+def test_failed_refresh_keeps_last_good_value_and_retries():
+    clock, loader = Clock(), Loader('v1', RuntimeError('throttled'), 'v3')
+    cache = ReadThroughCache(loader, ttl=10, stale_ttl=20, clock=clock)
+    cache.get('k')
+    clock.now = 31
+    assert cache.get('k') == 'v1'  # inline reload failed
+    assert loader.calls == 2
+    # The entry is now due for a background retry rather than another inline load
+    assert cache.get('k') == 'v1'
+    settle(cache)
+    assert loader.calls == 3
+    assert cache.get('k') == 'v3'
+
+
+def test_failed_first_load_returns_default():
+    cache = ReadThroughCache(Loader(RuntimeError('down')), ttl=10, stale_ttl=20, clock=Clock())
+    assert cache.get('k', default='fallback') == 'fallback'
+
+
+def test_one_background_refresh_per_key():
+    clock, gate = Clock(), threading.Event()
+    calls = []
+
+    def loader(key):
+        calls.append(key)
+        if len(calls) > 1:
+            gate.wait(5)
+        return len(calls)
+
+    cache = ReadThroughCache(loader, ttl=10, stale_ttl=20, clock=clock)
+    cache.get('k')
+    clock.now = 15
+    for _ in range(5):
+        assert cache.get('k') == 1
+    gate.set()
+    settle(cache)
+    assert len(calls) == 2
+
+
+def test_invalidate_forces_a_reload():
+    loader = Loader('v1', 'v2')
+    cache = ReadThroughCache(loader, ttl=10, stale_ttl=20, clock=Clock())
+    cache.get('k')
+    cache.invalidate('k')
+    assert cache.get('k') == 'v2'
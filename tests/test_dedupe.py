@@ -0,0 +1,102 @@
+import json
+import threading
+
+import pytest
+
+from tools.fixtures import SAMPLE_JOB_DESCRIPTION, SAMPLE_RESUME
+
+
+@pytest.fixture
+def api(aws):
+    import api_handler
+    return api_handler
+
+
+def optimize(api, body=None, key=None):
+    event = {'httpMethod': 'POST', 'path': '/optimize', 'body': json.dumps(body or {
+        'userId': 'u1', 'resume': SAMPLE_RESUME, 'jobDescription': SAMPLE_JOB_DESCRIPTION, 'targetRole': 'SRE'
+    })}
+    if key:
+        event['headers'] = {'idempotency-key': key}
+    response = api.lambda_handler(event, None)
+    return response['statusCode'], json.loads(response['body'])
+
+
+def test_repeated_submission_returns_the_first_job(aws, api):
+    _, first = optimize(api)
+    status, second = optimize(api)
+    assert status == 200
+    assert second['jobId'] == first['jobId'] and second['duplicate'] is True
+    assert len(aws.stepfunctions.executions) == 1
+
+
+def test_concurrent_identical_submissions_start_one_workflow(aws, api):
+    barrier, results = threading.Barrier(8), []
+
+    def submit():
+        barrier.wait()
+        results.append(optimize(api))
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({body['jobId'] for _, body in results}) == 1
+    assert sum(1 for _, body in results if not body.get('duplicate')) == 1
+    assert len(aws.stepfunctions.executions) == 1
+
+
+def test_idempotency_key_reused_with_a_different_body_is_rejected(aws, api):
+    optimize(api, key='k-1')
+    status, body = optimize(api, {'userId': 'u1', 'resume': 'another resume', 'jobDescription': 'jd'}, key='k-1')
+    assert status == 422
+    assert 'Idempotency-Key' in body['error']
+    assert len(aws.stepfunctions.executions) == 1
+
+
+def test_idempotency_key_is_scoped_per_user(aws, api):
+    optimize(api, key='k-1')
+    status, body = optimize(api, {'userId': 'u2', 'resume': SAMPLE_RESUME, 'jobDescription': SAMPLE_JOB_DESCRIPTION,
+                                  'targetRole': 'SRE'}, key='k-1')
+    assert status == 200 and not body.get('duplicate')
+    assert len(aws.stepfunctions.executions) == 2
+
+
+def test_duplicate_of_a_completed_job_returns_its_result(aws, api):
+    _, first = optimize(api)
+    aws.dynamodb.Table('jobs').update_item(
+        Key={'jobId': first['jobId']}, UpdateExpression='SET #s = :s, #r = :r',
+        ExpressionAttributeNames={'#s': 'status', '#r': 'result'},
+        ExpressionAttributeValues={':s': 'COMPLETED', ':r': 'optimized/x.txt'})
+    _, second = optimize(api)
+    assert (second['status'], second['result']) == ('COMPLETED', 'optimized/x.txt')
+
+
+def test_resubmitting_a_failed_job_runs_it_again(aws, api):
+    _, first = optimize(api)
+    aws.dynamodb.Table('jobs').update_item(
+        Key={'jobId': first['jobId']}, UpdateExpression='SET #s = :s',
+        ExpressionAttributeNames={'#s': 'status'}, ExpressionAttributeValues={':s': 'FAILED'})
+    _, second = optimize(api)
+    assert second['jobId'] != first['jobId'] and not second.get('duplicate')
+    assert len(aws.stepfunctions.executions) == 2
+
+
+def test_failed_start_marks_the_job_failed_and_frees_the_key(aws, api):
+    start_execution = aws.stepfunctions.start_execution
+
+    def unavailable(**kwargs):
+        raise RuntimeError('service unavailable')
+
+    aws.stepfunctions.start_execution = unavailable
+    status, _ = optimize(api)
+    assert status == 500
+    jobs = aws.dynamodb.Table('jobs').items
+    assert [item['status'] for key, item in jobs.items() if '|' not in key[0]] == ['FAILED']
+    assert not any(key[0].startswith('dedupe|') for key in jobs)
+
+    aws.stepfunctions.start_execution = start_execution
+    status, body = optimize(api)
+    assert status == 200 and not body.get('duplicate')
+    assert len(aws.stepfunctions.executions) == 1
@@ -0,0 +1,73 @@
+import pytest
+
+from shared.strategy import parse_stats, stats_key
+from tools.fixtures import sample_event
+from tools.local_aws import lambda_context
+
+
+@pytest.fixture
+def learn(aws):
+    import agent_learn
+    return agent_learn
+
+
+def attempts(aws):
+    row = aws.dynamodb.Table('analytics').items.get(tuple(stats_key('technical').values()))
+    return parse_stats(row).get('low', {}).get('balanced_approach', {}).get('attempts', 0)
+
+
+def markers(aws, job_id):
+    return sorted(k[1] for k in aws.dynamodb.Table('analytics').items if k[0] == f"learn|{job_id}")
+
+
+def test_retry_after_success_skips_every_effect(aws, learn):
+    event = sample_event('agent_learn', aws, {}, job_id='L1')
+    learn.lambda_handler(event, lambda_context())
+    learn.lambda_handler(event, lambda_context())
+    assert len(aws.sns.messages) == 1
+    assert len(aws.events.entries) == 1
+    assert attempts(aws) == 1
+    assert markers(aws, 'L1') == ['1|event', '1|notification', '1|outcome', '1|output', '1|runlog', '1|status']
+    # Markers live in the analytics table, never next to job rows
+    assert not any('|' in key[0] for key in aws.dynamodb.Table('jobs').items)
+
+
+def test_failed_effect_is_released_and_only_it_reruns(aws, learn):
+    event = sample_event('agent_learn', aws, {}, job_id='L2')
+    table = aws.dynamodb.Table('analytics')
+    update_item = table.update_item
+
+    def throttled(**kwargs):
+        raise RuntimeError('throttled')
+
+    table.update_item = throttled
+    with pytest.raises(RuntimeError, match='outcome'):
+        learn.lambda_handler(event, lambda_context())
+    assert '1|outcome' not in markers(aws, 'L2')
+    assert attempts(aws) == 0
+
+    table.update_item = update_item
+    learn.lambda_handler(event, lambda_context())
+    assert attempts(aws) == 1
+    assert '1|outcome' in markers(aws, 'L2')
+    assert len(aws.sns.messages) == 1  # ran on the first attempt, skipped on the retry
+
+
+def test_rejected_event_is_sent_on_retry(aws, learn):
+    event = sample_event('agent_learn', aws, {}, job_id='L3')
+    aws.events.failure_rate = 1.0
+    with pytest.raises(RuntimeError, match='event'):
+        learn.lambda_handler(event, lambda_context())
+    assert '1|event' not in markers(aws, 'L3')
+
+    aws.events.failure_rate = 0.0
+    learn.lambda_handler(event, lambda_context())
+    assert [e['DetailType'] for e in aws.events.entries] == ['OptimizationComplete']
+
+
+def test_each_iteration_runs_its_own_effects(aws, learn):
+    event = sample_event('agent_learn', aws, {}, job_id='L4')
+    learn.lambda_handler(event, lambda_context())
+    learn.lambda_handler({**event, 'iteration': 2}, lambda_context())
+    assert len(aws.sns.messages) == 2
+    assert attempts(aws) == 2
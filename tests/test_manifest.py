@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from tools.local_aws import lambda_context
+
+ROWS = [
+    {'resumeKey': 'candidates/a.pdf', 'jd': 'jds/sre.txt'},
+    {'resumeKey': 'candidates/b.pdf', 'jd': 'jds/sre.txt'},
+    {'jd': 'jds/sre.txt'},  # no resume - rejected
+    {'resumeKey': 'candidates/c.pdf', 'jd': 'jds/sre.txt'},
+    {'resumeKey': 'candidates/d.pdf', 'jd': 'jds/sre.txt', 'user': 'u9'},
+    {'resumeKey': 'candidates/e.pdf', 'jd': 'jds/sre.txt'},
+]
+
+
+@pytest.fixture
+def bulk(aws, monkeypatch):
+    import batch_handler
+    import s3_trigger
+    from shared import manifest
+    monkeypatch.setattr(manifest, 'BATCH_SIZE', 2)
+    monkeypatch.setattr(manifest, 'CONCURRENCY', 2)
+    aws.s3.put('local-input', 'jds/sre.txt', 'Site reliability engineer, AWS and Python')
+    started = []
+    aws.stepfunctions.on_start = lambda arn, execution_input: started.append(execution_input)
+    return s3_trigger, batch_handler, manifest, started
+
+
+def drop(aws, s3_trigger, key, lines):
+    aws.s3.put('local-input', key, ''.join(lines))
+    s3_trigger.lambda_handler({'Records': [{'s3': {'bucket': {'name': 'local-input'}, 'object': {'key': key}}}]},
+                              lambda_context())
+
+
+def run_batches(aws, batch_handler, started, fail=()):
+    """Play the batch workflow for every started batch: Learn completes items, CompleteBatch closes the batch"""
+    done, most_running = 0, 0
+    while done < len(started):
+        most_running = max(most_running, len(started) - done)
+        batch = started[done]
+        results = []
+        for item in batch['items']:
+            if item['resumeKey'] in fail:
+                results.append({'jobId': item['jobId'], 'status': 'FAILED', 'error': 'States.TaskFailed'})
+                continue
+            aws.dynamodb.Table('jobs').update_item(
+                Key={'jobId': item['jobId']}, UpdateExpression='SET #s = :s, atsScore = :a, #r = :r',
+                ExpressionAttributeNames={'#s': 'status', '#r': 'result'},
+                ExpressionAttributeValues={':s': 'COMPLETED', ':a': 90, ':r': f"optimized/{item['jobId']}.txt"})
+            results.append({'jobId': item['jobId'], 'status': 'SUCCEEDED', 'score': 90})
+        batch_handler.lambda_handler({'batchId': batch['batchId'], 'results': results}, lambda_context())
+        done += 1
+    return most_running
+
+
+def manifest_row(aws):
+    return next(i for i in aws.dynamodb.Table('jobs').items.values() if i.get('type') == 'MANIFEST'
+                and i['status'] == 'COMPLETED')
+
+
+def results(aws, row):
+    key = row['resultsKey'].split('/', 3)[3]
+    return [json.loads(line) for line in aws.s3.objects[('local-output', key)].decode('utf-8').splitlines()]
+
+
+def test_manifest_runs_in_bounded_batches_and_writes_results(aws, bulk):
+    s3_trigger, batch_handler, _, started = bulk
+    drop(aws, s3_trigger, 'manifests/u1/run.jsonl', [json.dumps(r) + '\n' for r in ROWS] + ['not json\n'])
+    assert len(started) == 2  # MANIFEST_CONCURRENCY batches launched up front
+    most_running = run_batches(aws, batch_handler, started, fail={'candidates/c.pdf'})
+
+    assert most_running <= 2
+    # u1's four resumes in batches of two, u9's resume in its own batch
+    assert sorted(len(b['items']) for b in started) == [1, 2, 2]
+    row = manifest_row(aws)
+    lines = sorted(results(aws, row), key=lambda r: r['line'])
+    assert [(r['line'], r['status']) for r in lines] == [
+        (1, 'COMPLETED'), (2, 'COMPLETED'), (3, 'REJECTED'), (4, 'FAILED'), (5, 'COMPLETED'), (6, 'COMPLETED'),
+        (7, 'REJECTED')]
+    assert row['summary'] == {'COMPLETED': 4, 'FAILED': 1, 'REJECTED': 2}
+
+
+def test_failed_lines_of_the_results_are_the_retry(aws, bulk):
+    s3_trigger, batch_handler, _, started = bulk
+    drop(aws, s3_trigger, 'manifests/u1/run.jsonl', [json.dumps(r) + '\n' for r in ROWS])
+    run_batches(aws, batch_handler, started, fail={'candidates/c.pdf', 'candidates/e.pdf'})
+    failed = [r for r in results(aws, manifest_row(aws)) if r['status'] == 'FAILED']
+
+    started.clear()
+    drop(aws, s3_trigger, 'manifests/u1/retry.jsonl', [json.dumps(r) + '\n' for r in failed])
+    run_batches(aws, batch_handler, started)
+    assert sorted(item['resumeKey'] for b in started for item in b['items']) == ['candidates/c.pdf', 'candidates/e.pdf']
+    retried = [r for r in aws.dynamodb.Table('jobs').items.values()
+               if r.get('type') == 'MANIFEST' and r['sourceManifest'].endswith('retry.jsonl')][0]
+    assert retried['summary'] == {'COMPLETED': 2}
+
+
+def test_redelivered_notification_does_not_restart_the_manifest(aws, bulk):
+    s3_trigger, _, _, started = bulk
+    lines = [json.dumps(r) + '\n' for r in ROWS[:2]]
+    drop(aws, s3_trigger, 'manifests/u1/run.jsonl', lines)
+    drop(aws, s3_trigger, 'manifests/u1/run.jsonl', lines)
+    assert len(started) == 1
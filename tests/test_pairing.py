@@ -0,0 +1,83 @@
+import json
+import time
+
+import pytest
+
+from tools.local_aws import lambda_context
+
+QUEUE = 'https://sqs.us-east-1.amazonaws.com/000000000000/pairing'
+
+
+@pytest.fixture
+def trigger(aws, monkeypatch):
+    import s3_trigger
+    monkeypatch.setattr(s3_trigger, 'PAIRING_QUEUE_URL', QUEUE)
+    monkeypatch.setattr(s3_trigger, 'PAIRING_WINDOW', 60)
+    return s3_trigger
+
+
+def upload(aws, trigger, key, body):
+    aws.s3.put('local-input', key, body)
+    notify(trigger, {'Records': [{'s3': {'bucket': {'name': 'local-input'}, 'object': {'key': key}}}]})
+
+
+def notify(trigger, event):
+    result = trigger.lambda_handler(event, lambda_context())
+    assert result['batchItemFailures'] == []
+
+
+def timers(aws):
+    """The delayed pairing messages, delivered now as the SQS event the timer would be"""
+    messages = aws.sqs.queues.pop(QUEUE, [])
+    return {'Records': [{'messageId': m['MessageId'], 'body': m['Body']} for m in messages]}
+
+
+def started(aws):
+    return [json.loads(e['input']) for e in aws.stepfunctions.executions.values()]
+
+
+def test_resume_is_held_until_its_job_description_arrives(aws, trigger):
+    upload(aws, trigger, 'u1/resume.pdf', 'Jane Doe\nPython engineer')
+    assert started(aws) == []
+    assert len(aws.sqs.queues[QUEUE]) == 1
+
+    upload(aws, trigger, 'u1/job-description.txt', 'Senior Python engineer on AWS')
+    [job] = started(aws)
+    assert job['jobDescription'] == 'Senior Python engineer on AWS'
+    assert job['sourceFile'] == 'u1/resume.pdf'
+
+    # The timer firing afterwards, or the JD uploaded again, starts nothing more
+    notify(trigger, timers(aws))
+    upload(aws, trigger, 'u1/job-description.txt', 'Senior Python engineer on AWS')
+    assert len(started(aws)) == 1
+
+
+def test_pairing_timer_starts_a_generic_optimization(aws, trigger):
+    upload(aws, trigger, 'u2/resume.pdf', 'John Roe\nData analyst')
+    timer = timers(aws)
+    notify(trigger, timer)
+    [job] = started(aws)
+    assert job['jobDescription'] == trigger.GENERIC_JOB_DESCRIPTION
+
+    notify(trigger, timer)  # redelivered
+    assert len(started(aws)) == 1
+
+
+def test_sweep_starts_resumes_whose_timer_was_lost(aws, trigger, monkeypatch):
+    upload(aws, trigger, 'u3/resume.pdf', 'Ann Poe\nDesigner')
+    timers(aws)  # lost
+
+    assert trigger.lambda_handler({'sweepPairing': True}, lambda_context()) == {'checked': 0, 'started': 0}
+    later = time.time() + 60 + trigger.PAIRING_SWEEP_GRACE
+    monkeypatch.setattr(time, 'time', lambda: later)
+    assert trigger.lambda_handler({'sweepPairing': True}, lambda_context()) == {'checked': 1, 'started': 1}
+    [job] = started(aws)
+    assert job['sourceFile'] == 'u3/resume.pdf'
+    assert trigger.lambda_handler({'sweepPairing': True}, lambda_context()) == {'checked': 0, 'started': 0}
+
+
+def test_text_files_are_not_resumes(aws, trigger):
+    upload(aws, trigger, 'u4/notes.txt', 'Remember to ask about the team')
+    upload(aws, trigger, 'u4/cover-job-description-draft.txt', 'Draft')
+    assert started(aws) == []
+    assert QUEUE not in aws.sqs.queues
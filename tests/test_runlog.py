@@ -0,0 +1,84 @@
+import gzip
+import json
+
+from shared.runlog import RunLog, backend_for, build_record
+from tools.local_aws import lambda_context
+
+DAY = '2024-01-01'
+FINISHED = 1704067200000  # 2024-01-01T00:00:00Z
+
+
+def record(job_id, score=80):
+    return {'jobId': job_id, 'finishedAt': FINISHED, 'bestScore': score}
+
+
+def read_day(backend, day=DAY):
+    keys = sorted(backend.keys(f"date={day}/"))
+    rows = [json.loads(line) for key in keys
+            for line in gzip.decompress(backend.read(key)).decode('utf-8').splitlines()]
+    return keys, rows
+
+
+def test_compaction_merges_a_day_into_one_part(tmp_path):
+    run_log = RunLog(backend_for(str(tmp_path)))
+    for i in range(5):
+        run_log.append(record(f"j{i}"))
+    summary = run_log.compact(DAY)
+    keys, rows = read_day(run_log.backend)
+    assert summary == {'day': DAY, 'inputs': 5, 'records': 5, 'parts': 1}
+    assert len(keys) == 1 and keys[0].split('/')[1].startswith('part-')
+    assert sorted(r['jobId'] for r in rows) == [f"j{i}" for i in range(5)]
+
+
+def test_recompaction_folds_in_late_records_once(tmp_path):
+    run_log = RunLog(backend_for(str(tmp_path)))
+    for i in range(3):
+        run_log.append(record(f"j{i}"))
+    run_log.compact(DAY)
+    run_log.append(record('late'))
+    run_log.append(record('j0', score=99))  # a retried job re-logged after compaction
+    summary = run_log.compact(DAY)
+    keys, rows = read_day(run_log.backend)
+    assert summary['records'] == 4
+    assert len(keys) == 1
+    assert sorted(r['jobId'] for r in rows) == ['j0', 'j1', 'j2', 'late']
+    assert [r['bestScore'] for r in rows if r['jobId'] == 'j0'] == [80]  # first record per job wins
+
+
+def test_parts_are_capped_at_max_records(tmp_path):
+    run_log = RunLog(backend_for(str(tmp_path)))
+    for i in range(7):
+        run_log.append(record(f"j{i}"))
+    assert run_log.compact(DAY, max_records=3)['parts'] == 3
+    keys, rows = read_day(run_log.backend)
+    assert len(keys) == 3 and len(rows) == 7
+
+
+def test_single_object_day_is_left_alone(tmp_path):
+    run_log = RunLog(backend_for(str(tmp_path)))
+    run_log.append(record('only'))
+    assert run_log.compact(DAY)['parts'] == 0
+    assert read_day(run_log.backend)[0] == [f"date={DAY}/only.jsonl.gz"]
+
+
+def test_handler_compacts_the_s3_run_log(aws):
+    import runlog_compact
+    for i in range(4):
+        runlog_compact.run_log.append(record(f"j{i}"))
+    summary = runlog_compact.lambda_handler({'day': DAY}, lambda_context())
+    assert summary['records'] == 4
+    assert [k for _, k in aws.s3.objects if k.startswith(f"runs/date={DAY}/")][0].startswith(f"runs/date={DAY}/part-")
+    assert len(aws.s3.objects) == 1
+
+
+def test_record_keeps_every_iteration():
+    evaluation = {'bestScore': 91, 'rounds': [
+        {'iteration': 1, 'versions': [{'approach': 'keywords', 'score': {'overall': 70}, 'durationMs': 30},
+                                      {'approach': 'structure', 'score': {'overall': 72}, 'durationMs': 50}]},
+        {'iteration': 2, 'versions': [{'approach': 'keywords', 'score': {'overall': 91}, 'durationMs': 40}]},
+    ]}
+    built = build_record('j1', {'jobType': 'technical', 'gapCount': 4}, {'strategy': 's'}, evaluation, 2,
+                         request={'userId': 'u1', 'targetRole': 'SRE'})
+    assert [(v['iteration'], v['approach']) for v in built['versions']] == [(1, 'keywords'), (1, 'structure'), (2, 'keywords')]
+    assert built['timings']['generate'] == 90  # slowest branch per round, summed
+    assert (built['skillsGap'], built['userId'], built['targetRole']) == (4, 'u1', 'SRE')
@@ -0,0 +1,84 @@
+import json
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def api(aws, monkeypatch):
+    import api_handler
+    monkeypatch.setattr(api_handler, 'STATUS_POLL_SECONDS', 0.02)
+    aws.dynamodb.Table('jobs').put_item(Item={'jobId': 'j1', 'userId': 'u1', 'status': 'PROCESSING', 'version': 1})
+    return api_handler
+
+
+def status(api, etag=None, **params):
+    event = {'httpMethod': 'GET', 'path': '/status/j1', 'queryStringParameters': params or None}
+    if etag:
+        event['headers'] = {'If-None-Match': etag}
+    response = api.lambda_handler(event, None)
+    return response['statusCode'], response['headers'].get('ETag'), response['body'] and json.loads(response['body'])
+
+
+def update(aws, expression, values, names=None):
+    aws.dynamodb.Table('jobs').update_item(Key={'jobId': 'j1'}, UpdateExpression=expression,
+                                           ExpressionAttributeValues=values, **({'ExpressionAttributeNames': names} if names else {}))
+
+
+def test_unchanged_job_answers_304(aws, api):
+    code, etag, body = status(api)
+    assert code == 200 and body['status'] == 'PROCESSING'
+    assert status(api, etag)[:2] == (304, etag)
+    assert status(api, f"W/{etag}")[0] == 304
+
+
+def test_any_change_invalidates_the_etag_even_without_a_version_bump(aws, api):
+    _, etag, _ = status(api)
+    update(aws, 'SET progress = :p', {':p': 50})
+    code, new_etag, body = status(api, etag)
+    assert code == 200 and new_etag != etag and body['progress'] == 50
+
+
+def test_etag_is_per_field_projection(aws, api):
+    _, full, _ = status(api)
+    code, projected, body = status(api, full, fields='status')
+    assert code == 200 and projected != full
+    assert set(body) == {'jobId', 'status', 'version'}
+    assert status(api, projected, fields='status')[0] == 304
+    assert status(api, projected, fields='status,atsScore')[0] == 200
+
+
+def test_long_poll_returns_when_the_job_changes(aws, api):
+    _, etag, _ = status(api)
+    timer = threading.Timer(0.1, update, (aws, 'SET #s = :s ADD version :one', {':s': 'COMPLETED', ':one': 1}, {'#s': 'status'}))
+    timer.start()
+    started = time.monotonic()
+    code, _, body = status(api, etag, wait='5')
+    timer.join()
+    assert code == 200 and body['status'] == 'COMPLETED'
+    assert time.monotonic() - started < 2
+
+
+def test_long_poll_times_out_with_304(aws, api):
+    _, etag, _ = status(api)
+    started = time.monotonic()
+    assert status(api, etag, wait='0.2')[0] == 304
+    assert time.monotonic() - started >= 0.2
+
+
+def test_long_poll_on_a_finished_job_returns_at_once(aws, api):
+    update(aws, 'SET #s = :s', {':s': 'FAILED'}, {'#s': 'status'})
+    started = time.monotonic()
+    code, _, body = status(api, wait='5')
+    assert (code, body['status']) == (200, 'FAILED')
+    assert time.monotonic() - started < 1
+
+
+def test_bad_parameters_and_unknown_jobs(aws, api):
+    assert status(api, fields='status;drop')[0] == 400
+    assert status(api, wait='soon')[0] == 400
+    response = api.lambda_handler({'httpMethod': 'GET', 'path': '/status/missing'}, None)
+    assert response['statusCode'] == 404
+    response = api.lambda_handler({'httpMethod': 'GET', 'path': '/status/dedupe|hash|abc'}, None)
+    assert response['statusCode'] == 404
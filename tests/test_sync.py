@@ -0,0 +1,77 @@
+import json
+import threading
+
+import pytest
+
+from tools.fixtures import SAMPLE_JOB_DESCRIPTION, SAMPLE_RESUME
+from tools.local_aws import default_model_reply, lambda_context
+
+
+@pytest.fixture
+def api(aws):
+    import api_handler
+    return api_handler
+
+
+def optimize_sync(api, resume=SAMPLE_RESUME):
+    response = api.lambda_handler({
+        'httpMethod': 'POST', 'path': '/optimize', 'queryStringParameters': {'mode': 'sync'},
+        'body': json.dumps({'userId': 'u1', 'resume': resume, 'jobDescription': SAMPLE_JOB_DESCRIPTION})
+    }, lambda_context())
+    return response['statusCode'], json.loads(response['body'])
+
+
+def job(aws, job_id):
+    return aws.dynamodb.Table('jobs').items[(job_id,)]
+
+
+def test_small_resume_completes_in_the_request(aws, api):
+    status, body = optimize_sync(api)
+    assert status == 200
+    assert (body['status'], body['mode']) == ('COMPLETED', 'sync')
+    assert body['optimizedResume'] and body['result'] == f"optimized/{body['jobId']}_optimized.txt"
+    assert not aws.stepfunctions.executions
+    assert job(aws, body['jobId'])['status'] == 'COMPLETED'
+
+
+def test_deadline_falls_back_to_the_same_job_record(aws, api, monkeypatch):
+    monkeypatch.setattr(api, 'SYNC_DEADLINE_SECONDS', 0.05)
+    release = threading.Event()
+    aws.model_reply = lambda prompt: (release.wait(2), default_model_reply(prompt))[1]
+    try:
+        status, body = optimize_sync(api)
+    finally:
+        release.set()
+    assert status == 200
+    assert (body['status'], body['mode'], body['fallbackReason']) == ('QUEUED', 'async', 'deadline')
+    record = job(aws, body['jobId'])
+    # Requeued in place: the sync record's createdAt and mode survive, version moves on
+    assert (record['status'], record['mode'], record['version']) == ('QUEUED', 'sync', 2)
+    assert record['fallbackReason'] == 'deadline'
+    assert list(aws.stepfunctions.executions) == [f"job-{body['jobId']}"]
+
+
+def test_large_resume_goes_straight_to_the_workflow(aws, api, monkeypatch):
+    monkeypatch.setattr(api, 'SYNC_MAX_RESUME_CHARS', 100)
+    status, body = optimize_sync(api)
+    assert (status, body['fallbackReason']) == (200, 'size')
+    record = job(aws, body['jobId'])
+    assert (record['status'], record['version']) == ('QUEUED', 1)
+    assert 'mode' not in record
+    assert len(aws.stepfunctions.executions) == 1
+
+
+def test_sync_error_fails_the_job_and_frees_the_request(aws, api, monkeypatch):
+    def failing_run(*args):
+        raise RuntimeError('stage failed')
+
+    monkeypatch.setattr(api, 'run_sync', failing_run)
+    status, _ = optimize_sync(api)
+    assert status == 500
+    jobs = aws.dynamodb.Table('jobs').items
+    assert [item['status'] for key, item in jobs.items() if not key[0].startswith('dedupe|')] == ['FAILED']
+    assert not any(key[0].startswith('dedupe|') for key in jobs)
+
+    monkeypatch.undo()
+    status, body = optimize_sync(api)
+    assert (status, body['status']) == (200, 'COMPLETED')
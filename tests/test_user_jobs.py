@@ -0,0 +1,65 @@
+import base64
+import json
+
+import pytest
+
+
+@pytest.fixture
+def api(aws):
+    import api_handler
+    table = aws.dynamodb.Table('jobs')
+    for i in range(25):
+        table.put_item(Item={'jobId': f"j{i:02d}", 'userId': 'u1', 'createdAt': f"2024-01-01T00:00:{i:02d}",
+                             'status': 'FAILED' if i % 5 == 0 else 'COMPLETED', 'resume': 'large text', 'version': 1})
+    table.put_item(Item={'jobId': 'other', 'userId': 'u2', 'createdAt': '2024-01-02T00:00:00', 'status': 'COMPLETED'})
+    return api_handler
+
+
+def page(api, user='u1', **params):
+    response = api.lambda_handler({'httpMethod': 'GET', 'path': f"/users/{user}/jobs",
+                                   'queryStringParameters': params or None}, None)
+    return response['statusCode'], json.loads(response['body'])
+
+
+def walk(api, **params):
+    jobs, cursor, pages = [], None, 0
+    while True:
+        _, body = page(api, **params, **({'cursor': cursor} if cursor else {}))
+        jobs.extend(body['jobs'])
+        pages += 1
+        cursor = body['nextCursor']
+        if not cursor:
+            return jobs, pages
+
+
+def test_cursor_round_trip_visits_every_job_once_newest_first(aws, api):
+    jobs, pages = walk(api, limit='10')
+    assert [j['jobId'] for j in jobs] == [f"j{i:02d}" for i in reversed(range(25))]
+    assert pages == 3
+    assert 'resume' not in jobs[0]  # summary attributes only
+
+
+def test_status_filter_across_pages(aws, api):
+    jobs, _ = walk(api, limit='4', status='failed')
+    assert [j['jobId'] for j in jobs] == ['j20', 'j15', 'j10', 'j05', 'j00']
+
+
+def test_limit_is_clamped(aws, api, monkeypatch):
+    monkeypatch.setattr(api, 'JOBS_PAGE_MAX', 5)
+    _, body = page(api, limit='1000')
+    assert len(body['jobs']) == 5
+    assert page(api, limit='ten')[0] == 400
+
+
+def test_cursor_of_another_user_or_garbage_is_rejected(aws, api):
+    _, body = page(api, limit='10')
+    assert page(api, user='u2', cursor=body['nextCursor'])[0] == 400
+    assert page(api, cursor='not-a-cursor')[0] == 400
+    forged = base64.urlsafe_b64encode(json.dumps({'userId': 'u1', 'jobId': 'j1'}).encode()).decode()
+    assert page(api, cursor=forged)[0] == 400
+
+
+def test_users_only_see_their_own_jobs(aws, api):
+    _, body = page(api, user='u2')
+    assert [j['jobId'] for j in body['jobs']] == ['other']
+    assert body['nextCursor'] is None
@@ -0,0 +1,258 @@
+"""
+Offline batch optimization - one job description, many resumes
+
+Runs the deployed workflow (terraform/state_machine.asl.json and the lambda/
+stage handlers) through the in-process emulator on a pool of worker
+processes. Bedrock calls are bounded by a semaphore shared across all
+workers. Every finished resume is appended to <output>/results.jsonl, which
+doubles as the checkpoint: re-running the same command skips resumes that
+already succeeded.
+
+Only Bedrock and Comprehend go to AWS; S3, DynamoDB, SNS and EventBridge
+writes stay in local stand-ins so a batch sends no notifications. A worker
+drops each resume's objects and rows once its result is handed back, so
+memory stays flat over long batches.
+--stub-model replaces Bedrock and Comprehend too, for dry runs.
+
+Usage:
+    python tools/batch_optimize.py --resumes ./resumes --job-description jd.txt --output ./out
+    python tools/batch_optimize.py --manifest batch.jsonl --job-description jd.txt --output ./out \\
+        --workers 8 --bedrock-concurrency 16
+    python tools/batch_optimize.py --resumes ./resumes --job-description jd.txt --output ./out --stub-model
+"""
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_DIR = os.path.join(ROOT, 'lambda')
+RESUME_EXTENSIONS = ('.txt', '.md', '.pdf')
+RESULTS_FILE = 'results.jsonl'
+
+for path in (ROOT, LAMBDA_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+_machine = None
+_aws = None
+
+
+class BoundedClient:
+    """Delegates to a client, holding a cross-process semaphore around model calls"""
+
+    def __init__(self, client, semaphore):
+        self._client = client
+        self._semaphore = semaphore
+
+    def invoke_model(self, **kwargs):
+        with self._semaphore:
+            return self._client.invoke_model(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def read_resume(path):
+    """Plain text, or PDF text via PyPDF2 (lambda/requirements.txt)"""
+    if path.lower().endswith('.pdf'):
+        from PyPDF2 import PdfReader
+        return '\n'.join(page.extract_text() or '' for page in PdfReader(path).pages)
+    with open(path, encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+def job_id_for(source):
+    """Stable across runs so the checkpoint can match it"""
+    stem = re.sub(r'[^A-Za-z0-9-]+', '-', os.path.splitext(os.path.basename(source))[0]).strip('-')[:40]
+    return f"batch-{stem}-{hashlib.sha1(source.encode('utf-8')).hexdigest()[:8]}"
+
+
+def list_sources(resumes_dir=None, manifest=None):
+    """Resume paths from a directory walk or a CSV/JSONL manifest (column/key 'resume')"""
+    if resumes_dir:
+        sources = []
+        for folder, _, files in os.walk(resumes_dir):
+            sources.extend(os.path.abspath(os.path.join(folder, f))
+                           for f in files if f.lower().endswith(RESUME_EXTENSIONS))
+        return sorted(sources)
+
+    base = os.path.dirname(os.path.abspath(manifest))
+    with open(manifest, newline='') as f:
+        if manifest.lower().endswith('.csv'):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    return [os.path.normpath(os.path.join(base, row['resume'])) for row in rows]
+
+
+def load_checkpoint(output_dir):
+    """jobIds already finished successfully in an earlier run"""
+    done = set()
+    path = os.path.join(output_dir, RESULTS_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from an interrupted run
+                if record.get('status') == 'SUCCEEDED':
+                    done.add(record['jobId'])
+    return done
+
+
+def init_worker(semaphore, stub_model, scale):
+    """Per-process setup: env, AWS backends and the emulator"""
+    global _machine, _aws
+    from tools.local_aws import LOCAL_ENV, LocalAWS
+    for key, value in LOCAL_ENV.items():
+        os.environ.setdefault(key, value)
+    os.environ.setdefault('LOG_LEVEL', 'ERROR')
+    os.environ.setdefault('METRICS_ENABLED', 'false')
+
+    from shared import clients
+    _aws = LocalAWS(scale=scale).install()
+    if stub_model:
+        model = _aws.bedrock
+    else:
+        # Real model calls; everything that would write or notify stays local
+        clients.reset_clients()
+        for service, client in _aws.clients().items():
+            if service not in ('bedrock-runtime', 'comprehend'):
+                clients.override_client(service, client)
+        clients.override_resource('dynamodb', _aws.dynamodb)
+        model = clients.get_client('bedrock-runtime')
+    clients.override_client('bedrock-runtime', BoundedClient(model, semaphore))
+
+    from tools.sfn_local import StateMachine, load_definition
+    _machine = StateMachine(load_definition())
+
+
+def optimize_one(source, job_description, target_role):
+    """Runs in a worker: one resume through the whole workflow"""
+    job_id = job_id_for(source)
+    try:
+        return run_one(job_id, source, job_description, target_role)
+    finally:
+        # The result travels back to the parent, which checkpoints it; the
+        # worker's stand-ins only keep the shared learning rows
+        _aws.forget(job_id)
+
+
+def run_one(job_id, source, job_description, target_role):
+    start = time.perf_counter()
+    try:
+        resume = read_resume(source)
+    except Exception as e:
+        return {'jobId': job_id, 'source': source, 'status': 'FAILED',
+                'error': f"{type(e).__name__}: {e}"}, None
+
+    result = _machine.start({
+        'jobId': job_id, 'userId': 'batch', 'resume': resume,
+        'jobDescription': job_description, 'targetRole': target_role, 'sourceFile': source
+    }, name=job_id)
+    record = {
+        'jobId': job_id, 'source': source, 'status': result['status'],
+        'durationMs': round((time.perf_counter() - start) * 1000, 1)
+    }
+    if result['status'] != 'SUCCEEDED':
+        record['error'] = f"{result['error']['error']}: {result['error']['cause']}"
+        return record, None
+
+    from shared.versions import load_content
+    output = result['output']
+    evaluation = output.get('evaluation', {})
+    record.update({
+        'score': evaluation.get('bestScore'),
+        'originalScore': output.get('analysis', {}).get('originalScore'),
+        'approach': evaluation.get('bestApproach'),
+        'strategy': output.get('plan', {}).get('strategy'),
+        'iterations': output.get('iteration'),
+    })
+    return record, load_content(evaluation.get('bestVersion', {}))
+
+
+def run_batch(sources, job_description, output_dir, workers, bedrock_concurrency,
+              stub_model=False, scale=0.0, target_role='Professional Role'):
+    os.makedirs(output_dir, exist_ok=True)
+    done = load_checkpoint(output_dir)
+    pending = [s for s in sources if job_id_for(s) not in done]
+    print(f"{len(sources)} resumes, {len(sources) - len(pending)} already done, {len(pending)} to run")
+
+    context = multiprocessing.get_context('spawn')
+    semaphore = context.BoundedSemaphore(bedrock_concurrency)
+    counts = {'SUCCEEDED': 0, 'FAILED': 0}
+    started = time.perf_counter()
+
+    path = os.path.join(output_dir, RESULTS_FILE)
+    if os.path.exists(path) and os.path.getsize(path):
+        with open(path, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')  # end a line torn by an interrupted run so the next record stays whole
+
+    with open(path, 'a') as results, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker,
+                                initargs=(semaphore, stub_model, scale)) as pool:
+        queue = iter(pending)
+        in_flight = set()
+        # Keep a small window in flight so Ctrl-C loses at most that much work
+        while True:
+            while len(in_flight) < workers * 2:
+                source = next(queue, None)
+                if source is None:
+                    break
+                in_flight.add(pool.submit(optimize_one, source, job_description, target_role))
+            if not in_flight:
+                break
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record, content = future.result()
+                if content is not None:
+                    with open(os.path.join(output_dir, f"{record['jobId']}_optimized.txt"), 'w') as f:
+                        f.write(content)
+                results.write(json.dumps(record) + '\n')
+                results.flush()
+                os.fsync(results.fileno())
+                counts[record['status'] if record['status'] in counts else 'FAILED'] += 1
+                total = counts['SUCCEEDED'] + counts['FAILED']
+                if total % 25 == 0 or total == len(pending):
+                    rate = total / (time.perf_counter() - started)
+                    print(f"  {total}/{len(pending)} done ({counts['FAILED']} failed, {rate:.2f}/s)")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Optimize a directory or manifest of resumes against one job description')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--resumes', help='directory of .txt/.md/.pdf resumes (searched recursively)')
+    source.add_argument('--manifest', help="CSV or JSONL listing resume paths under 'resume'")
+    parser.add_argument('--job-description', required=True, help='job description text file')
+    parser.add_argument('--output', required=True, help='results directory (also the checkpoint)')
+    parser.add_argument('--target-role', default='Professional Role')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--bedrock-concurrency', type=int, default=8,
+                        help='max model calls in flight across all workers')
+    parser.add_argument('--stub-model', action='store_true', help='dry run with the local model stand-in')
+    parser.add_argument('--scale', type=float, default=0.0,
+                        help='stand-in latency multiplier (with --stub-model, 1.0 approximates real timings)')
+    args = parser.parse_args()
+
+    with open(args.job_description, encoding='utf-8') as f:
+        job_description = f.read()
+    sources = list_sources(args.resumes, args.manifest)
+    counts = run_batch(sources, job_description, args.output, args.workers, args.bedrock_concurrency,
+                       stub_model=args.stub_model, scale=args.scale, target_role=args.target_role)
+    print(f"Done: {counts['SUCCEEDED']} succeeded, {counts['FAILED']} failed - see "
+          f"{os.path.join(args.output, RESULTS_FILE)}")
+
+
+if __name__ == '__main__':
+    main()
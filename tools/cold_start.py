@@ -0,0 +1,198 @@
+"""
+Cold-start benchmark for every Lambda entry point
+
+Each handler is imported in a fresh interpreter under `-X importtime`, then
+invoked against the local AWS stand-ins: once cold, then N times warm. SDK
+client construction for the services the handler touched is timed separately
+so it can be added back to the first-invocation figure.
+
+Usage:
+    python tools/cold_start.py                         # all handlers, report to cold_start_report.json
+    python tools/cold_start.py agent_plan --runs 5
+    python tools/cold_start.py --baseline old.json     # print deltas against an earlier report
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_DIR = os.path.join(ROOT, 'lambda')
+START_MARKER = '--- importing handler ---'
+MARKER = '--- handler imported ---'
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+# Runs as `python -X importtime -c CHILD`: nothing but the handler is imported between the markers
+CHILD = """
+import sys, time
+sys.path[:0] = [{lambda_dir!r}, {root!r}]
+sys.stderr.write({start!r} + '\\n'); sys.stderr.flush()
+start = time.perf_counter()
+module = __import__({handler!r})
+import_ms = (time.perf_counter() - start) * 1000
+sys.stderr.write({marker!r} + '\\n'); sys.stderr.flush()
+from tools.cold_start import run_child
+run_child(module, {handler!r}, import_ms, {warm}, {scale})
+"""
+
+
+def run_child(module, handler, import_ms, warm, scale):
+    """Runs inside the fresh interpreter once the handler is imported: invoke cold, then warm"""
+    from tools.local_aws import LocalAWS, lambda_context
+    from tools.fixtures import sample_event
+    aws = LocalAWS(scale=scale).install()
+
+    # Handlers chat on stdout; keep it for the result line only
+    real_stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    try:
+        event = sample_event(handler, aws, os.environ, job_id='bench-0')
+        start = time.perf_counter()
+        module.lambda_handler(event, lambda_context(handler))
+        first_ms = (time.perf_counter() - start) * 1000
+        calls = aws.call_counts()
+
+        warm_ms = []
+        for i in range(warm):
+            event = sample_event(handler, aws, os.environ, job_id=f'bench-{i + 1}')
+            start = time.perf_counter()
+            module.lambda_handler(event, lambda_context(handler))
+            warm_ms.append((time.perf_counter() - start) * 1000)
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    # What the stand-ins hid: importing boto3 and building the real clients
+    from shared import clients
+    clients.reset_clients()
+    services = sorted({name.split('.')[0] for name in calls})
+    start = time.perf_counter()
+    for service in services:
+        if service == 'dynamodb':
+            clients.get_resource(service)
+        else:
+            clients.get_client(service)
+    sdk_ms = (time.perf_counter() - start) * 1000
+
+    print(json.dumps({
+        'import_ms': import_ms, 'first_invoke_ms': first_ms, 'warm_ms': warm_ms,
+        'sdk_init_ms': sdk_ms, 'services': services, 'calls': calls
+    }))
+
+
+def parse_importtime(stderr, top):
+    """Per-module self/cumulative import times (microseconds) up to the marker"""
+    modules = []
+    lines = stderr.splitlines()
+    if START_MARKER in lines:
+        lines = lines[lines.index(START_MARKER) + 1:]
+    for line in lines:
+        if line.startswith(MARKER):
+            break
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_part, cumulative_us, name = line.split('|', 2)
+        self_us = int(self_part.split(':')[1])
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append({'module': name.strip(), 'self_us': self_us,
+                        'cumulative_us': int(cumulative_us), 'depth': depth})
+    by_self = sorted(modules, key=lambda m: m['self_us'], reverse=True)[:top]
+    top_level = sorted((m for m in modules if m['depth'] == 0),
+                       key=lambda m: m['cumulative_us'], reverse=True)[:top]
+    return {
+        'total_us': sum(m['self_us'] for m in modules),
+        'module_count': len(modules),
+        'top_self': [{k: m[k] for k in ('module', 'self_us')} for m in by_self],
+        'top_level': [{k: m[k] for k in ('module', 'cumulative_us')} for m in top_level]
+    }
+
+
+def bench_handler(handler, runs, warm, scale, top):
+    samples = []
+    for _ in range(runs):
+        from tools.local_aws import LOCAL_ENV
+        code = CHILD.format(lambda_dir=LAMBDA_DIR, root=ROOT, start=START_MARKER, marker=MARKER,
+                            handler=handler, warm=warm, scale=scale)
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            capture_output=True, text=True, cwd=ROOT, env={**LOCAL_ENV, **os.environ}
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"{handler} failed:\n{proc.stderr[-2000:]}")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        result['importtime'] = parse_importtime(proc.stderr, top)
+        samples.append(result)
+
+    median = lambda key: statistics.median(s[key] for s in samples)
+    warm_all = sorted(ms for s in samples for ms in s['warm_ms'])
+    summary = {
+        'import_ms': round(median('import_ms'), 2),
+        'sdk_init_ms': round(median('sdk_init_ms'), 2),
+        'first_invoke_ms': round(median('first_invoke_ms'), 2),
+        'warm_p50_ms': round(statistics.median(warm_all), 2) if warm_all else None,
+        'warm_p95_ms': round(warm_all[int(len(warm_all) * 0.95) - 1], 2) if warm_all else None,
+        'services': samples[0]['services'],
+        'calls_first_invoke': samples[0]['calls'],
+        'importtime': min(samples, key=lambda s: s['importtime']['total_us'])['importtime'],
+    }
+    summary['cold_total_ms'] = round(summary['import_ms'] + summary['sdk_init_ms'] + summary['first_invoke_ms'], 2)
+    return summary
+
+
+def print_table(report, baseline=None):
+    columns = ('import_ms', 'sdk_init_ms', 'first_invoke_ms', 'cold_total_ms', 'warm_p50_ms')
+    print(f"{'handler':<16}" + ''.join(f"{c:>18}" for c in columns))
+    for handler, row in report['handlers'].items():
+        cells = []
+        for c in columns:
+            value = row.get(c)
+            cell = '-' if value is None else f"{value:.1f}"
+            old = (baseline or {}).get('handlers', {}).get(handler, {}).get(c)
+            if value is not None and old:
+                cell += f" ({(value - old) / old * 100:+.0f}%)"
+            cells.append(f"{cell:>18}")
+        print(f"{handler:<16}" + ''.join(cells))
+
+
+def main():
+    from tools.fixtures import HANDLERS
+    parser = argparse.ArgumentParser(description='Cold-start and import-time benchmark for the Lambda handlers')
+    parser.add_argument('handlers', nargs='*', default=HANDLERS)
+    parser.add_argument('--runs', type=int, default=3, help='fresh interpreters per handler')
+    parser.add_argument('--warm', type=int, default=20, help='warm invocations per interpreter')
+    parser.add_argument('--scale', type=float, default=0.0,
+                        help='multiplier on the stand-ins\' default AWS latency (0 = pure code cost)')
+    parser.add_argument('--top', type=int, default=15, help='modules listed per import breakdown')
+    parser.add_argument('--output', default='cold_start_report.json')
+    parser.add_argument('--baseline', help='earlier report to compare against')
+    args = parser.parse_args()
+
+    report = {
+        'generatedAt': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'settings': {'runs': args.runs, 'warm': args.warm, 'scale': args.scale},
+        'handlers': {}
+    }
+    for handler in args.handlers:
+        report['handlers'][handler] = bench_handler(handler, args.runs, args.warm, args.scale, args.top)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_table(report, baseline)
+    print(f"\nReport written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Sample inputs for the local harnesses - one representative event per handler
+"""
+import gzip
+import json
+import time
+
+SAMPLE_RESUME = """Jane Doe
+jane.doe@example.com | +1 555-123-4567 | New York, NY
+
+PROFESSIONAL SUMMARY
+Cloud engineer with 6+ years building serverless platforms on AWS.
+
+EXPERIENCE
+Senior Cloud Engineer - Acme Corp (2020 - Present)
+- Led migration of 40 services to AWS Lambda, reducing costs by 35%
+- Automated infrastructure with Terraform and CI/CD pipelines for 12 teams
+- Designed multi-account landing zone with Control Tower
+
+Cloud Engineer - Globex (2017 - 2020)
+- Built data pipelines processing 2M events per day
+- Implemented IAM guardrails and network security controls
+
+EDUCATION
+B.S. Computer Science
+
+SKILLS
+AWS, Python, Terraform, Docker, Kubernetes, Security, Automation
+"""
+
+SAMPLE_JOB_DESCRIPTION = """AWS Cloud Architect
+We are seeking an engineer to lead development, deployment and optimization of
+applications on AWS cloud infrastructure. Design multi-account environments with
+focus on security, compliance and disaster recovery. Maintain infrastructure
+automation using CI/CD pipelines and Terraform or CloudFormation. Experience with
+Lambda, Fargate, IAM and network security required.
+"""
+
+HANDLERS = [
+    'agent_analyze', 'agent_plan', 'agent_generate', 'agent_evaluate',
+    'agent_learn', 'api_handler', 's3_trigger', 'batch_handler', 'queue_consumer', 'runlog_compact'
+]
+
+
+def sample_analysis():
+    return {
+        'resumeSkills': ['aws', 'python', 'terraform'],
+        'jobRequirements': ['aws', 'terraform', 'cloudformation', 'fargate'],
+        'skillsGap': ['cloudformation', 'fargate'],
+        'matchedSkills': ['aws', 'terraform'],
+        'jobType': 'technical',
+        'sentiment': 'POSITIVE',
+        'originalScore': 62,
+        'targetScore': 85,
+        'resume': SAMPLE_RESUME,
+        'jobDescription': SAMPLE_JOB_DESCRIPTION
+    }
+
+
+def sample_plan():
+    return {
+        'strategy': 'balanced_approach',
+        'jobType': 'technical',
+        'approaches': ['keywords', 'achievements', 'structure'],
+        'successCriteria': {'atsScore': 85, 'keywordMatch': 0.8},
+        'generationMode': 'speculative',
+        'maxIterations': 3
+    }
+
+
+def sample_event(handler, aws, env, job_id='bench-job'):
+    """Fresh event for a handler; seeds any S3 objects it reads"""
+    if handler == 'agent_analyze':
+        return {'jobId': job_id, 'resume': SAMPLE_RESUME, 'jobDescription': SAMPLE_JOB_DESCRIPTION}
+    if handler == 'agent_plan':
+        return {'jobId': job_id, 'analysis': sample_analysis()}
+    if handler == 'agent_generate':
+        return {'approach': 'keywords', 'input': {
+            'jobId': job_id, 'resume': SAMPLE_RESUME,
+            'jobDescription': SAMPLE_JOB_DESCRIPTION, 'iteration': 1
+        }}
+    if handler == 'agent_evaluate':
+        return {'jobId': job_id, 'jobDescription': SAMPLE_JOB_DESCRIPTION, 'versions': [
+            {'approach': a, 'content': SAMPLE_RESUME, 'iteration': 1}
+            for a in ('keywords', 'achievements', 'structure')
+        ]}
+    if handler == 'agent_learn':
+        best = {'approach': 'keywords', 'content': SAMPLE_RESUME, 'iteration': 1,
+                'score': {'overall': 88.5, 'ats': 90, 'keywords': 0.6, 'actionVerbs': 9, 'achievements': 6}}
+        return {'jobId': job_id, 'iteration': 1, 'analysis': sample_analysis(), 'plan': sample_plan(),
+                'evaluation': {'versions': [best], 'bestVersion': best, 'bestScore': 88.5,
+                               'bestApproach': 'keywords', 'atsScore': 90, 'keywordMatch': 0.6,
+                               'actionVerbs': 9, 'achievements': 6}}
+    if handler == 'api_handler':
+        # A distinct resume per run, so warm runs take the real path and not the dedupe short-circuit
+        return {'httpMethod': 'POST', 'path': '/optimize', 'body': json.dumps({
+            'userId': 'bench', 'resume': f"{SAMPLE_RESUME}\nRef: {job_id}\n",
+            'jobDescription': SAMPLE_JOB_DESCRIPTION, 'targetRole': 'Cloud Architect'
+        })}
+    if handler == 's3_trigger':
+        bucket = env['INPUT_BUCKET']
+        aws.s3.put(bucket, 'bench-user/resume.pdf', SAMPLE_RESUME)
+        aws.s3.put(bucket, 'bench-user/job-description.txt', SAMPLE_JOB_DESCRIPTION)
+        return {'Records': [{'s3': {'bucket': {'name': bucket}, 'object': {'key': 'bench-user/resume.pdf'}}}]}
+    if handler == 'batch_handler':
+        return {'batchId': job_id, 'results': [
+            {'jobId': f"{job_id}-{i}", 'status': 'SUCCEEDED', 'score': 80 + i} for i in range(8)
+        ] + [{'jobId': f"{job_id}-{i}", 'status': 'FAILED', 'error': 'States.TaskFailed'} for i in range(8, 10)]}
+    if handler == 'queue_consumer':
+        # Processing queue messages as admission.submit writes them, two tenants
+        return {'Records': [{'messageId': f"{job_id}-{i}", 'body': json.dumps({
+            'jobId': f"{job_id}-{i}", 'stateMachineArn': env['STATE_MACHINE_ARN'],
+            'input': {'jobId': f"{job_id}-{i}", 'userId': f"bench-{i % 2}", 'resume': SAMPLE_RESUME,
+                      'jobDescription': SAMPLE_JOB_DESCRIPTION, 'targetRole': 'Cloud Architect'},
+            'enqueuedAt': time.time(), 'tenant': f"bench-{i % 2}"
+        })} for i in range(10)]}
+    if handler == 'runlog_compact':
+        # A day of per-job run log objects, as agent_learn writes them under RUN_LOG_URI
+        bucket, _, prefix = env['RUN_LOG_URI'][5:].partition('/')
+        for i in range(20):
+            record = {'schema': 2, 'jobId': f"{job_id}-{i}", 'finishedAt': 1704067200000 + i,
+                      'jobType': 'technical', 'bestScore': 80 + i % 10, 'versions': []}
+            aws.s3.put(bucket, f"{prefix}/date=2024-01-01/{job_id}-{i}.jsonl.gz",
+                       gzip.compress((json.dumps(record) + '\n').encode('utf-8')))
+        return {'day': '2024-01-01'}
+    raise ValueError(f"No sample event for {handler}")
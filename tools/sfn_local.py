@@ -0,0 +1,548 @@
+"""
+In-process Step Functions emulator for end-to-end benchmarks
+
+Interprets terraform/state_machine.asl.json (the same file Terraform deploys)
+and runs each Task's handler in-process against the local AWS stand-ins.
+Supports Task, Pass, Parallel, Map, Choice, Succeed and Fail with InputPath,
+Parameters, ResultSelector, ResultPath, OutputPath, Retry/Catch and the
+States.* intrinsics the workflow uses (MathAdd, Format, Array, ...).
+states:startExecution(.sync:2) tasks run another local definition nested,
+which is how terraform/batch_state_machine.asl.json fans out.
+
+Usage:
+    python tools/sfn_local.py --jobs 50 --concurrency 10 --scale 1.0
+    python tools/sfn_local.py --jobs 1 --latency bedrock-runtime=0.2 --output sfn_report.json
+    python tools/sfn_local.py --definition terraform/batch_state_machine.asl.json --input batch.json
+"""
+import argparse
+import copy
+import importlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_DIR = os.path.join(ROOT, 'lambda')
+DEFINITION_PATH = os.path.join(ROOT, 'terraform', 'state_machine.asl.json')
+BATCH_DEFINITION_PATH = os.path.join(ROOT, 'terraform', 'batch_state_machine.asl.json')
+START_EXECUTION = 'arn:aws:states:::states:startExecution'
+PAYLOAD_LIMIT = 256 * 1024
+
+for path in (ROOT, LAMBDA_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# templatefile() variables -> in-process handlers
+DEFAULT_RESOURCES = {
+    'analyze_arn': 'local:agent_analyze',
+    'plan_arn': 'local:agent_plan',
+    'generate_arn': 'local:agent_generate',
+    'evaluate_arn': 'local:agent_evaluate',
+    'learn_arn': 'local:agent_learn',
+    'batch_arn': 'local:batch_handler',
+    # Nested executions: local-sfn:<file under terraform/>
+    'workflow_arn': 'local-sfn:state_machine.asl.json',
+    'batch_concurrency': '10',
+}
+
+
+class StatesError(Exception):
+    def __init__(self, error, cause=''):
+        super().__init__(f"{error}: {cause}")
+        self.error = error
+        self.cause = cause
+
+
+def load_definition(path=DEFINITION_PATH, resources=None):
+    """Read the ASL template and substitute ${var} the way templatefile() does"""
+    resources = {**DEFAULT_RESOURCES, **(resources or {})}
+    with open(path) as f:
+        text = f.read()
+    text = re.sub(r'\$\{(\w+)\}', lambda m: resources[m.group(1)], text)
+    return json.loads(text)
+
+
+# ---------------------------------------------------------------------------
+# Paths and intrinsics
+# ---------------------------------------------------------------------------
+_SEGMENT = re.compile(r"\.([^.\[]+)|\[(\d+)\]|\['([^']+)'\]")
+
+
+def _segments(path):
+    if not path.startswith('$'):
+        raise StatesError('States.Runtime', f"Invalid path {path}")
+    return [(name or quoted, int(index) if index else None)
+            for name, index, quoted in _SEGMENT.findall(path[1:])]
+
+
+def get_path(data, path, context=None):
+    if path.startswith('$$'):
+        data, path = context, path[1:]
+    value = data
+    for name, index in _segments(path):
+        if index is not None:
+            if not isinstance(value, list) or index >= len(value):
+                raise StatesError('States.Runtime', f"Path {path} could not be found in input")
+            value = value[index]
+        else:
+            if not isinstance(value, dict) or name not in value:
+                raise StatesError('States.Runtime', f"Path {path} could not be found in input")
+            value = value[name]
+    return value
+
+
+def set_path(data, path, value):
+    if path == '$':
+        return value
+    data = dict(data) if isinstance(data, dict) else {}
+    segments = _segments(path)
+    target = data
+    for name, _ in segments[:-1]:
+        child = target.get(name)
+        target[name] = dict(child) if isinstance(child, dict) else {}
+        target = target[name]
+    target[segments[-1][0]] = value
+    return data
+
+
+def _split_args(text):
+    args, depth, current, quoted = [], 0, '', False
+    for ch in text:
+        if ch == "'" and not current.endswith('\\'):
+            quoted = not quoted
+        if not quoted and ch == '(':
+            depth += 1
+        elif not quoted and ch == ')':
+            depth -= 1
+        if ch == ',' and depth == 0 and not quoted:
+            args.append(current.strip())
+            current = ''
+        else:
+            current += ch
+    if current.strip():
+        args.append(current.strip())
+    return args
+
+
+def intrinsic(expression, data, context):
+    """Evaluate a States.* intrinsic function call"""
+    match = re.fullmatch(r'(States\.\w+)\((.*)\)', expression.strip(), re.S)
+    if not match:
+        raise StatesError('States.Runtime', f"Invalid intrinsic {expression}")
+    name, raw_args = match.groups()
+    args = []
+    for arg in _split_args(raw_args):
+        if arg.startswith('States.'):
+            args.append(intrinsic(arg, data, context))
+        elif arg.startswith('$'):
+            args.append(get_path(data, arg, context))
+        elif arg.startswith("'"):
+            args.append(arg[1:-1].replace("\\'", "'"))
+        elif arg == 'null':
+            args.append(None)
+        elif arg in ('true', 'false'):
+            args.append(arg == 'true')
+        else:
+            args.append(json.loads(arg))
+    if name == 'States.MathAdd':
+        return args[0] + args[1]
+    if name == 'States.Format':
+        template, values = args[0], iter(args[1:])
+        return re.sub(r'\{\}', lambda _: str(next(values)), template)
+    if name == 'States.Array':
+        return list(args)
+    if name == 'States.ArrayLength':
+        return len(args[0])
+    if name == 'States.ArrayGetItem':
+        return args[0][args[1]]
+    if name == 'States.JsonToString':
+        return json.dumps(args[0], separators=(',', ':'))
+    if name == 'States.StringToJson':
+        return json.loads(args[0])
+    if name == 'States.UUID':
+        return str(uuid.uuid4())
+    raise StatesError('States.Runtime', f"Unsupported intrinsic {name}")
+
+
+def resolve_parameters(template, data, context):
+    """Apply a Parameters / ResultSelector / ItemSelector template"""
+    if isinstance(template, dict):
+        resolved = {}
+        for key, value in template.items():
+            if key.endswith('.$'):
+                if value.startswith('States.'):
+                    resolved[key[:-2]] = intrinsic(value, data, context)
+                else:
+                    resolved[key[:-2]] = get_path(data, value, context)
+            else:
+                resolved[key] = resolve_parameters(value, data, context)
+        return resolved
+    if isinstance(template, list):
+        return [resolve_parameters(v, data, context) for v in template]
+    return template
+
+
+# ---------------------------------------------------------------------------
+# Choice rules
+# ---------------------------------------------------------------------------
+_COMPARATORS = {
+    'Equals': lambda a, b: a == b,
+    'LessThan': lambda a, b: a < b,
+    'GreaterThan': lambda a, b: a > b,
+    'LessThanEquals': lambda a, b: a <= b,
+    'GreaterThanEquals': lambda a, b: a >= b,
+}
+_TYPES = {
+    'String': lambda v: isinstance(v, str),
+    'Numeric': lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    'Boolean': lambda v: isinstance(v, bool),
+    'Timestamp': lambda v: isinstance(v, str),
+}
+
+
+def evaluate_rule(rule, data, context):
+    if 'And' in rule:
+        return all(evaluate_rule(r, data, context) for r in rule['And'])
+    if 'Or' in rule:
+        return any(evaluate_rule(r, data, context) for r in rule['Or'])
+    if 'Not' in rule:
+        return not evaluate_rule(rule['Not'], data, context)
+
+    variable = rule['Variable']
+    if 'IsPresent' in rule:
+        try:
+            get_path(data, variable, context)
+            present = True
+        except StatesError:
+            present = False
+        return present == rule['IsPresent']
+    value = get_path(data, variable, context)
+    for check, expected in (('IsNull', value is None), ('IsNumeric', _TYPES['Numeric'](value)),
+                            ('IsString', isinstance(value, str)), ('IsBoolean', isinstance(value, bool))):
+        if check in rule:
+            return expected == rule[check]
+    if 'StringMatches' in rule:
+        pattern = re.escape(rule['StringMatches']).replace(r'\*', '.*')
+        return isinstance(value, str) and re.fullmatch(pattern, value) is not None
+    for key, expected in rule.items():
+        match = re.fullmatch(r'(String|Numeric|Boolean|Timestamp)(Equals|LessThan|GreaterThan|LessThanEquals|GreaterThanEquals)(Path)?', key)
+        if match:
+            kind, op, is_path = match.groups()
+            if is_path:
+                expected = get_path(data, expected, context)
+            if not _TYPES[kind](value):
+                return False
+            return _COMPARATORS[op](value, expected)
+    raise StatesError('States.Runtime', f"Unsupported choice rule {rule}")
+
+
+# ---------------------------------------------------------------------------
+# Interpreter
+# ---------------------------------------------------------------------------
+def _error_matches(names, error):
+    return 'States.ALL' in names or error in names or (
+        'States.TaskFailed' in names and not error.startswith('States.'))
+
+
+class Execution:
+    """One execution's trace: per-state timings and payload sizes"""
+
+    def __init__(self, name, execution_input):
+        self.name = name
+        self.input = execution_input
+        self.states = []
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.context = {
+            'Execution': {'Id': f"local:{name}", 'Name': name, 'Input': execution_input,
+                          'StartTime': datetime.now(timezone.utc).isoformat()},
+            'StateMachine': {'Id': 'local:state-machine', 'Name': 'local'},
+        }
+
+    def record(self, state, state_type, elapsed_ms, payload_bytes):
+        with self.lock:
+            self.states.append({'state': state, 'type': state_type,
+                                'ms': round(elapsed_ms, 2), 'payloadBytes': payload_bytes})
+
+
+class StateMachine:
+    def __init__(self, definition, handlers=None, retry_sleep_scale=1.0):
+        self.definition = definition
+        self.handlers = handlers or {}
+        self.retry_sleep_scale = retry_sleep_scale
+        self._children = {}  # nested state machines by definition path
+        self._lock = threading.Lock()
+
+    def handler_for(self, resource):
+        """local:module -> module.lambda_handler, imported once"""
+        with self._lock:
+            if resource not in self.handlers:
+                if not resource.startswith('local:'):
+                    raise StatesError('States.Runtime', f"No local handler for {resource}")
+                self.handlers[resource] = importlib.import_module(resource.split(':', 1)[1]).lambda_handler
+            return self.handlers[resource]
+
+    def start(self, execution_input, name=None):
+        """Run to completion; returns a result dict with status, output and trace"""
+        execution = Execution(name or uuid.uuid4().hex, execution_input)
+        try:
+            output = self.run_states(self.definition, copy.deepcopy(execution_input), execution)
+            status, error = 'SUCCEEDED', None
+        except StatesError as e:
+            output, status, error = None, 'FAILED', {'error': e.error, 'cause': e.cause}
+        return {
+            'name': execution.name, 'status': status, 'output': output, 'error': error,
+            'durationMs': round((time.perf_counter() - execution.started) * 1000, 2),
+            'states': execution.states
+        }
+
+    def run_states(self, machine, data, execution):
+        name = machine['StartAt']
+        while True:
+            state = machine['States'][name]
+            execution.context['State'] = {'Name': name, 'EnteredTime': datetime.now(timezone.utc).isoformat()}
+            size = len(json.dumps(data, separators=(',', ':')))
+            if size > PAYLOAD_LIMIT:
+                raise StatesError('States.DataLimitExceeded',
+                                  f"State {name} input is {size} bytes (limit {PAYLOAD_LIMIT})")
+            start = time.perf_counter()
+            try:
+                data, next_name = self.run_state(name, state, data, execution)
+            finally:
+                execution.record(name, state['Type'], (time.perf_counter() - start) * 1000, size)
+            if next_name is None:
+                return data
+            name = next_name
+
+    def run_state(self, name, state, data, execution):
+        kind = state['Type']
+        if kind == 'Succeed':
+            return data, None
+        if kind == 'Fail':
+            raise StatesError(state.get('Error', 'States.Fail'), state.get('Cause', ''))
+        if kind == 'Choice':
+            for rule in state.get('Choices', []):
+                if evaluate_rule(rule, data, execution.context):
+                    return data, rule['Next']
+            if 'Default' not in state:
+                raise StatesError('States.NoChoiceMatched', f"No choice matched in {name}")
+            return data, state['Default']
+
+        context = execution.context
+        effective = get_path(data, state['InputPath'], context) if state.get('InputPath', '$') != '$' else data
+        if 'Parameters' in state:
+            effective = resolve_parameters(state['Parameters'], effective, context)
+
+        try:
+            if kind == 'Pass':
+                result = state['Result'] if 'Result' in state else effective
+            elif kind == 'Task':
+                result = self.run_task(state, effective, execution)
+            elif kind == 'Parallel':
+                result = self.run_parallel(state, effective, execution)
+            elif kind == 'Map':
+                result = self.run_map(state, effective, execution)
+            else:
+                raise StatesError('States.Runtime', f"Unsupported state type {kind}")
+        except StatesError as e:
+            for catcher in state.get('Catch', []):
+                if _error_matches(catcher['ErrorEquals'], e.error):
+                    error_output = {'Error': e.error, 'Cause': e.cause}
+                    result_path = catcher.get('ResultPath', '$')
+                    return (data if result_path is None else set_path(data, result_path, error_output)), catcher['Next']
+            raise
+
+        if 'ResultSelector' in state:
+            result = resolve_parameters(state['ResultSelector'], result, context)
+        result_path = state.get('ResultPath', '$')
+        output = data if result_path is None else set_path(data, result_path, result)
+        if state.get('OutputPath', '$') != '$':
+            output = get_path(output, state['OutputPath'], context)
+        return output, (None if state.get('End') else state['Next'])
+
+    def run_child(self, payload, sync):
+        """states:startExecution(.sync:2) against another local definition"""
+        arn = payload['StateMachineArn']
+        if not arn.startswith('local-sfn:'):
+            raise StatesError('States.Runtime', f"No local state machine for {arn}")
+        path = os.path.join(ROOT, 'terraform', arn.split(':', 1)[1])
+        with self._lock:
+            if path not in self._children:
+                self._children[path] = StateMachine(load_definition(path), handlers=self.handlers,
+                                                    retry_sleep_scale=self.retry_sleep_scale)
+            child = self._children[path]
+        child_input = payload.get('Input', {})
+        if isinstance(child_input, str):
+            child_input = json.loads(child_input)
+        result = child.start(child_input, name=payload.get('Name'))
+        arn = f"local:execution:{result['name']}"
+        if not sync:
+            return {'ExecutionArn': arn, 'StartDate': datetime.now(timezone.utc).isoformat()}
+        if result['status'] != 'SUCCEEDED':
+            raise StatesError('States.TaskFailed', json.dumps(result['error']))
+        return {'ExecutionArn': arn, 'Status': 'SUCCEEDED', 'Output': result['output']}
+
+    def run_task(self, state, payload, execution):
+        if state['Resource'].startswith(START_EXECUTION):
+            return self.run_child(payload, sync=state['Resource'] != START_EXECUTION)
+        handler = self.handler_for(state['Resource'])
+        retriers = state.get('Retry', [])
+        attempts = {}
+        while True:
+            try:
+                from tools.local_aws import lambda_context
+                # Lambda serializes both ways - keep that cost and its failure modes
+                event = json.loads(json.dumps(payload))
+                result = handler(event, lambda_context(state['Resource']))
+                try:
+                    return json.loads(json.dumps(result))
+                except TypeError as e:
+                    raise StatesError('Runtime.MarshalError', str(e))
+            except StatesError as e:
+                error = e
+            except Exception as e:
+                error = StatesError(type(e).__name__, str(e))
+            # Only the first retrier whose ErrorEquals matches applies; once it is
+            # exhausted the error goes to Catch, even if a later retrier matches too
+            index = next((i for i, r in enumerate(retriers) if _error_matches(r['ErrorEquals'], error.error)), None)
+            if index is None:
+                raise error
+            retrier = retriers[index]
+            attempts[index] = attempts.get(index, 0) + 1
+            if attempts[index] > retrier.get('MaxAttempts', 3):
+                raise error
+            delay = retrier.get('IntervalSeconds', 1) * retrier.get('BackoffRate', 2.0) ** (attempts[index] - 1)
+            time.sleep(delay * self.retry_sleep_scale)
+
+    def run_parallel(self, state, payload, execution):
+        branches = state['Branches']
+        with ThreadPoolExecutor(max_workers=len(branches)) as pool:
+            futures = [pool.submit(self.run_states, branch, copy.deepcopy(payload), execution)
+                       for branch in branches]
+            return [f.result() for f in futures]
+
+    def run_map(self, state, payload, execution):
+        context = execution.context
+        items = get_path(payload, state.get('ItemsPath', '$'), context)
+        processor = state.get('ItemProcessor') or state['Iterator']
+        selector = state.get('ItemSelector') or state.get('Parameters')
+        max_concurrency = state.get('MaxConcurrency') or len(items) or 1
+
+        def run_item(index, item):
+            if selector:
+                item_context = {**context, 'Map': {'Item': {'Index': index, 'Value': item}}}
+                item = resolve_parameters(selector, payload, item_context)
+            return self.run_states(processor, copy.deepcopy(item), execution)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+            futures = [pool.submit(run_item, i, item) for i, item in enumerate(items)]
+            return [f.result() for f in futures]
+
+
+# ---------------------------------------------------------------------------
+# Load benchmark
+# ---------------------------------------------------------------------------
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(round(q * (len(values) - 1))))], 2)
+
+
+def summarize(results, wall_seconds, aws):
+    per_state = {}
+    for result in results:
+        for entry in result['states']:
+            per_state.setdefault(entry['state'], {'ms': [], 'payloadBytes': []})
+            per_state[entry['state']]['ms'].append(entry['ms'])
+            per_state[entry['state']]['payloadBytes'].append(entry['payloadBytes'])
+    durations = [r['durationMs'] for r in results]
+    return {
+        'jobs': len(results),
+        'succeeded': sum(1 for r in results if r['status'] == 'SUCCEEDED'),
+        'failed': [{'name': r['name'], **r['error']} for r in results if r['status'] != 'SUCCEEDED'],
+        'wallSeconds': round(wall_seconds, 3),
+        'throughputJobsPerSec': round(len(results) / wall_seconds, 3) if wall_seconds else None,
+        'endToEndMs': {'p50': _percentile(durations, 0.5), 'p95': _percentile(durations, 0.95),
+                       'max': _percentile(durations, 1.0)},
+        'states': {
+            name: {'count': len(s['ms']), 'p50Ms': _percentile(s['ms'], 0.5),
+                   'p95Ms': _percentile(s['ms'], 0.95), 'maxMs': _percentile(s['ms'], 1.0),
+                   'maxPayloadBytes': max(s['payloadBytes'])}
+            for name, s in per_state.items()
+        },
+        'awsCalls': aws.call_counts()
+    }
+
+
+def _parse_latency(values):
+    latency = {}
+    for value in values or []:
+        service, seconds = value.split('=', 1)
+        latency[service] = float(seconds)
+    return latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the agentic workflow in-process against local AWS stand-ins')
+    parser.add_argument('--jobs', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier on the default stand-in latencies')
+    parser.add_argument('--latency', action='append', metavar='SERVICE=SECONDS',
+                        help='override one service latency, e.g. bedrock-runtime=0.5')
+    parser.add_argument('--jitter', type=float, default=0.2, help='+/- fraction of random latency jitter')
+    parser.add_argument('--input', help='JSON file with the execution input (default: sample resume/JD)')
+    parser.add_argument('--definition', default=DEFINITION_PATH)
+    parser.add_argument('--output', help='write the full report as JSON')
+    parser.add_argument('--verbose', action='store_true', help='keep handler logs and metrics')
+    args = parser.parse_args()
+
+    from tools.local_aws import LOCAL_ENV, LocalAWS, DEFAULT_LATENCY
+    for key, value in LOCAL_ENV.items():
+        os.environ.setdefault(key, value)
+    if not args.verbose:
+        os.environ.setdefault('LOG_LEVEL', 'ERROR')
+        os.environ.setdefault('METRICS_ENABLED', 'false')
+
+    latency = {s: v * args.scale for s, v in DEFAULT_LATENCY.items()}
+    latency.update(_parse_latency(args.latency))
+    aws = LocalAWS(latency=latency, jitter=args.jitter).install()
+
+    if args.input:
+        with open(args.input) as f:
+            base_input = json.load(f)
+    else:
+        from tools.fixtures import SAMPLE_RESUME, SAMPLE_JOB_DESCRIPTION
+        base_input = {'userId': 'bench', 'resume': SAMPLE_RESUME,
+                      'jobDescription': SAMPLE_JOB_DESCRIPTION, 'targetRole': 'Cloud Architect'}
+
+    machine = StateMachine(load_definition(args.definition))
+    inputs = [{**base_input, 'jobId': f"local-{i:05d}"} for i in range(args.jobs)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda job: machine.start(job, name=job['jobId']), inputs))
+    report = summarize(results, time.perf_counter() - start, aws)
+    report['settings'] = {'jobs': args.jobs, 'concurrency': args.concurrency, 'latency': latency, 'jitter': args.jitter}
+
+    print(f"{report['succeeded']}/{report['jobs']} succeeded in {report['wallSeconds']}s "
+          f"({report['throughputJobsPerSec']} jobs/s)")
+    print(f"end-to-end ms  p50={report['endToEndMs']['p50']}  p95={report['endToEndMs']['p95']}  max={report['endToEndMs']['max']}")
+    print(f"{'state':<28}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'max payload':>13}")
+    for name, s in report['states'].items():
+        print(f"{name:<28}{s['count']:>7}{s['p50Ms']:>10}{s['p95Ms']:>10}{s['maxMs']:>10}{s['maxPayloadBytes']:>13}")
+    for failure in report['failed'][:5]:
+        print(f"FAILED {failure['name']}: {failure['error']} {failure['cause']}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()